@@ -1,16 +1,27 @@
 """
-to run: python migrate_to_single_table.py --creds-path /dir/containing/db_creds --start-did <guid>
+to run: python migrate_to_single_table.py --creds-path /dir/containing/db_creds --workers 8 --checkpoint-dir /dir/for/checkpoints
+
+The index_record keyspace is split into one did range per worker process.
+Each worker migrates its range in batches, fetching every child table once
+per batch, and records the last did it migrated in its own checkpoint file
+in --checkpoint-dir, so that re-running the same command resumes where
+every worker stopped.
 """
+
 import argparse
 import backoff
 import json
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+
 import indexd.config_helper as config_helper
 from cdislogging import get_logger
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
-import re
 
 from indexd.index.drivers.alchemy import (
     IndexRecord,
@@ -23,7 +34,6 @@ from indexd.index.drivers.alchemy import (
     IndexRecordHash,
 )
 from indexd.index.drivers.single_table_alchemy import Record
-from indexd.index.errors import MultipleRecordsFound
 
 APP_NAME = "indexd"
 
@@ -37,10 +47,12 @@ def load_json(file_name):
 def main():
     args = parse_args()
     migrator = IndexRecordMigrator(
-        creds_file=args.creds_file, batch_size=args.batch_size
+        creds_file=args.creds_file,
+        batch_size=args.batch_size,
+        checkpoint_dir=args.checkpoint_dir,
     )
     migrator.index_record_to_new_table(
-        offset=args.start_offset, last_seen_guid=args.start_did
+        last_seen_guid=args.start_did, workers=args.workers
     )
     return
 
@@ -57,14 +69,7 @@ def parse_args():
     parser.add_argument(
         "--start-did",
         dest="start_did",
-        help="did to start at",
-        default=None,
-    )
-    parser.add_argument(
-        "--start-offset",
-        dest="start_offset",
-        type=int,
-        help="offset to start at",
+        help="did to start after, on a run without checkpoints",
         default=None,
     )
     parser.add_argument(
@@ -74,11 +79,35 @@ def parse_args():
         type=int,
         default=1000,
     )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        help="number of worker processes, each migrating its own did range (default: 1)",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        dest="checkpoint_dir",
+        help="directory keeping the did ranges and each worker's progress. Re-run with the same directory to resume an interrupted migration.",
+        default=None,
+    )
     return parser.parse_args()
 
 
+def _migrate_partition(args):
+    creds_file, batch_size, checkpoint_dir, worker, lower, upper = args
+    migrator = IndexRecordMigrator(
+        creds_file=creds_file, batch_size=batch_size, checkpoint_dir=checkpoint_dir
+    )
+    try:
+        return migrator.migrate_partition(worker, lower, upper)
+    finally:
+        migrator.session.close()
+
+
 class IndexRecordMigrator:
-    def __init__(self, creds_file=None, batch_size=None):
+    def __init__(self, creds_file=None, batch_size=None, checkpoint_dir=None):
         self.logger = get_logger("migrate_single_table", log_level="debug")
 
         conf_data = load_json(creds_file) if creds_file else load_json("creds.json")
@@ -88,71 +117,75 @@ class IndexRecordMigrator:
         psw = conf_data.get("db_password", "{{db_password}}")
         pghost = conf_data.get("db_host", "{{db_host}}")
         pgport = 5432
-        self.batch_size = batch_size
+        self.creds_file = creds_file
+        self.batch_size = batch_size or 1000
+        self.checkpoint_dir = checkpoint_dir
+        if checkpoint_dir:
+            os.makedirs(checkpoint_dir, exist_ok=True)
 
         try:
-            engine = create_engine(
+            self.engine = create_engine(
                 f"postgresql+psycopg2://{usr}:{psw}@{pghost}:{pgport}/{db}"
             )
         except Exception as e:
             self.logger.error(f"Failed to connect to postgres: {e}")
         Base = declarative_base()
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
+        Base.metadata.create_all(self.engine)
+        Session = sessionmaker(bind=self.engine)
 
         self.session = Session()
 
-    def index_record_to_new_table(self, offset=None, last_seen_guid=None):
+    def index_record_to_new_table(self, last_seen_guid=None, workers=1):
         """
         Collect records from index_record table, collect additional info from multiple tables and bulk insert to new record table.
+
+        The did keyspace after `last_seen_guid` is split into `workers` ranges,
+        each migrated by its own process. With a checkpoint directory, the
+        ranges and every worker's progress are kept there and a later run
+        resumes them, whatever `last_seen_guid` and `workers` it is given.
         """
         try:
             self.total_records = self.session.query(IndexRecord).count()
-            self.count = 0
-
-            while True:
-                if last_seen_guid is None:
-                    records = (
-                        self.session.query(IndexRecord)
-                        .order_by(IndexRecord.did)
-                        .limit(self.batch_size)
-                        .all()
-                    )
-                elif offset is not None:
-                    records = (
-                        self.session.query(IndexRecord)
-                        .order_by(IndexRecord.did)
-                        .offset(offset - 1)
-                        .limit(self.batch_size)
-                        .all()
-                    )
-                else:
-                    self.logger.info(f"Start guid set to: {last_seen_guid}")
-                    records = (
-                        self.session.query(IndexRecord)
-                        .order_by(IndexRecord.did)
-                        .filter(IndexRecord.did > last_seen_guid)
-                        .limit(self.batch_size)
-                        .all()
-                    )
 
-                if not records:
-                    break
+            partitions = self.load_checkpoint("partitions")
+            if partitions is None:
+                partitions = self.partition(workers, last_seen_guid)
+                self.save_checkpoint("partitions", partitions)
+            else:
+                self.logger.info(
+                    f"Resuming the {len(partitions)} did ranges in {self.checkpoint_dir}"
+                )
 
-                try:
-                    records_to_insert = self.get_info_from_mult_tables(records)
-                    self.bulk_insert_records(records_to_insert)
-                except Exception as e:
-                    raise Exception(
-                        f"Could not insert records with {e} at offset {offset} with the last seen guid {last_seen_guid}. Please re-run the job with the following --start-did {last_seen_guid}"
+            if len(partitions) == 1:
+                count = self.migrate_partition(0, *partitions[0])
+            else:
+                # the workers open their own connections: don't let them
+                # inherit this process's
+                self.session.close()
+                self.engine.dispose()
+                with multiprocessing.Pool(len(partitions)) as pool:
+                    count = sum(
+                        pool.imap_unordered(
+                            _migrate_partition,
+                            [
+                                (
+                                    self.creds_file,
+                                    self.batch_size,
+                                    self.checkpoint_dir,
+                                    worker,
+                                    lower,
+                                    upper,
+                                )
+                                for worker, (lower, upper) in enumerate(partitions)
+                            ],
+                        )
                     )
-
-                last_seen_guid = records[-1].did
+            self.logger.info(f"Migrated {count} records")
 
         except Exception as e:
             self.session.rollback()
             self.logger.error(
-                f"Error in migration: {e}. Last seen guid: {last_seen_guid} at position: {self.count}."
+                f"Error in migration: {e}. Re-run the job with the same --checkpoint-dir to resume it."
             )
         finally:
             self.session.close()
@@ -169,51 +202,185 @@ class IndexRecordMigrator:
                 )
             self.logger.info("Finished migrating :D")
 
+    def partition(self, workers, last_seen_guid=None):
+        """
+        Split the dids after `last_seen_guid` into `workers` ranges of about
+        the same number of records.
+
+        Returns:
+            list: [lower, upper] pairs, migrating the dids greater than
+            `lower` and lower than or equal to `upper`, None being unbounded.
+        """
+        bounds = []
+        if workers > 1:
+            query = "SELECT percentile_disc(CAST(:fractions AS double precision[])) WITHIN GROUP (ORDER BY did) FROM index_record"
+            if last_seen_guid is not None:
+                query += " WHERE did > :last_seen_guid"
+            percentiles = self.session.execute(
+                text(query),
+                {
+                    "fractions": [i / workers for i in range(1, workers)],
+                    "last_seen_guid": last_seen_guid,
+                },
+            ).scalar()
+            # a small table repeats dids; the database's order is kept since
+            # its collation may not sort like python does
+            for did in percentiles or []:
+                if did is not None and did not in bounds:
+                    bounds.append(did)
+        edges = [last_seen_guid] + bounds + [None]
+        return [[lower, upper] for lower, upper in zip(edges, edges[1:])]
+
+    def migrate_partition(self, worker, lower, upper):
+        """
+        Migrate the records whose did is greater than `lower` and lower than
+        or equal to `upper` (None being unbounded), resuming from the worker's
+        checkpoint if there is one.
+
+        Returns:
+            int: number of records in the range, migrated by this run or a
+            previous one.
+        """
+        checkpoint = self.load_checkpoint(f"worker-{worker}") or {}
+        count = checkpoint.get("count", 0)
+        if checkpoint.get("done"):
+            self.logger.info(f"worker {worker}: already migrated {count} records")
+            return count
+        last_seen_guid = checkpoint.get("last_seen_guid", lower)
+        self.logger.info(
+            f"worker {worker}: migrating dids after {last_seen_guid} up to {upper}"
+        )
+
+        started = time.monotonic()
+        migrated = 0
+        while True:
+            query = self.session.query(*IndexRecord.__table__.columns).order_by(
+                IndexRecord.did
+            )
+            if last_seen_guid is not None:
+                query = query.filter(IndexRecord.did > last_seen_guid)
+            if upper is not None:
+                query = query.filter(IndexRecord.did <= upper)
+            records = query.limit(self.batch_size).all()
+
+            if not records:
+                break
+
+            try:
+                records_to_insert = self.get_info_from_mult_tables(records)
+                self.bulk_insert_records(records_to_insert)
+            except Exception as e:
+                raise Exception(
+                    f"worker {worker} could not insert records with {e} with the last seen guid {last_seen_guid}"
+                )
+
+            last_seen_guid = records[-1].did
+            count += len(records)
+            migrated += len(records)
+            self.save_checkpoint(
+                f"worker-{worker}", {"last_seen_guid": last_seen_guid, "count": count}
+            )
+            elapsed = time.monotonic() - started
+            self.logger.info(
+                f"worker {worker}: done processing {count} records, {migrated / elapsed:.0f} records/s. Last seen guid: {last_seen_guid}"
+            )
+
+        self.save_checkpoint(
+            f"worker-{worker}",
+            {"last_seen_guid": last_seen_guid, "count": count, "done": True},
+        )
+        self.logger.info(f"worker {worker}: finished, {count} records")
+        return count
+
+    def load_checkpoint(self, name):
+        if not self.checkpoint_dir:
+            return None
+        try:
+            with open(os.path.join(self.checkpoint_dir, f"{name}.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_checkpoint(self, name, value):
+        if not self.checkpoint_dir:
+            return
+        path = os.path.join(self.checkpoint_dir, f"{name}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(value, f)
+        os.replace(path + ".tmp", path)
+
     @backoff.on_exception(
         backoff.expo, Exception, max_tries=5, max_time=60, jitter=backoff.full_jitter
     )
     def bulk_insert_records(self, records_to_insert):
         """
-        bulk insert records into the new Record table
+        bulk insert records into the new Record table, in one multi-row insert.
+        Records already migrated, e.g. by an interrupted run, are skipped.
         Args:
-            records_to_insert (list): List of Record objects
+            records_to_insert (list): List of Record column values
         """
         try:
-            self.session.bulk_save_objects(records_to_insert)
-            self.session.commit()
-            self.count += len(records_to_insert)
-            self.logger.info(
-                f"Done processing {self.count}/{self.total_records} records. {(self.count * 100)/self.total_records}%"
+            self.session.execute(
+                insert(Record.__table__).on_conflict_do_nothing(
+                    index_elements=[Record.guid]
+                ),
+                records_to_insert,
             )
-        except IntegrityError as e:
-            self.session.rollback()
-            self.logger.error(f"Duplicate record found for records {e}")
-        except Exception as e:
+            self.session.commit()
+        except Exception:
             self.session.rollback()
-            self.logger.error(f"Error bulk insert for records at {self.count} records")
+            self.logger.error(
+                f"Error bulk inserting records {records_to_insert[0]['guid']} to {records_to_insert[-1]['guid']}"
+            )
+            raise
 
     def get_info_from_mult_tables(self, records):
         """
         Collect records from multiple tables from old multi table infrastructure and create a list of records to insert into the new single table infrastructure
 
+        Every child table is queried once for the whole batch.
+
         Args:
-            records (list): list of IndexRecord objects
+            records (list): list of index_record rows
 
         Returns:
-            records_to_insert (list): List of Record objects
+            records_to_insert (list): List of Record column values
         """
+        dids = [record.did for record in records]
+        hashes = defaultdict(dict)
+        for did, hash_type, hash_value in self.get_batch(
+            dids, IndexRecordHash.hash_type, IndexRecordHash.hash_value
+        ):
+            hashes[did][hash_type] = hash_value
+        url_metadata = defaultdict(dict)
+        for did, url, key, value in self.get_batch(
+            dids,
+            IndexRecordUrlMetadata.url,
+            IndexRecordUrlMetadata.key,
+            IndexRecordUrlMetadata.value,
+        ):
+            url_metadata[did].setdefault(url, {})[key] = value
+        metadata = defaultdict(dict)
+        for did, key, value in self.get_batch(
+            dids, IndexRecordMetadata.key, IndexRecordMetadata.value
+        ):
+            metadata[did][key] = value
+        urls, acl, authz, alias = (
+            self.get_batch_lists(dids, column)
+            for column in (
+                IndexRecordUrl.url,
+                IndexRecordACE.ace,
+                IndexRecordAuthz.resource,
+                IndexRecordAlias.name,
+            )
+        )
+
         records_to_insert = []
         for record in records:
-            hashes = self.get_index_record_hash(record.did)
-            urls = self.get_urls_record(record.did)
-            url_metadata = self.get_urls_metadata(record.did)
-            acl = self.get_index_record_ace(record.did)
-            authz = self.get_index_record_authz(record.did)
-            alias = self.get_index_record_alias(record.did)
-            metadata = self.get_index_record_metadata(record.did)
+            did = record.did
             records_to_insert.append(
-                Record(
-                    guid=record.did,
+                dict(
+                    guid=did,
                     baseid=record.baseid,
                     rev=record.rev,
                     form=record.form,
@@ -225,13 +392,14 @@ class IndexRecordMigrator:
                     file_name=record.file_name,
                     version=record.version,
                     uploader=record.uploader,
-                    hashes=hashes,
-                    urls=urls,
-                    url_metadata=url_metadata,
-                    acl=acl,
-                    authz=authz,
-                    alias=alias,
-                    record_metadata=metadata,
+                    description=record.description,
+                    hashes=hashes.get(did, {}),
+                    urls=urls.get(did, []),
+                    url_metadata=url_metadata.get(did, {}),
+                    acl=acl.get(did, []),
+                    authz=authz.get(did, []),
+                    alias=alias.get(did, []),
+                    record_metadata=metadata.get(did, {}),
                 )
             )
         return records_to_insert
@@ -239,142 +407,29 @@ class IndexRecordMigrator:
     @backoff.on_exception(
         backoff.expo, Exception, max_tries=5, max_time=10, jitter=backoff.full_jitter
     )
-    def get_index_record_hash(self, did):
-        """
-        Get the index record hash for the given did and return correctly formatted value
-        """
-        try:
-            stmt = (
-                self.session.query(
-                    IndexRecordHash.hash_type,
-                    IndexRecordHash.hash_value,
-                )
-                .filter(IndexRecordHash.did == did)
-                .all()
-            )
-            res = {hash_type: hash_value for hash_type, hash_value in stmt}
-            return res
-        except Exception as e:
-            raise Exception(f"Error with hash for {did}: {e}")
-
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, max_time=10, jitter=backoff.full_jitter
-    )
-    def get_urls_record(self, did):
+    def get_batch(self, dids, *columns):
         """
-        Get the urls record for the given did and return correctly formatted value
+        Get the (did, *columns) rows of the child table of `columns` for every
+        did in `dids`
         """
+        table = columns[0].class_
         try:
-            stmt = (
-                self.session.query(IndexRecordUrl.url)
-                .filter(IndexRecordUrl.did == did)
+            return (
+                self.session.query(table.did, *columns)
+                .filter(table.did.in_(dids))
                 .all()
             )
-            res = [u.url for u in stmt]
-            return res
         except Exception as e:
-            raise Exception(f"Error with urls for {did}: {e}")
+            raise Exception(f"Error with {table.__tablename__}: {e}")
 
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, max_time=10, jitter=backoff.full_jitter
-    )
-    def get_urls_metadata(self, did):
+    def get_batch_lists(self, dids, column):
         """
-        Get the urls metadata for the given did and return correctly formatted value
+        Get the values of `column` for every did in `dids`, as lists by did
         """
-        try:
-            stmt = (
-                self.session.query(
-                    IndexRecordUrlMetadata.url,
-                    IndexRecordUrlMetadata.key,
-                    IndexRecordUrlMetadata.value,
-                )
-                .filter(IndexRecordUrlMetadata.did == did)
-                .all()
-            )
-            res = {url: {key: value} for url, key, value in stmt}
-            return res
-        except Exception as e:
-            raise Exception(f"Error with url metadata for {did}: {e}")
-
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, max_time=10, jitter=backoff.full_jitter
-    )
-    def get_index_record_ace(self, did):
-        """
-        Get the index record ace for the given did and return correctly formatted value
-        """
-        try:
-            stmt = (
-                self.session.query(IndexRecordACE.ace)
-                .filter(IndexRecordACE.did == did)
-                .all()
-            )
-            res = [a.ace for a in stmt]
-            return res
-        except Exception as e:
-            raise Exception(f"Error with ace for did {did}: {e}")
-
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, max_time=10, jitter=backoff.full_jitter
-    )
-    def get_index_record_authz(self, did):
-        """
-        Get the index record authz for the given did and return the correctly formatted value
-        """
-        try:
-            stmt = (
-                self.session.query(IndexRecordAuthz.resource)
-                .filter(IndexRecordAuthz.did == did)
-                .all()
-            )
-            res = [r.resource for r in stmt]
-            return res
-        except Exception as e:
-            raise Exception(f"Error with authz: {e}")
-
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, max_time=10, jitter=backoff.full_jitter
-    )
-    def get_index_record_alias(self, did):
-        """
-        Get the index record alias for the given did and return the correctly formatted
-        """
-        try:
-            stmt = (
-                self.session.query(IndexRecordAlias.name)
-                .filter(IndexRecordAlias.did == did)
-                .all()
-            )
-            res = {}
-            for did, name in stmt:
-                if did not in res:
-                    res[did] = []
-                res[did].append(name)
-            return res
-        except Exception as e:
-            raise Exception(f"Error with alias: {e}")
-
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, max_time=10, jitter=backoff.full_jitter
-    )
-    def get_index_record_metadata(self, did):
-        """
-        Get the index record metadata for the given did and return the correctly fortmatted value
-        """
-        try:
-            stmt = (
-                self.session.query(
-                    IndexRecordMetadata.key,
-                    IndexRecordMetadata.value,
-                )
-                .filter(IndexRecordMetadata.did == did)
-                .all()
-            )
-            res = {key: value for key, value in stmt}
-            return res
-        except Exception as e:
-            raise Exception(f"Error with alias for did {did}: {e}")
+        values = defaultdict(list)
+        for did, value in self.get_batch(dids, column):
+            values[did].append(value)
+        return values
 
 
 if __name__ == "__main__":
@@ -3,18 +3,21 @@ Util to reconcile the indexd stats table.
 
 Recomputes record count and total bytes from the `index_record` or `record` (whichever has a higher count) table
 and upserts the current month's StatsRecord row. Logs the delta.
+
+With --compact, only folds the pending `stats_delta` rows written by indexd into the
+monthly StatsRecord rows. This is cheap and meant to run periodically (e.g. from a cron job).
 """
 
 import argparse
 import sys
 
 from cdislogging import get_logger
-from indexd.stats_utils import seed_stats
+from indexd.stats_utils import compact_stats, seed_stats
 
 logger = get_logger(__name__, log_level="info")
 
 
-def main(path):
+def main(path, compact=False):
     sys.path.append(path)
     try:
         from local_settings import settings
@@ -24,6 +27,14 @@ def main(path):
 
     driver = settings["config"]["INDEX"]["driver"]
 
+    if compact:
+        with driver.session as session:
+            folded = compact_stats(session)
+            session.commit()
+
+        logger.info("Compaction complete: deltas_folded=%d", folded)
+        return
+
     with driver.session as session:
         count, total_bytes = seed_stats(session)
         session.commit()
@@ -44,5 +55,10 @@ if __name__ == "__main__":
         default="/var/www/indexd/",
         help="Path to directory containing local_settings.py (default: /var/www/indexd/)",
     )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Only fold pending stats deltas into the stats table, without recounting records",
+    )
     args = parser.parse_args()
-    main(args.path)
+    main(args.path, compact=args.compact)
@@ -21,6 +21,9 @@ psw = conf_data.get("db_password", "{{db_password}}")
 pghost = conf_data.get("db_host", "{{db_host}}")
 pgport = 5432
 index_config = conf_data.get("index_config")
+# connection pool settings shared by all drivers, e.g.
+# {"pool_size": 5, "max_overflow": 10, "pool_recycle": 1800, "pgbouncer": false}
+engine_options = conf_data.get("db_engine_options") or {}
 CONFIG = {}
 
 USE_SINGLE_TABLE = False
@@ -39,6 +42,16 @@ max_bulk = environ.get("MAX_BULK_REQUEST_LENGTH", None)
 if max_bulk:
     CONFIG["MAX_BULK_REQUEST_LENGTH"] = int(max_bulk)
 
+# serve Prometheus metrics at /metrics, see indexd/metrics.py
+CONFIG["ENABLE_PROMETHEUS_METRICS"] = environ.get(
+    "ENABLE_PROMETHEUS_METRICS", ""
+).lower() in ("true", "1")
+
+# e.g. {"enabled": true, "slow_query_threshold": 0.5}, see indexd/sql_profiling.py
+sql_profiling = environ.get("SQL_PROFILING", None)
+if sql_profiling:
+    CONFIG["SQL_PROFILING"] = json.loads(sql_profiling)
+
 if USE_SINGLE_TABLE is True:
     CONFIG["INDEX"] = {
         "driver": SingleTableSQLAlchemyIndexDriver(
@@ -50,6 +63,7 @@ if USE_SINGLE_TABLE is True:
                 db=db,
             ),
             index_config=index_config,
+            **engine_options,
         ),
     }
 else:
@@ -63,6 +77,7 @@ else:
                 db=db,
             ),
             index_config=index_config,
+            **engine_options,
         ),
     }
 
@@ -75,7 +90,8 @@ CONFIG["ALIAS"] = {
             pghost=pghost,
             pgport=pgport,
             db=db,
-        )
+        ),
+        **engine_options,
     ),
 }
 
@@ -88,6 +104,7 @@ AUTH = SQLAlchemyAuthDriver(
         db=db,
     ),
     arborist="http://arborist-service/",
+    **engine_options,
 )
 
 cloud_provider_map = environ.get("CLOUD_PROVIDER_MAP", None)
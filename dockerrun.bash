@@ -1,4 +1,9 @@
 #!/bin/bash
 
 nginx
+# metrics of the workers of a previous run must not be aggregated
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
 poetry run gunicorn -c "/indexd/deployment/wsgi/gunicorn.conf.py"
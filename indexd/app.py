@@ -7,6 +7,8 @@ import flask
 import logging
 
 from indexd.config_helper import validate_config
+from indexd.metrics import metrics
+from indexd.sql_profiling import SQLProfiler
 from indexd.index.drivers.alchemy import Base as IndexBase
 from indexd.alias.drivers.alchemy import Base as AliasBase
 from indexd.auth.drivers.alchemy import Base as AuthBase
@@ -62,6 +64,8 @@ def app_init(app, settings=None):
     app.register_blueprint(indexd_guid_blueprint)
     app.register_blueprint(cross_blueprint)
     app.register_blueprint(index_urls_blueprint, url_prefix="/_query/urls")
+    metrics.init_app(app)
+    SQLProfiler.init_app(app)
     app.cache = SimpleCache(default_timeout=1800)
     # Alembic may disable existing loggers. Re-apply cdislogging config after migrations.
     cdislogging.get_logger(
@@ -0,0 +1,128 @@
+"""
+Cache of Arborist authorization decisions for the auth driver.
+
+A decision is whether a token may perform a method on a set of resources,
+admin and deprecated `/programs` fallbacks included, so a cached decision
+replaces every Arborist call `authz` would have made. Tokens are identified
+by a digest of the raw token: a token is only ever given the decision that
+was made for that exact token. An allowed decision is never reused past the
+token's `exp` claim, read without verifying the token since Arborist does.
+
+Concurrent checks of the same decision wait for the one already asking
+Arborist instead of sending their own request. Decisions that depended on a
+failed Arborist request are never cached.
+
+Configured through the `SQLAlchemyAuthDriver` arguments:
+
+- authz_cache_size: number of decisions kept, 0 (the default) disables it.
+- authz_cache_ttl: seconds an allowed decision is reused (default 60), or
+  less if the token expires sooner. A policy change or a token revocation
+  in Arborist may take this long to be seen by indexd.
+- authz_negative_cache_ttl: seconds a denial is reused (default 10), kept
+  short so that newly granted access is picked up quickly.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+from indexd.index.record_cache import LRUCache
+from indexd.metrics import metrics
+
+KEY_PREFIX = "indexd:authz:"
+
+
+def token_expiry(token):
+    """
+    Return the `exp` claim of a JWT as a unix timestamp, or None if the
+    token has none or can't be read.
+    """
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(
+            base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+        )
+        return float(claims["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class AuthzCache(object):
+    """
+    Bounded TTL cache of authorization decisions with single-flight
+    de-duplication of identical checks.
+    """
+
+    def __init__(self, size=1000, ttl=60, negative_ttl=10):
+        self.cache = LRUCache(threshold=size, default_timeout=ttl)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token, method, resources):
+        identity = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        return "{}{}:{}:{}".format(
+            KEY_PREFIX, identity, method, json.dumps(sorted(resources))
+        )
+
+    def get_or_check(self, key, check, expires_at=None):
+        """
+        Return the cached decision for `key`, or call `check` to make it.
+
+        `check` returns `(allowed, cacheable)`; only decisions it reports as
+        cacheable are stored, an allowed one no later than the `expires_at`
+        unix timestamp. Errors raised by `check` are raised to every caller
+        waiting on it and are not cached.
+        """
+        allowed = self.cache.get(key)
+        if allowed is not None:
+            with self._lock:
+                self.hits += 1
+            metrics.cache_lookup("authz", "hit")
+            return allowed
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        metrics.cache_lookup("authz", "miss" if owner else "coalesced")
+
+        if not owner:
+            return future.result()
+
+        try:
+            allowed, cacheable = check()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            timeout = self.ttl if allowed else self.negative_ttl
+            if allowed and expires_at is not None:
+                timeout = min(timeout, expires_at - time.time())
+            if cacheable and timeout > 0:
+                self.cache.set(key, allowed, timeout=timeout)
+            future.set_result(allowed)
+            return allowed
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
@@ -1,4 +1,7 @@
 import hashlib
+import hmac
+import json
+import os
 
 from contextlib import contextmanager
 
@@ -7,12 +10,14 @@ from gen3authz.client.arborist.client import ArboristClient
 from sqlalchemy import String
 from sqlalchemy import Column
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.ext.declarative import declarative_base
 
+from indexd.auth.authz_cache import AuthzCache, token_expiry
 from indexd.auth.driver import AuthDriverABC
 
 from indexd.auth.errors import AuthError, AuthzError
+from indexd.index.record_cache import LRUCache
+from indexd.metrics import metrics
 
 from cdislogging import get_logger
 
@@ -38,9 +43,24 @@ class SQLAlchemyAuthDriver(AuthDriverABC):
     SQLAlchemy implementation of auth driver.
     """
 
-    def __init__(self, conn, arborist=None, **config):
+    def __init__(
+        self,
+        conn,
+        arborist=None,
+        authz_cache_size=0,
+        authz_cache_ttl=60,
+        authz_negative_cache_ttl=10,
+        credential_cache_size=0,
+        credential_cache_ttl=60,
+        **config,
+    ):
         """
         Initialize the SQLAlchemy database driver.
+        Arborist decisions are cached when `authz_cache_size` is set, see
+        `indexd.auth.authz_cache`. Verified basic auth credentials are kept
+        for `credential_cache_ttl` seconds when `credential_cache_size` is
+        set; users deleted through another process can still authenticate
+        with this process until then.
         """
         super().__init__(conn, **config)
         Base.metadata.bind = self.engine
@@ -48,6 +68,22 @@ class SQLAlchemyAuthDriver(AuthDriverABC):
         if arborist is not None:
             arborist = ArboristClient(arborist_base_url=arborist)
         self.arborist = arborist
+        self.authz_cache = None
+        if authz_cache_size:
+            self.authz_cache = AuthzCache(
+                size=authz_cache_size,
+                ttl=authz_cache_ttl,
+                negative_ttl=authz_negative_cache_ttl,
+            )
+        self.credential_cache = None
+        if credential_cache_size:
+            self.credential_cache = LRUCache(
+                threshold=credential_cache_size, default_timeout=credential_cache_ttl
+            )
+        # cached credentials are keyed by a digest salted per process, so the
+        # cache holds nothing that could be checked against a password list
+        self._credential_salt = os.urandom(16)
+        self._has_users = False
 
     @property
     @contextmanager
@@ -85,6 +121,8 @@ class SQLAlchemyAuthDriver(AuthDriverABC):
 
             new_record = AuthRecord(username=username, password=password)
             session.add(new_record)
+        self._has_users = True
+        self._clear_credential_cache()
 
     def delete(self, username):
         with self.session as session:
@@ -96,26 +134,23 @@ class SQLAlchemyAuthDriver(AuthDriverABC):
             if not user:
                 raise AuthError("User {} doesn't exist".format(username))
             session.delete(user)
+        self._has_users = False
+        self._clear_credential_cache()
 
     def auth(self, username, password):
         """
         Returns a dict of user information.
         Raises AutheError otherwise.
         """
-        password = self.digest(password)
-        with self.session as session:
-            query = session.query(AuthRecord)
-            if not query.first():
-                raise AuthError("No username / password configured in indexd")
-
-            # Select on username / password.
-            query = query.filter(AuthRecord.username == username)
-            query = query.filter(AuthRecord.password == password)
-
-            try:
-                query.one()
-            except NoResultFound as err:
-                raise AuthError("username / password mismatch")
+        if self.credential_cache is None:
+            self._verify(username, password)
+        else:
+            cache_key = self._credential_cache_key(username, password)
+            cached = self.credential_cache.has(cache_key)
+            metrics.cache_lookup("credential", "hit" if cached else "miss")
+            if not cached:
+                self._verify(username, password)
+                self.credential_cache.set(cache_key, True)
 
         context = {
             "username": username,
@@ -124,6 +159,36 @@ class SQLAlchemyAuthDriver(AuthDriverABC):
 
         return context
 
+    def _verify(self, username, password):
+        password = self.digest(password)
+        with self.session as session:
+            # Select on username / password.
+            query = session.query(AuthRecord.username)
+            query = query.filter(AuthRecord.username == username)
+            query = query.filter(AuthRecord.password == password)
+            if query.first() is not None:
+                self._has_users = True
+                return
+
+            # whether any user exists only matters to explain a failure; once
+            # one is seen it is remembered until a user is deleted
+            if not self._has_users:
+                self._has_users = session.query(AuthRecord.username).first() is not None
+            if not self._has_users:
+                raise AuthError("No username / password configured in indexd")
+            raise AuthError("username / password mismatch")
+
+    def _credential_cache_key(self, username, password):
+        return hmac.new(
+            self._credential_salt,
+            json.dumps([username, password]).encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+
+    def _clear_credential_cache(self):
+        if self.credential_cache is not None:
+            self.credential_cache.clear()
+
     def authz(self, method, resource):
         if not self.arborist:
             raise AuthError(
@@ -131,33 +196,51 @@ class SQLAlchemyAuthDriver(AuthDriverABC):
             )
 
         try:
-            # A successful call from arborist returns a bool, else returns ArboristError
-            try:
-                authorized = self.arborist.auth_request(
-                    get_jwt_token(), "indexd", method, resource
-                )
-            except Exception as e:
-                logger.error(
-                    f"Request to Arborist failed; now checking admin access. Details:\n{e}"
+            token = get_jwt_token()
+            if self.authz_cache is None:
+                authorized, _ = self._check_arborist(token, method, resource)
+            else:
+                authorized = self.authz_cache.get_or_check(
+                    AuthzCache.key(token, method, resource),
+                    lambda: self._check_arborist(token, method, resource),
+                    expires_at=token_expiry(token),
                 )
-                authorized = False
             if not authorized:
-                # admins can perform all operations
-                is_admin = self.arborist.auth_request(
-                    get_jwt_token(), "indexd", method, ["/services/indexd/admin"]
-                )
-                if not is_admin and not resource:
-                    # if `authz` is empty (no `resource`), admin == access to
-                    # `/programs` (deprecated - for backwards compatibility).
-                    is_admin = self.arborist.auth_request(
-                        get_jwt_token(), "indexd", method, ["/programs"]
-                    )
-                    if is_admin:
-                        logger.warning(
-                            "The indexd admin '/programs' logic is deprecated. Please update your policy to '/services/indexd/admin'"
-                        )
-                if not is_admin:
-                    raise AuthError("Permission denied.")
+                raise AuthError("Permission denied.")
         except Exception as err:
             logger.error(err)
             raise AuthzError(err)
+
+    def _check_arborist(self, token, method, resource):
+        """
+        Ask Arborist whether the token may perform `method` on `resource`.
+        Returns `(authorized, cacheable)`; a denial is not cacheable if the
+        resource check itself failed.
+        """
+        # A successful call from arborist returns a bool, else returns ArboristError
+        try:
+            authorized = self.arborist.auth_request(token, "indexd", method, resource)
+        except Exception as e:
+            logger.error(
+                f"Request to Arborist failed; now checking admin access. Details:\n{e}"
+            )
+            authorized = None
+        if authorized:
+            return True, True
+
+        # admins can perform all operations
+        is_admin = self.arborist.auth_request(
+            token, "indexd", method, ["/services/indexd/admin"]
+        )
+        if not is_admin and not resource:
+            # if `authz` is empty (no `resource`), admin == access to
+            # `/programs` (deprecated - for backwards compatibility).
+            is_admin = self.arborist.auth_request(
+                token, "indexd", method, ["/programs"]
+            )
+            if is_admin:
+                logger.warning(
+                    "The indexd admin '/programs' logic is deprecated. Please update your policy to '/services/indexd/admin'"
+                )
+        is_admin = bool(is_admin)
+        return is_admin, is_admin or authorized is not None
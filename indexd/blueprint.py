@@ -1,13 +1,9 @@
 import flask
 
-from indexclient.indexclient.client import IndexClient
-from doiclient.client import DOIClient
-from dosclient.client import DOSClient
-from hsclient.client import HSClient
-
-from indexd.utils import hint_match
+from indexd.dist import DistResolver
 
 from indexd.errors import AuthError
+from indexd.errors import ServiceUnavailable
 from indexd.errors import UserError
 from indexd.alias.errors import NoRecordFound as AliasNoRecordFound
 from indexd.index.errors import NoRecordFound as IndexNoRecordFound
@@ -18,6 +14,7 @@ blueprint.config = dict()
 blueprint.index_driver = None
 blueprint.alias_driver = None
 blueprint.dist = []
+blueprint.dist_resolver = DistResolver([])
 
 
 @blueprint.route("/alias/<path:alias>", methods=["GET"])
@@ -65,40 +62,14 @@ def get_record(record):
 
 
 def dist_get_record(record):
-    # Sort the list of distributed ID services
-    # Ones with which the request matches a hint will be first
-    # Followed by those that don't match the hint
-    sorted_dist = sorted(
-        blueprint.dist, key=lambda k: hint_match(record, k["hints"]), reverse=True
-    )
-
-    for indexd in sorted_dist:
-        try:
-            if indexd["type"] == "doi":  # Digital Object Identifier
-                fetcher_client = DOIClient(baseurl=indexd["host"])
-                res = fetcher_client.get(record)
-            elif indexd["type"] == "dos":  # Data Object Service
-                fetcher_client = DOSClient(baseurl=indexd["host"])
-                res = fetcher_client.get(record)
-            elif indexd["type"] == "hs":  # HydroShare and CommonsShare
-                fetcher_client = HSClient(baseurl=indexd["host"])
-                res = fetcher_client.get(record)
-            else:
-                fetcher_client = IndexClient(baseurl=indexd["host"])
-                res = fetcher_client.global_get(record, no_dist=True)
-        except Exception:
-            # a lot of things can go wrong with the get, but in general we don't care here.
-            continue
-
-        if res:
-            json = res.to_json()
-            json["from_index_service"] = {
-                "host": indexd["host"],
-                "name": indexd["name"],
-            }
-            return json
-
-    raise IndexNoRecordFound("no record found")
+    """
+    Returns a record from the distributed id services, querying the ones
+    whose hints match the record first.
+    """
+    ret = blueprint.dist_resolver.get(record)
+    if ret is None:
+        raise IndexNoRecordFound("no record found")
+    return ret
 
 
 @blueprint.errorhandler(UserError)
@@ -121,6 +92,11 @@ def handle_no_record_error(err):
     return flask.jsonify(error=str(err)), 404
 
 
+@blueprint.errorhandler(ServiceUnavailable)
+def handle_unavailable_error(err):
+    return flask.jsonify(error=str(err)), 503
+
+
 @blueprint.record
 def get_config(setup_state):
     index_config = setup_state.app.config["INDEX"]
@@ -129,3 +105,6 @@ def get_config(setup_state):
     blueprint.alias_driver = alias_config["driver"]
     if "DIST" in setup_state.app.config:
         blueprint.dist = setup_state.app.config["DIST"]
+    blueprint.dist_resolver = DistResolver(
+        blueprint.dist, **setup_state.app.config.get("DIST_RESOLVER", {})
+    )
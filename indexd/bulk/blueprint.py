@@ -1,9 +1,9 @@
 """Bulk operations for indexd"""
-import json
-
 import flask
 
 from indexd.errors import UserError
+from indexd.json_stream import json_response
+from indexd.metrics import metrics
 from indexd.index.drivers.alchemy import IndexRecord, IndexRecordUrl
 from sqlalchemy.orm import joinedload
 
@@ -29,8 +29,10 @@ def bulk_get_documents():
     guids = [str(guid) for guid in ids]
 
     docs = blueprint.index_driver.get_bulk(guid_list=guids)
+    metrics.count_records("bulk_documents", "found", len(docs))
+    metrics.count_records("bulk_documents", "not_found", len(set(guids)) - len(docs))
 
-    return flask.Response(json.dumps(docs), 200, mimetype="application/json")
+    return json_response(docs), 200
 
 
 @blueprint.record
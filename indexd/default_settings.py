@@ -6,7 +6,6 @@ import json
 from os import environ
 import json
 
-
 CONFIG = {}
 
 CONFIG["JSONIFY_PRETTYPRINT_REGULAR"] = False
@@ -22,6 +21,12 @@ USE_SINGLE_TABLE = False
 # - ADD_PREFIX_ALIAS: aliases are created for new records - "<PREFIX><GUID>".
 # Do NOT set both ADD_PREFIX_ALIAS and PREPEND_PREFIX to True, or aliases
 # will be created as "<PREFIX><PREFIX><GUID>".
+# - RECORD_CACHE_SIZE / RECORD_CACHE_TTL / RECORD_CACHE_BACKEND: read-through
+#   cache for single record lookups (GET /index/<did>, GET /<did>, DRS).
+#   Disabled by default, see indexd/index/record_cache.py.
+# - NEGATIVE_CACHE_SIZE / NEGATIVE_CACHE_TTL / NEGATIVE_CACHE_BACKEND: cache
+#   of ids that recently failed to resolve. Disabled by default, see
+#   indexd/index/record_cache.py.
 if USE_SINGLE_TABLE is True:
     CONFIG["INDEX"] = {
         "driver": SingleTableSQLAlchemyIndexDriver(
@@ -71,6 +76,27 @@ CONFIG["DIST"] = [
     },
 ]
 
+# Deadlines, caching and circuit breaking for the lookups through CONFIG["DIST"].
+# All keys are optional, see indexd/dist.py for the full list and defaults.
+CONFIG["DIST_RESOLVER"] = {
+    "timeout": 5,
+    "cache_ttl": 300,
+    "negative_cache_ttl": 60,
+}
+
+# Serve Prometheus metrics at /metrics, needs prometheus_client. See
+# indexd/metrics.py.
+CONFIG["ENABLE_PROMETHEUS_METRICS"] = False
+
+# Per-request SQL profiling: X-Indexd-Query-Count / X-Indexd-DB-Time response
+# headers and a log of requests running slow statements. Off by default, see
+# indexd/sql_profiling.py for the full list of keys.
+CONFIG["SQL_PROFILING"] = {
+    "enabled": False,
+    "slow_query_threshold": 0.5,
+    "slow_query_sample_rate": 1.0,
+}
+
 # Maximum number of objects in a single bulk DRS request.
 # Used in GET /service-info response and enforced by bulk endpoints.
 CONFIG["MAX_BULK_REQUEST_LENGTH"] = 100
@@ -0,0 +1,331 @@
+"""
+Resolution of ids that aren't known locally through the distributed id
+services listed in CONFIG["DIST"].
+
+Every peer whose hints match the id is queried at once and the first one to
+return a record wins; peers without a matching hint are only queried if none
+of the hinted ones has it. Each peer gets a deadline, a circuit breaker that
+skips it after repeated failures, a cap on its requests in flight, one client
+reused across requests, and a cache of the records it returned or didn't have.
+Indexd peers are queried through a pooled HTTP session that applies the
+deadline to the socket too, so a hung peer doesn't hold a thread for long.
+
+Tuned through CONFIG["DIST_RESOLVER"], all keys optional:
+
+- timeout: seconds to wait for a peer (default 5). A peer entry in
+  CONFIG["DIST"] can override it with its own "timeout".
+- max_workers: threads shared by all lookups (default 8).
+- max_in_flight: requests to a single peer that may be running at once,
+  including the ones abandoned at their deadline (default 4). Lookups wait
+  for a slot until the peer's deadline; a peer still busy by then is
+  reported as unavailable rather than as not having the id.
+- cache_size: records cached across all peers, 0 disables (default 1000).
+- cache_ttl: seconds a found record is cached (default 300).
+- negative_cache_ttl: seconds a "not found" answer is cached (default 60).
+- failure_threshold: consecutive failures or timeouts that open a peer's
+  circuit (default 5).
+- reset_timeout: seconds an open circuit waits before letting a trial
+  request through (default 30).
+"""
+
+import threading
+import time
+from concurrent import futures
+
+import requests
+from cdislogging import get_logger
+from doiclient.client import DOIClient
+from dosclient.client import DOSClient
+from hsclient.client import HSClient
+from indexclient.indexclient.client import IndexClient, handle_error
+from requests.adapters import HTTPAdapter
+
+from indexd.errors import ServiceUnavailable
+from indexd.index.record_cache import LRUCache
+from indexd.metrics import metrics
+from indexd.utils import hint_match
+
+logger = get_logger(__name__)
+
+KEY_PREFIX = "indexd:dist:"
+
+# seconds between checks for a free slot of a peer at its in-flight cap
+SLOT_POLL_INTERVAL = 0.01
+
+CLIENT_TYPES = {
+    "doi": DOIClient,  # Digital Object Identifier
+    "dos": DOSClient,  # Data Object Service
+    "hs": HSClient,  # HydroShare and CommonsShare
+}
+
+
+class CircuitBreaker(object):
+    """
+    Stops requests to a peer after `failure_threshold` consecutive failures.
+    Once `reset_timeout` seconds have passed a single trial request is let
+    through; its success closes the circuit again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            # half open: restart the clock so only this request goes through
+            self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class PooledIndexClient(IndexClient):
+    """
+    IndexClient sending its requests through one pooled session, with the
+    peer's timeout on every call instead of IndexClient's retried 60s.
+    """
+
+    def __init__(self, baseurl, timeout=5, pool_size=2):
+        super().__init__(baseurl=baseurl)
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, *path, **kwargs):
+        kwargs["timeout"] = self.timeout
+        resp = self.session.get(self.url_for(*path), **kwargs)
+        handle_error(resp)
+        return resp
+
+
+class Peer(object):
+    """
+    One distributed id service and the client used to query it.
+    """
+
+    def __init__(
+        self,
+        config,
+        timeout=5,
+        failure_threshold=5,
+        reset_timeout=30,
+        max_in_flight=4,
+    ):
+        self.name = config["name"]
+        self.host = config["host"]
+        self.hints = config.get("hints", [])
+        self.type = config.get("type")
+        self.timeout = config.get("timeout", timeout)
+        if self.type in CLIENT_TYPES:
+            self.client = CLIENT_TYPES[self.type](baseurl=self.host)
+        else:
+            self.client = PooledIndexClient(
+                self.host, timeout=self.timeout, pool_size=max_in_flight
+            )
+        self.breaker = CircuitBreaker(
+            failure_threshold=failure_threshold, reset_timeout=reset_timeout
+        )
+        # the doi, dos and hs clients take no timeout, so a hung request can
+        # only be kept from taking more threads of the shared executor
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def fetch(self, record):
+        """
+        Return the peer's document for this id, or None if it doesn't have
+        one. Errors are raised to the caller.
+        """
+        if self.type in CLIENT_TYPES:
+            res = self.client.get(record)
+        else:
+            res = self.client.global_get(record, no_dist=True)
+
+        if not res:
+            return None
+
+        json = res.to_json()
+        json["from_index_service"] = {"host": self.host, "name": self.name}
+        return json
+
+
+class DistResolver(object):
+    """
+    Queries the configured peers for ids that aren't known locally.
+    """
+
+    def __init__(
+        self,
+        dist,
+        timeout=5,
+        max_workers=8,
+        cache_size=1000,
+        cache_ttl=300,
+        negative_cache_ttl=60,
+        failure_threshold=5,
+        reset_timeout=30,
+        max_in_flight=4,
+    ):
+        self.peers = [
+            Peer(
+                config,
+                timeout=timeout,
+                failure_threshold=failure_threshold,
+                reset_timeout=reset_timeout,
+                max_in_flight=max_in_flight,
+            )
+            for config in dist
+        ]
+        self.cache = None
+        if cache_size:
+            self.cache = LRUCache(threshold=cache_size, default_timeout=cache_ttl)
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = negative_cache_ttl
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # created on first use so that apps without peers don't start threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="indexd-dist"
+                )
+            return self._executor
+
+    def get(self, record):
+        """
+        Return the first document found for this id, hinted peers first, or
+        None if no peer has it.
+
+        Raises ServiceUnavailable if no peer returned it and a peer that may
+        have it was too busy to be asked.
+        """
+        hinted = [peer for peer in self.peers if hint_match(record, peer.hints)]
+        others = [peer for peer in self.peers if peer not in hinted]
+        busy = []
+        for peers in (hinted, others):
+            if peers:
+                doc = self._query(peers, record, busy)
+                if doc is not None:
+                    return doc
+        if busy:
+            raise ServiceUnavailable(
+                "{} too busy to resolve {}".format(", ".join(busy), record)
+            )
+        return None
+
+    def _query(self, peers, record, busy):
+        """
+        Query `peers` at once and return the first document found, adding the
+        names of the peers that had no free slot before their deadline to
+        `busy`.
+        """
+        pending = {}
+        # peers at their in-flight cap, until a slot frees up or their deadline
+        waiting = {}
+        for peer in peers:
+            cached = self._get_cached(peer, record)
+            if cached is not None:
+                if cached["doc"] is not None:
+                    return cached["doc"]
+                continue
+            waiting[peer] = time.monotonic() + peer.timeout
+
+        while pending or waiting:
+            now = time.monotonic()
+            for peer, deadline in list(waiting.items()):
+                if peer.in_flight.acquire(blocking=False):
+                    del waiting[peer]
+                    if not peer.breaker.allow():
+                        peer.in_flight.release()
+                        logger.debug(f"Skipping {peer.name}: circuit open")
+                        continue
+                    future = self.executor.submit(self._fetch, peer, record)
+                    pending[future] = (peer, deadline)
+                elif deadline <= now:
+                    del waiting[peer]
+                    logger.warning(
+                        f"{peer.name} had too many requests in flight for {peer.timeout}s"
+                    )
+                    busy.append(peer.name)
+
+            for future, (peer, deadline) in list(pending.items()):
+                if not future.done() and deadline <= now:
+                    # the request keeps running and caches its answer if it
+                    # ever completes, but this lookup doesn't wait for it
+                    logger.warning(f"{peer.name} did not answer within {peer.timeout}s")
+                    peer.breaker.record_failure()
+                    del pending[future]
+            if not pending and not waiting:
+                break
+
+            deadlines = [deadline for _, deadline in pending.values()]
+            deadlines += waiting.values()
+            timeout = max(0, min(deadlines) - now)
+            if waiting:
+                timeout = min(timeout, SLOT_POLL_INTERVAL)
+            if not pending:
+                time.sleep(timeout)
+                continue
+            done, _ = futures.wait(
+                pending, timeout=timeout, return_when=futures.FIRST_COMPLETED
+            )
+            for future in done:
+                del pending[future]
+                if future.result() is not None:
+                    return future.result()
+
+        return None
+
+    def _fetch(self, peer, record):
+        try:
+            doc = peer.fetch(record)
+        except Exception as e:
+            # a lot of things can go wrong with the get, but in general we
+            # only care that this peer doesn't have an answer
+            logger.warning(f"Error resolving {record} through {peer.name}: {e}")
+            peer.breaker.record_failure()
+            return None
+        finally:
+            peer.in_flight.release()
+        peer.breaker.record_success()
+        self._set_cached(peer, record, doc)
+        return doc
+
+    def _get_cached(self, peer, record):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(KEY_PREFIX + peer.host + ":" + record)
+        metrics.cache_lookup("dist", "miss" if cached is None else "hit")
+        return cached
+
+    def _set_cached(self, peer, record, doc):
+        if self.cache is None:
+            return
+        timeout = self.cache_ttl if doc is not None else self.negative_cache_ttl
+        self.cache.set(
+            KEY_PREFIX + peer.host + ":" + record, {"doc": doc}, timeout=timeout
+        )
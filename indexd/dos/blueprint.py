@@ -3,6 +3,7 @@ import flask
 from indexd.blueprint import dist_get_record
 
 from indexd.errors import AuthError
+from indexd.errors import ServiceUnavailable
 from indexd.errors import UserError
 from indexd.alias.errors import NoRecordFound as AliasNoRecordFound
 from indexd.index.errors import NoRecordFound as IndexNoRecordFound
@@ -149,6 +150,12 @@ def handle_no_index_record_error(err):
     return flask.jsonify(ret), 404
 
 
+@blueprint.errorhandler(ServiceUnavailable)
+def handle_unavailable_error(err):
+    ret = {"msg": str(err), "status_code": 503}
+    return flask.jsonify(ret), 503
+
+
 @blueprint.record
 def get_config(setup_state):
     index_config = setup_state.app.config["INDEX"]
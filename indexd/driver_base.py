@@ -1,9 +1,167 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy_utils import database_exists, create_database
 
+from indexd.metrics import metrics
+
 Base = declarative_base()
 
+# Pool settings used for every non-sqlite engine unless the driver is given
+# its own. The index, alias and auth drivers built for the same database with
+# the same settings share one engine, so these bound the connections held by
+# each process.
+DEFAULT_POOL_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
+
+
+class PoolStats(object):
+    """
+    How long checkouts from an engine's pool had to wait for a connection.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, waited, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        metrics.pool_checkout(waited, timed_out=timed_out)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds": self.wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.stats = kwargs.pop("stats", None) or PoolStats()
+        super().__init__(*args, **kwargs)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.monotonic() - start, timed_out=True)
+            raise
+        self.stats.record(time.monotonic() - start)
+        return conn
+
+
+class EngineRegistry(object):
+    """
+    One engine per database URL and engine settings, shared by every driver
+    that asks for it.
+
+    With `pgbouncer=True` no connections are pooled in process (NullPool),
+    leaving pooling to PgBouncer, so nothing set up on a server connection
+    outlives the transaction that used it.
+    """
+
+    def __init__(self):
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self, conn, pgbouncer=False, **config):
+        url = make_url(conn)
+        key = (str(url), pgbouncer, repr(sorted(config.items())))
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = create_engine(
+                    url, **self._engine_options(url, pgbouncer, config)
+                )
+                if not database_exists(engine.url):
+                    create_database(engine.url)
+                self._engines[key] = engine
+            return engine
+
+    @staticmethod
+    def _engine_options(url, pgbouncer, config):
+        if url.get_backend_name() == "sqlite":
+            return config
+        if pgbouncer:
+            return {"poolclass": NullPool, **config}
+        options = dict(DEFAULT_POOL_OPTIONS)
+        options.update(config)
+        if "poolclass" not in config:
+            options["poolclass"] = TimedQueuePool
+        return options
+
+    def stats(self):
+        """
+        Return the state of every engine's pool, with the database URL
+        (password hidden) it connects to.
+        """
+        ret = []
+        with self._lock:
+            engines = list(self._engines.values())
+        for engine in engines:
+            pool = engine.pool
+            stats = {"url": repr(engine.url), "status": pool.status()}
+            if isinstance(pool, QueuePool):
+                stats.update(
+                    size=pool.size(),
+                    checked_out=pool.checkedout(),
+                    overflow=pool.overflow(),
+                )
+            if isinstance(pool, TimedQueuePool):
+                stats.update(pool.stats.as_dict())
+            ret.append(stats)
+        return ret
+
+    def reset_after_fork(self):
+        """
+        Drop the pooled connections inherited from the parent process
+        without closing them, so the parent can keep using them.
+        """
+        # another thread of the parent may have held the lock when it forked,
+        # and the child is single threaded at this point
+        self._lock = threading.Lock()
+        for engine in list(self._engines.values()):
+            engine.dispose(close=False)
+
+
+engine_registry = EngineRegistry()
+
+# gunicorn's preload_app builds the drivers before forking workers
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=engine_registry.reset_after_fork)
+
 
 class SQLAlchemyDriverBase(object):
     """
@@ -13,8 +171,7 @@ class SQLAlchemyDriverBase(object):
     def __init__(self, conn, **config):
         """
         Initialize the SQLAlchemy database driver.
+        Drivers given the same database and engine settings share an engine
+        (and its connection pool), see `EngineRegistry`.
         """
-        engine = create_engine(conn, **config)
-        if not database_exists(engine.url):
-            create_database(engine.url)
-        self.engine = engine
+        self.engine = engine_registry.get_engine(conn, **config)
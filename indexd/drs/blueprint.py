@@ -4,12 +4,14 @@ from urllib.parse import urlparse
 import flask
 import json
 from cdislogging import get_logger
-import copy
+from functools import lru_cache
 
 from indexd.errors import AuthError, AuthzError
 from indexd.errors import UserError
 from indexd.index.errors import NoRecordFound as IndexNoRecordFound
 from indexd.errors import IndexdUnexpectedError
+from indexd.json_stream import json_response
+from indexd.metrics import metrics
 from indexd.utils import reverse_url, lookup_bucket_region, get_bucket_regions
 from urllib.parse import urlparse
 
@@ -146,10 +148,17 @@ def list_drs_records():
         records = blueprint.index_driver.get_bundle_and_object_list(
             start=start, limit=limit, page=page
         )
+    metrics.count_records("drs_list", "listed", len(records))
+    bucket_regions = get_bucket_regions()
+    # converted before the response starts, so that a record failing to
+    # convert is reported by the error handlers instead of truncating a 200
     ret = {
-        "drs_objects": [indexd_to_drs(record, True) for record in records],
+        "drs_objects": [
+            indexd_to_drs(record, True, bucket_regions=bucket_regions)
+            for record in records
+        ],
     }
-    return flask.jsonify(ret), 200
+    return json_response(ret), 200
 
 
 @blueprint.route(
@@ -260,80 +269,117 @@ def resolve_single_object_auth(object_id: str) -> dict:
     # Extract authz metadata for object id
     try:
         ret = blueprint.index_driver.get_with_nonstrict_prefix(object_id)
-        authz_path_list = ret["authz"]
-        authz_metadata = copy.deepcopy(blueprint.drs_authorization_metadata)
-        preferred_type = blueprint.default_preferred_type
-        # Define default (empty) metadata details to return
-        compiled_metadata_details = {
-            "drs_object_id": object_id,
-            "supported_types": [],
-            "bearer_auth_issuers": [],
-            "passport_auth_issuers": [],
-        }
-
-        # If index driver found no object auth path info, return empty authz data
-        if not authz_path_list:
-            return compiled_metadata_details
-
-        # If auth path is for open project, just return default auth info
-        # Note: if multiple paths exists and one is an open project, only default info is gserviceaccount
-        if any(["/open" in path for path in authz_path_list]):
-            compiled_metadata_details["supported_types"] = ["None"]
-            return compiled_metadata_details
-
-        # Extract & compile auth metadata details (for each path)
-        compiled_passport_auth_issuers = set()
-        compiled_bearer_auth_issuers = set()
-        for authz in authz_path_list:
-            authz_metadata_details = authz_metadata.get(authz, {})
-            # Compile passport issuer list and remove duplicates
-            if "passport_auth_issuers" in authz_metadata_details:
-                compiled_passport_auth_issuers.update(
-                    authz_metadata_details["passport_auth_issuers"]
-                )
-            elif blueprint.default_passport_issuer:
-                compiled_passport_auth_issuers.add(blueprint.default_passport_issuer)
+        return resolve_object_auth(object_id, ret["authz"])
+    except IndexNoRecordFound as err:
+        raise IndexNoRecordFound(err)
+    except Exception as err:
+        raise IndexdUnexpectedError(err)
 
-            # Compile bearer issuer list and remove duplicates
-            if "bearer_auth_issuers" in authz_metadata_details:
-                compiled_bearer_auth_issuers.update(
-                    authz_metadata_details["bearer_auth_issuers"]
-                )
-            elif blueprint.default_bearer_issuer:
-                compiled_bearer_auth_issuers.add(blueprint.default_bearer_issuer)
-            else:
-                logger.warning(
-                    "Unable to determine bearer issuer - this should be configured to Fence's token issuer or in trustedIssuers!!!"
-                )
-            # Update issuer info
-            compiled_metadata_details["passport_auth_issuers"] = sorted(
-                compiled_passport_auth_issuers
+
+def resolve_object_auth(object_id: str, authz_path_list: list) -> dict:
+    """Returns dict with authorization metadata for an already-loaded object
+
+    Args:
+        object_id (str): id to report as `drs_object_id`
+        authz_path_list (list): the object's `authz` field
+    """
+    compiled = _compile_authorization_metadata(
+        tuple(authz_path_list or ()),
+        blueprint.default_preferred_type,
+        blueprint.default_bearer_issuer,
+        blueprint.default_passport_issuer,
+    )
+    return {
+        "drs_object_id": object_id,
+        "supported_types": list(compiled["supported_types"]),
+        "bearer_auth_issuers": list(compiled["bearer_auth_issuers"]),
+        "passport_auth_issuers": list(compiled["passport_auth_issuers"]),
+    }
+
+
+@lru_cache(maxsize=1024)
+def _compile_authorization_metadata(
+    authz_paths: tuple,
+    preferred_type: str,
+    default_bearer_issuer: str,
+    default_passport_issuer: str,
+) -> dict:
+    """
+    Compile issuers and supported types for a set of authz paths.
+
+    The result only depends on the arguments and on
+    `DRS_AUTHORIZATION_METADATA`, so it is cached per distinct `authz` value
+    and the cache is cleared whenever the blueprint is (re)configured.
+    Returned values are tuples so the cached entry can't be mutated.
+    """
+    authz_metadata = blueprint.drs_authorization_metadata
+    # Define default (empty) metadata details to return
+    compiled_metadata_details = {
+        "supported_types": (),
+        "bearer_auth_issuers": (),
+        "passport_auth_issuers": (),
+    }
+
+    # If index driver found no object auth path info, return empty authz data
+    if not authz_paths:
+        return compiled_metadata_details
+
+    # If auth path is for open project, just return default auth info
+    # Note: if multiple paths exists and one is an open project, only default info is gserviceaccount
+    if any(["/open" in path for path in authz_paths]):
+        compiled_metadata_details["supported_types"] = ("None",)
+        return compiled_metadata_details
+
+    # Extract & compile auth metadata details (for each path)
+    compiled_passport_auth_issuers = set()
+    compiled_bearer_auth_issuers = set()
+    for authz in authz_paths:
+        authz_metadata_details = authz_metadata.get(authz, {})
+        # Compile passport issuer list and remove duplicates
+        if "passport_auth_issuers" in authz_metadata_details:
+            compiled_passport_auth_issuers.update(
+                authz_metadata_details["passport_auth_issuers"]
             )
-            compiled_metadata_details["bearer_auth_issuers"] = sorted(
-                compiled_bearer_auth_issuers
+        elif default_passport_issuer:
+            compiled_passport_auth_issuers.add(default_passport_issuer)
+
+        # Compile bearer issuer list and remove duplicates
+        if "bearer_auth_issuers" in authz_metadata_details:
+            compiled_bearer_auth_issuers.update(
+                authz_metadata_details["bearer_auth_issuers"]
             )
-            if "preferred_type" in authz_metadata_details:
-                preferred_type = authz_metadata_details["preferred_type"]
-
-        # Update supported_types
-        compiled_supported_types = []
-        if preferred_type == "PassportAuth":
-            if compiled_passport_auth_issuers:
-                compiled_supported_types.append("PassportAuth")
-            if compiled_bearer_auth_issuers:
-                compiled_supported_types.append("BearerAuth")
+        elif default_bearer_issuer:
+            compiled_bearer_auth_issuers.add(default_bearer_issuer)
         else:
-            if compiled_bearer_auth_issuers:
-                compiled_supported_types.append("BearerAuth")
-            if compiled_passport_auth_issuers:
-                compiled_supported_types.append("PassportAuth")
+            logger.warning(
+                "Unable to determine bearer issuer - this should be configured to Fence's token issuer or in trustedIssuers!!!"
+            )
+        if "preferred_type" in authz_metadata_details:
+            preferred_type = authz_metadata_details["preferred_type"]
 
-        compiled_metadata_details["supported_types"] = compiled_supported_types
-        return compiled_metadata_details
-    except IndexNoRecordFound as err:
-        raise IndexNoRecordFound(err)
-    except Exception as err:
-        raise IndexdUnexpectedError(err)
+    # Update issuer info
+    compiled_metadata_details["passport_auth_issuers"] = tuple(
+        sorted(compiled_passport_auth_issuers)
+    )
+    compiled_metadata_details["bearer_auth_issuers"] = tuple(
+        sorted(compiled_bearer_auth_issuers)
+    )
+
+    # Update supported_types
+    compiled_supported_types = []
+    if preferred_type == "PassportAuth":
+        if compiled_passport_auth_issuers:
+            compiled_supported_types.append("PassportAuth")
+        if compiled_bearer_auth_issuers:
+            compiled_supported_types.append("BearerAuth")
+    else:
+        if compiled_bearer_auth_issuers:
+            compiled_supported_types.append("BearerAuth")
+        if compiled_passport_auth_issuers:
+            compiled_supported_types.append("PassportAuth")
+
+    compiled_metadata_details["supported_types"] = tuple(compiled_supported_types)
+    return compiled_metadata_details
 
 
 def resolve_bulk_object_auth(id_list: list[str], auth_only=True) -> dict:
@@ -354,26 +400,24 @@ def resolve_bulk_object_auth(id_list: list[str], auth_only=True) -> dict:
     }
     # Bulk retrieve docs from id list
     docs = blueprint.index_driver.get_bulk(id_list)
-    doc_dids = [doc["did"] for doc in docs]
+    doc_dids = {doc["did"] for doc in docs}
     # Annotate if an original id(s) is not returned in bulk call (record as unresolved, index not found)
     for i in id_list:
         if i not in doc_dids:
             missing_error_guids.append(i)
     # Check the authz for each returned object:
     resolved_count = 0
+    bucket_regions = None if auth_only else get_bucket_regions()
     for doc in docs:
         # Resolve individual
         guid = doc["did"]
-        if guid in missing_error_guids:
-            continue
         try:
-            # If index not found error occurs here, it will be caught as an unexpected error
-            # becuase we already checked for missing guids before the try block. Any issue
-            # encountered is likely not solely tied to an index-not-found issue.
+            # The document is already loaded, so authorization metadata is
+            # computed from it directly instead of re-reading the record.
             if auth_only:
-                resolved_info = resolve_single_object_auth(object_id=guid)
+                resolved_info = resolve_object_auth(guid, doc["authz"])
             else:
-                resolved_info = indexd_to_drs(record=doc)
+                resolved_info = indexd_to_drs(record=doc, bucket_regions=bucket_regions)
         # Handle unexpected error and continue
         except Exception as err:
             unexpected_error_guids.append(guid)
@@ -385,6 +429,11 @@ def resolve_bulk_object_auth(id_list: list[str], auth_only=True) -> dict:
         resolved_drs_objects.append(resolved_info)
         resolved_count = resolved_count + 1
 
+    endpoint = "drs_bulk_options" if auth_only else "drs_bulk"
+    metrics.count_records(endpoint, "resolved", resolved_count)
+    metrics.count_records(endpoint, "not_found", len(missing_error_guids))
+    metrics.count_records(endpoint, "error", len(unexpected_error_guids))
+
     # Update summary counts
     summary["resolved"] = resolved_count
     summary["unresolved"] = total_requested - resolved_count
@@ -405,13 +454,18 @@ def resolve_bulk_object_auth(id_list: list[str], auth_only=True) -> dict:
     return compiled_info
 
 
-def indexd_to_drs(record, expand=False):
+def indexd_to_drs(record, expand=False, bucket_regions=None):
     """
     Convert record to ga4gh-compilant format. Includes access_methods resolution.
 
+    Everything is derived from the record passed in, so rendering a page of
+    records does not read from the database again.
+
     Args:
         record(dict): json object record
         expand(bool): show contents of the descendants
+        bucket_regions(dict): result of `get_bucket_regions()`, fetched only
+            if needed when not given. Pass it in when rendering many records.
     """
 
     did = (
@@ -469,9 +523,6 @@ def indexd_to_drs(record, expand=False):
         "checksums": [],
         "description": description,
     }
-    # Get access method dict for each url
-    bucket_regions = get_bucket_regions()
-
     region = {}
     urls_metadata = record.get("urls_metadata", {})
     for url, meta in urls_metadata.items():
@@ -483,6 +534,8 @@ def indexd_to_drs(record, expand=False):
             parsed_url = urlparse(url)
             protocol = parsed_url.scheme.lower()
             if protocol in {"s3", "gs"} and url not in region:
+                if bucket_regions is None:
+                    bucket_regions = get_bucket_regions()
                 bucket_name = parsed_url.netloc
                 matched_region = lookup_bucket_region(
                     bucket_name, bucket_regions, protocol
@@ -536,13 +589,14 @@ def indexd_to_drs(record, expand=False):
     # AND drs_object['access_method'] is populated with an access url
     # Auth metadata is optional for bundles
     if form == "object" and drs_object["access_methods"] != []:
+        # Authorizations only depend on the record's authz, so they are
+        # resolved once and shared by all of its access methods
+        authorizations = resolve_object_auth(record["did"], record.get("authz"))
         for entry in drs_object["access_methods"]:
             # Take no action and continue to next if access_url missing
             if "access_url" not in entry:
                 continue
             # Otherwise add auth info in entry
-            did = record["did"]
-            authorizations = resolve_single_object_auth(object_id=did)
             entry.update({"authorizations": authorizations})
     # Parse out checksums
     drs_object["checksums"] = parse_checksums(record, drs_object)
@@ -704,6 +758,7 @@ def handle_unexpected_error(err):
 def get_config(setup_state):
     index_config = setup_state.app.config["INDEX"]
     blueprint.index_driver = index_config["driver"]
+    _compile_authorization_metadata.cache_clear()
     blueprint.default_passport_issuer = None
     blueprint.default_bearer_issuer = None
     if "DRS_SERVICE_INFO" in setup_state.app.config:
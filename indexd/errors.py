@@ -13,6 +13,12 @@ class ConfigurationError(Exception):
     """
 
 
+class ServiceUnavailable(Exception):
+    """
+    A service needed to answer is unavailable for now.
+    """
+
+
 class IndexdUnexpectedError(Exception):
     """
     Unexpected Error
@@ -9,8 +9,14 @@ from indexd import auth
 
 from indexd.errors import AuthError, AuthzError
 from indexd.errors import UserError
+from indexd.json_stream import json_response
 
-from indexd.utils import get_bucket_regions, lookup_bucket_region
+from indexd.utils import (
+    decode_page_cursor,
+    encode_page_cursor,
+    get_bucket_regions,
+    lookup_bucket_region,
+)
 
 from .schema import PUT_RECORD_SCHEMA
 from .schema import POST_RECORD_SCHEMA
@@ -35,6 +41,9 @@ blueprint.index_driver = None
 blueprint.dist = []
 blueprint.cloud_provider_map = {}
 
+# upper bound on the number of records accepted by POST /index/bulk
+MAX_BULK_RECORDS = 10000
+
 ACCEPTABLE_HASHES = {
     "md5": re.compile(r"^[0-9a-f]{32}$").match,
     "sha1": re.compile(r"^[0-9a-f]{40}$").match,
@@ -56,34 +65,11 @@ def validate_hashes(**hashes):
         raise UserError("invalid hash values specified")
 
 
-@blueprint.route("/index/", methods=["GET"])
-def get_index(form=None):
+def get_record_filters():
     """
-    Returns a list of records.
+    Parse the record filter query parameters shared by GET /index/ and
+    GET /index/export.
     """
-    limit = flask.request.args.get("limit")
-    start = flask.request.args.get("start")
-    page = flask.request.args.get("page")
-
-    ids = flask.request.args.get("ids")
-    if ids:
-        ids = ids.split(",")
-        if start is not None or limit is not None or page is not None:
-            raise UserError("pagination is not supported when ids is provided")
-    try:
-        limit = 100 if limit is None else int(limit)
-    except ValueError as err:
-        raise UserError("limit must be an integer")
-
-    if limit < 0 or limit > 1024:
-        raise UserError("limit must be between 0 and 1024")
-
-    if page is not None:
-        try:
-            page = int(page)
-        except ValueError as err:
-            raise UserError("page must be an integer")
-
     size = flask.request.args.get("size")
     try:
         size = size if size is None else int(size)
@@ -131,7 +117,66 @@ def get_index(form=None):
         except ValueError:
             raise UserError("negate_params must be a valid json string")
 
+    return {
+        "size": size,
+        "urls": urls,
+        "acl": acl,
+        "authz": authz,
+        "hashes": hashes,
+        "file_name": file_name,
+        "version": version,
+        "uploader": uploader,
+        "metadata": metadata,
+        "urls_metadata": urls_metadata,
+        "negate_params": negate_params,
+    }
+
+
+@blueprint.route("/index/", methods=["GET"])
+def get_index(form=None):
+    """
+    Returns a list of records.
+    """
+    limit = flask.request.args.get("limit")
+    start = flask.request.args.get("start")
+    page = flask.request.args.get("page")
+    cursor = flask.request.args.get("cursor")
+
+    ids = flask.request.args.get("ids")
+    if ids:
+        ids = ids.split(",")
+        if (
+            start is not None
+            or limit is not None
+            or page is not None
+            or cursor is not None
+        ):
+            raise UserError("pagination is not supported when ids is provided")
+
+    if page is not None and cursor is not None:
+        raise UserError("page and cursor cannot be used together")
+
+    try:
+        limit = 100 if limit is None else int(limit)
+    except ValueError as err:
+        raise UserError("limit must be an integer")
+
+    if limit < 0 or limit > 1024:
+        raise UserError("limit must be between 0 and 1024")
+
+    if page is not None:
+        try:
+            page = int(page)
+        except ValueError as err:
+            raise UserError("page must be an integer")
+
+    filters = get_record_filters()
+
     form = flask.request.args.get("form") if not form else form
+    if cursor is not None and form in ("bundle", "all"):
+        raise UserError("cursor is only supported when listing objects")
+    decoded_cursor = decode_page_cursor(cursor) if cursor is not None else None
+
     if form == "bundle":
         records = blueprint.index_driver.get_bundle_list(
             start=start, limit=limit, page=page
@@ -141,36 +186,30 @@ def get_index(form=None):
             limit=limit,
             page=page,
             start=start,
-            size=size,
-            urls=urls,
-            acl=acl,
-            authz=authz,
-            hashes=hashes,
-            file_name=file_name,
-            version=version,
-            uploader=uploader,
-            metadata=metadata,
             ids=ids,
-            urls_metadata=urls_metadata,
-            negate_params=negate_params,
+            **filters,
         )
     else:
         records = blueprint.index_driver.ids(
             start=start,
             limit=limit,
             page=page,
-            size=size,
-            file_name=file_name,
-            version=version,
-            urls=urls,
-            acl=acl,
-            authz=authz,
-            hashes=hashes,
-            uploader=uploader,
             ids=ids,
-            metadata=metadata,
-            urls_metadata=urls_metadata,
-            negate_params=negate_params,
+            cursor=decoded_cursor,
+            **filters,
+        )
+
+    # records are in (updated_date, did) order when paging, so a token built
+    # from the last one lets the next request seek instead of using OFFSET
+    next_cursor = None
+    if (
+        form not in ("bundle", "all")
+        and (page is not None or cursor is not None)
+        and records
+        and len(records) == limit
+    ):
+        next_cursor = encode_page_cursor(
+            records[-1]["updated_date"], records[-1]["did"]
         )
 
     base = {
@@ -179,17 +218,47 @@ def get_index(form=None):
         "limit": limit,
         "start": start,
         "page": page,
-        "size": size,
-        "file_name": file_name,
-        "version": version,
-        "urls": urls,
-        "acl": acl,
-        "authz": authz,
-        "hashes": hashes,
-        "metadata": metadata,
-        "urls_metadata": urls_metadata,
+        "cursor": cursor,
+        "next_cursor": next_cursor,
+        "size": filters["size"],
+        "file_name": filters["file_name"],
+        "version": filters["version"],
+        "urls": filters["urls"],
+        "acl": filters["acl"],
+        "authz": filters["authz"],
+        "hashes": filters["hashes"],
+        "metadata": filters["metadata"],
+        "urls_metadata": filters["urls_metadata"],
     }
-    return flask.jsonify(base), 200
+    return json_response(base), 200
+
+
+@blueprint.route("/index/export", methods=["GET"])
+def export_index():
+    """
+    Stream every record matching the GET /index/ filters, one JSON document
+    per line.
+
+    The response is generated while the driver reads through a server-side
+    cursor, so a full dump is a single long-lived request with bounded
+    memory instead of thousands of paginated ones.
+    """
+    export_format = flask.request.args.get("format", "ndjson")
+    if export_format != "ndjson":
+        raise UserError("format must be ndjson")
+
+    start = flask.request.args.get("start")
+    filters = get_record_filters()
+
+    records = blueprint.index_driver.export(start=start, **filters)
+
+    def generate():
+        for record in records:
+            yield json.dumps(record) + "\n"
+
+    return flask.Response(
+        flask.stream_with_context(generate()), mimetype="application/x-ndjson"
+    )
 
 
 @blueprint.route("/urls/", methods=["GET"])
@@ -399,6 +468,26 @@ def get_index_record(record):
     return flask.jsonify(ret), 200
 
 
+def validate_content_dates(content_created_date, content_updated_date):
+    """
+    Validate the content dates of a new record and return the
+    content_updated_date to store, which defaults to content_created_date.
+    """
+    if content_updated_date is None:
+        content_updated_date = content_created_date
+
+    if content_updated_date is not None and content_created_date is None:
+        raise UserError("Cannot set content_updated_date without content_created_date")
+
+    if content_updated_date is not None and content_created_date is not None:
+        if content_updated_date < content_created_date:
+            raise UserError(
+                "content_updated_date cannot come before content_created_date"
+            )
+
+    return content_updated_date
+
+
 @blueprint.route("/index/", methods=["POST"])
 def post_index_record():
     """
@@ -427,19 +516,9 @@ def post_index_record():
     uploader = flask.request.json.get("uploader")
     description = flask.request.json.get("description")
     content_created_date = flask.request.json.get("content_created_date")
-    content_updated_date = flask.request.json.get("content_updated_date")
-
-    if content_updated_date is None:
-        content_updated_date = content_created_date
-
-    if content_updated_date is not None and content_created_date is None:
-        raise UserError("Cannot set content_updated_date without content_created_date")
-
-    if content_updated_date is not None and content_created_date is not None:
-        if content_updated_date < content_created_date:
-            raise UserError(
-                "content_updated_date cannot come before content_created_date"
-            )
+    content_updated_date = validate_content_dates(
+        content_created_date, flask.request.json.get("content_updated_date")
+    )
 
     did, rev, baseid = blueprint.index_driver.add(
         form,
@@ -465,6 +544,64 @@ def post_index_record():
     return flask.jsonify(ret), 200
 
 
+@blueprint.route("/index/bulk", methods=["POST"])
+def post_index_records_bulk():
+    """
+    Create many records in one request.
+
+    Every record is validated and authorized on its own and the accepted ones
+    are written in a single transaction. The response lists, in request
+    order, either the created did/rev/baseid or the reason a record was
+    rejected, so one bad record does not fail the whole batch.
+    """
+    docs = flask.request.get_json(force=True)
+    if not isinstance(docs, list):
+        raise UserError("request body must be a list of records")
+    if len(docs) > MAX_BULK_RECORDS:
+        raise UserError(
+            "at most {} records can be created per request".format(MAX_BULK_RECORDS)
+        )
+
+    results = [None] * len(docs)
+    valid = []
+    # most batches share a handful of authz sets, only check each one once
+    authz_errors = {}
+
+    for i, doc in enumerate(docs):
+        did = doc.get("did") if isinstance(doc, dict) else None
+        try:
+            jsonschema.validate(doc, POST_RECORD_SCHEMA)
+            doc["content_updated_date"] = validate_content_dates(
+                doc.get("content_created_date"), doc.get("content_updated_date")
+            )
+        except jsonschema.ValidationError as err:
+            results[i] = {"did": did, "error": err.message}
+            continue
+        except UserError as err:
+            results[i] = {"did": did, "error": str(err)}
+            continue
+
+        authz = doc.get("authz", [])
+        key = tuple(sorted(set(authz)))
+        if key not in authz_errors:
+            try:
+                auth.authorize("create", authz)
+                authz_errors[key] = None
+            except (AuthError, AuthzError) as err:
+                authz_errors[key] = str(err)
+        if authz_errors[key] is not None:
+            results[i] = {"did": did, "error": authz_errors[key]}
+            continue
+
+        valid.append(i)
+
+    created = blueprint.index_driver.bulk_add([docs[i] for i in valid])
+    for i, result in zip(valid, created):
+        results[i] = result
+
+    return flask.jsonify({"records": results}), 200
+
+
 @blueprint.route("/index/blank/", methods=["POST"])
 def post_index_blank_record():
     """
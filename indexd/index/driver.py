@@ -9,9 +9,82 @@ class IndexDriverABC(SQLAlchemyDriverBase, metaclass=abc.ABCMeta):
     Driver interface for interacting with index backends.
     """
 
+    # RecordCache used by `get`, set up by the concrete drivers
+    record_cache = None
+    # MissCache of ids that recently failed to resolve
+    miss_cache = None
+    # record cache key prefix of documents found by `get_with_nonstrict_prefix`,
+    # kept apart so an id that only resolves with the prefix changed does not
+    # resolve through `get`
+    NONSTRICT_KEY_PREFIX = "nonstrict:"
+
     def __init__(self, conn, **config):
         super().__init__(conn, **config)
 
+    def get_cached_record(self, did, nonstrict=False):
+        """
+        Return the cached document for this did or baseid, or None. With
+        `nonstrict`, return the one `get_with_nonstrict_prefix` cached for
+        the id as it was requested.
+        """
+        if self.record_cache is None:
+            return None
+        if nonstrict:
+            did = self.NONSTRICT_KEY_PREFIX + did
+        return self.record_cache.get(did)
+
+    def cache_record(self, did, doc, requested=None):
+        """
+        Cache the document under the did or baseid it was found by, and
+        also under the id `get_with_nonstrict_prefix` was given, if any.
+        """
+        if self.record_cache is not None:
+            self.record_cache.set(did, doc)
+            if requested is not None:
+                self.record_cache.set(self.NONSTRICT_KEY_PREFIX + requested, doc)
+
+    def prefix_forms(self, did):
+        """
+        Return the did together with its DEFAULT_PREFIX prepended or
+        stripped, in that order, as tried by `get_with_nonstrict_prefix`.
+        """
+        prefix = self.config.get("DEFAULT_PREFIX")
+        if not prefix:
+            return [did]
+        if did.startswith(prefix):
+            return [did, did[len(prefix) :]]
+        return [did, prefix + did]
+
+    def is_known_missing(self, key):
+        return self.miss_cache is not None and key in self.miss_cache
+
+    def remember_missing(self, key):
+        if self.miss_cache is not None:
+            self.miss_cache.add(key)
+
+    def invalidate_cached_records(self, *dids):
+        """
+        Drop cached documents for these dids / baseids and forget any miss
+        recorded for them, with or without prefix. Call after the
+        transaction that changed them has committed.
+        """
+        forms = [form for did in dids if did for form in self.prefix_forms(did)]
+        if self.record_cache is not None:
+            # a nonstrict lookup of either form may have resolved to them
+            self.record_cache.invalidate(
+                *dids, *[self.NONSTRICT_KEY_PREFIX + form for form in forms]
+            )
+        if self.miss_cache is not None:
+            # the prefix alias of a new record is one of these forms too
+            self.miss_cache.discard(*forms, *["alias:" + form for form in forms])
+
+    def invalidate_missing_aliases(self, *aliases):
+        """
+        Forget misses recorded by `get_by_alias` for these aliases.
+        """
+        if self.miss_cache is not None:
+            self.miss_cache.discard(*["alias:" + alias for alias in aliases])
+
     @abc.abstractmethod
     def ids(
         self,
@@ -35,6 +108,29 @@ class IndexDriverABC(SQLAlchemyDriverBase, metaclass=abc.ABCMeta):
         """
         raise NotImplementedError("TODO")
 
+    @abc.abstractmethod
+    def export(
+        self,
+        start=None,
+        size=None,
+        urls=None,
+        acl=None,
+        authz=None,
+        hashes=None,
+        file_name=None,
+        version=None,
+        uploader=None,
+        metadata=None,
+        urls_metadata=None,
+        negate_params=None,
+        batch_size=1000,
+    ):
+        """
+        Yields every record matching the filters without loading them all
+        into memory.
+        """
+        raise NotImplementedError("TODO")
+
     @abc.abstractmethod
     def get_urls(self, size=None, hashes=None, ids=None, start=0, limit=100):
         """
@@ -67,6 +163,13 @@ class IndexDriverABC(SQLAlchemyDriverBase, metaclass=abc.ABCMeta):
         """
         raise NotImplementedError("TODO")
 
+    @abc.abstractmethod
+    def bulk_add(self, records):
+        """
+        Creates many records at once, reporting success or failure per record.
+        """
+        raise NotImplementedError("TODO")
+
     @abc.abstractmethod
     def get(self, did):
         """
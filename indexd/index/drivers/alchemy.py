@@ -14,13 +14,17 @@ from sqlalchemy import (
     String,
     Text,
     and_,
+    case,
     func,
     or_,
     select,
+    true,
+    tuple_,
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError, ProgrammingError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import joinedload, relationship, sessionmaker
+from sqlalchemy.orm import relationship, selectinload, sessionmaker
 from sqlalchemy.orm.exc import MultipleResultsFound, NoResultFound
 
 from indexd import auth
@@ -32,6 +36,7 @@ from indexd.index.errors import (
     RevisionMismatch,
     UnhealthyCheck,
 )
+from indexd.index.record_cache import MissCache, RecordCache
 from indexd.utils import migrate_database
 
 Base = declarative_base()
@@ -108,6 +113,10 @@ class IndexRecord(Base):
         "IndexRecordAlias", backref="index_record", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("index_record_updated_date_did_idx", "updated_date", "did"),
+    )
+
     def to_document_dict(self):
         """
         Get the full index document
@@ -188,7 +197,10 @@ class IndexRecordUrl(Base):
         backref="index_record_url",
         cascade="all, delete-orphan",
     )
-    __table_args__ = (Index("index_record_url_idx", "did"),)
+    __table_args__ = (
+        Index("index_record_url_idx", "did"),
+        Index("index_record_url_url_did_idx", "url", "did"),
+    )
 
 
 class IndexRecordACE(Base):
@@ -202,7 +214,10 @@ class IndexRecordACE(Base):
     # access control entry
     ace = Column(String, primary_key=True)
 
-    __table_args__ = (Index("index_record_ace_idx", "did"),)
+    __table_args__ = (
+        Index("index_record_ace_idx", "did"),
+        Index("index_record_ace_ace_did_idx", "ace", "did"),
+    )
 
 
 class IndexRecordAuthz(Base):
@@ -215,7 +230,10 @@ class IndexRecordAuthz(Base):
     did = Column(String, ForeignKey("index_record.did"), primary_key=True)
     resource = Column(String, primary_key=True)
 
-    __table_args__ = (Index("index_record_authz_idx", "did"),)
+    __table_args__ = (
+        Index("index_record_authz_idx", "did"),
+        Index("index_record_authz_resource_did_idx", "resource", "did"),
+    )
 
 
 class IndexRecordMetadata(Base):
@@ -245,6 +263,7 @@ class IndexRecordUrlMetadata(Base):
             ["did", "url"], ["index_record_url.did", "index_record_url.url"]
         ),
         Index("index_record_url_metadata_idx", "did"),
+        Index("index_record_url_metadata_key_value_idx", "key", "value", "did", "url"),
     )
 
 
@@ -319,6 +338,23 @@ class StatsRecord(Base):
     year = Column(Integer, primary_key=True)
 
 
+class StatsDelta(Base):
+    """
+    Pending change to the stats totals.
+
+    Writers append one of these instead of updating the `stats` row so they
+    never wait on each other's row lock. Deltas are folded into the monthly
+    `stats` snapshots by `indexd.stats_utils.compact_stats`.
+    """
+
+    __tablename__ = "stats_delta"
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    record_count = Column(BigInteger, nullable=False)
+    record_bytes = Column(BigInteger, nullable=False)
+    month = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False)
+
+
 def create_urls_metadata(urls_metadata, record, session):
     """
     create url metadata record in database
@@ -331,6 +367,129 @@ def create_urls_metadata(urls_metadata, record, session):
             session.add(IndexRecordUrlMetadata(url=url, key=k, value=v, did=record.did))
 
 
+def bulk_load_options():
+    """
+    Loader options that fetch every relationship used by
+    `IndexRecord.to_document_dict` with a single `SELECT ... WHERE did IN (...)`
+    per child table, instead of one lazy select per record.
+    """
+    return [
+        selectinload(IndexRecord.urls).selectinload(IndexRecordUrl.url_metadata),
+        selectinload(IndexRecord.acl),
+        selectinload(IndexRecord.authz),
+        selectinload(IndexRecord.hashes),
+        selectinload(IndexRecord.index_metadata),
+    ]
+
+
+# IndexRecord columns selected by the Core read path, in the order
+# `record_documents` reads them
+RECORD_COLUMNS = (
+    IndexRecord.did,
+    IndexRecord.baseid,
+    IndexRecord.rev,
+    IndexRecord.size,
+    IndexRecord.file_name,
+    IndexRecord.version,
+    IndexRecord.uploader,
+    IndexRecord.form,
+    IndexRecord.created_date,
+    IndexRecord.updated_date,
+    IndexRecord.description,
+    IndexRecord.content_created_date,
+    IndexRecord.content_updated_date,
+)
+
+
+def record_documents(session, rows):
+    """
+    Build the documents `IndexRecord.to_document_dict` would return from
+    rows of `RECORD_COLUMNS`, without loading ORM objects.
+
+    Children are read with one `SELECT ... WHERE did IN (...)` per child
+    table and added to the documents straight from the result tuples.
+    Documents are returned in the order of `rows`.
+    """
+    docs = {}
+    for (
+        did,
+        baseid,
+        rev,
+        size,
+        file_name,
+        version,
+        uploader,
+        form,
+        created_date,
+        updated_date,
+        description,
+        content_created_date,
+        content_updated_date,
+    ) in rows:
+        docs[did] = {
+            "did": did,
+            "baseid": baseid,
+            "rev": rev,
+            "size": size,
+            "file_name": file_name,
+            "version": version,
+            "uploader": uploader,
+            "urls": [],
+            "urls_metadata": {},
+            "acl": [],
+            "authz": [],
+            "hashes": {},
+            "metadata": {},
+            "form": form,
+            "created_date": created_date.isoformat(),
+            "updated_date": updated_date.isoformat(),
+            "description": description,
+            "content_created_date": (
+                content_created_date.isoformat()
+                if content_created_date is not None
+                else None
+            ),
+            # like to_document_dict, only set along with content_created_date
+            "content_updated_date": (
+                content_updated_date.isoformat()
+                if content_created_date is not None and content_updated_date is not None
+                else None
+            ),
+        }
+    if not docs:
+        return []
+
+    dids = list(docs)
+
+    def children(*columns):
+        return session.execute(select(*columns).where(columns[0].in_(dids)))
+
+    for did, url in children(IndexRecordUrl.did, IndexRecordUrl.url):
+        docs[did]["urls"].append(url)
+        docs[did]["urls_metadata"][url] = {}
+    for did, url, key, value in children(
+        IndexRecordUrlMetadata.did,
+        IndexRecordUrlMetadata.url,
+        IndexRecordUrlMetadata.key,
+        IndexRecordUrlMetadata.value,
+    ):
+        docs[did]["urls_metadata"][url][key] = value
+    for did, ace in children(IndexRecordACE.did, IndexRecordACE.ace):
+        docs[did]["acl"].append(ace)
+    for did, resource in children(IndexRecordAuthz.did, IndexRecordAuthz.resource):
+        docs[did]["authz"].append(resource)
+    for did, hash_type, hash_value in children(
+        IndexRecordHash.did, IndexRecordHash.hash_type, IndexRecordHash.hash_value
+    ):
+        docs[did]["hashes"][hash_type] = hash_value
+    for did, key, value in children(
+        IndexRecordMetadata.did, IndexRecordMetadata.key, IndexRecordMetadata.value
+    ):
+        docs[did]["metadata"][key] = value
+
+    return list(docs.values())
+
+
 def get_record_if_exists(did, session):
     """
     Searches for a record with this did and returns it.
@@ -339,48 +498,50 @@ def get_record_if_exists(did, session):
     return session.query(IndexRecord).filter(IndexRecord.did == did).first()
 
 
+def get_first_bundle(bundle_ids, session):
+    """
+    Returns the bundle for the earliest of these ids that names one, looking
+    all of them up in a single query.
+    If no bundle found, returns None.
+    """
+    preference = case(
+        *[(DrsBundleRecord.bundle_id == bid, i) for i, bid in enumerate(bundle_ids)]
+    )
+    return (
+        session.query(DrsBundleRecord)
+        .filter(DrsBundleRecord.bundle_id.in_(bundle_ids))
+        .order_by(preference, DrsBundleRecord.created_time.desc())
+        .first()
+    )
+
+
 def update_stats(session, additional_records, additional_bytes):
+    """
+    Record a change to the stats totals as part of the caller's transaction.
+
+    This only appends a `StatsDelta` row, so concurrent writers don't
+    serialize on the current month's `stats` row.
+    """
     if additional_bytes is None:
         additional_bytes = 0
-    now = datetime.datetime.now()
+    if not additional_records and not additional_bytes:
+        return
 
-    query = (
-        session.query(StatsRecord)
-        .filter(
-            or_(
-                and_(
-                    StatsRecord.month <= now.month,
-                    StatsRecord.year == now.year,
-                ),
-                StatsRecord.year < now.year,
-            )
+    now = datetime.datetime.now()
+    session.add(
+        StatsDelta(
+            record_count=additional_records,
+            record_bytes=additional_bytes,
+            month=now.month,
+            year=now.year,
         )
-        .order_by(StatsRecord.year.desc(), StatsRecord.month.desc())
-        .with_for_update()
     )
 
-    record = query.first()
-
-    if record and record.month == now.month and record.year == now.year:
-        record.total_record_count += additional_records
-        record.total_record_bytes += additional_bytes
-    else:
-        new_record = StatsRecord()
-        new_record.month = now.month
-        new_record.year = now.year
-        new_record.total_record_bytes = additional_bytes
-        new_record.total_record_count = additional_records
-
-        if record:
-            new_record.total_record_bytes += record.total_record_bytes
-            new_record.total_record_count += record.total_record_count
-
-        session.add(new_record)
-
 
 def get_stats(session, month=None, year=None):
     """
-    Query the stats table for the most recent row on or before the given month/year.
+    Query the stats table for the most recent row on or before the given month/year,
+    plus the not yet compacted deltas up to that month.
 
     Args:
         session: SQLAlchemy ORM session.
@@ -396,21 +557,40 @@ def get_stats(session, month=None, year=None):
         month = now.month
         year = now.year
 
-    stats = (
-        session.query(StatsRecord)
-        .filter(
-            or_(
-                and_(
-                    StatsRecord.month <= int(month),
-                    StatsRecord.year == int(year),
-                ),
-                StatsRecord.year < int(year),
-            )
+    def up_to_month(table):
+        return or_(
+            and_(table.month <= int(month), table.year == int(year)),
+            table.year < int(year),
         )
+
+    latest = (
+        select(StatsRecord.total_record_count, StatsRecord.total_record_bytes)
+        .where(up_to_month(StatsRecord))
         .order_by(StatsRecord.year.desc(), StatsRecord.month.desc())
-        .first()
+        .limit(1)
+        .subquery()
+    )
+    # deltas that haven't been compacted yet are not part of any snapshot
+    pending = (
+        select(
+            func.coalesce(func.sum(StatsDelta.record_count), 0).label("count"),
+            func.coalesce(func.sum(StatsDelta.record_bytes), 0).label("bytes"),
+        )
+        .where(up_to_month(StatsDelta))
+        .subquery()
     )
-    if stats is None:
+    # read both in one statement, so a compaction committing in between
+    # can't count the same deltas twice
+    snapshot_count, snapshot_bytes, pending_count, pending_bytes = session.execute(
+        select(
+            latest.c.total_record_count,
+            latest.c.total_record_bytes,
+            pending.c.count,
+            pending.c.bytes,
+        ).select_from(pending.outerjoin(latest, true()))
+    ).one()
+
+    if snapshot_count is None:
         # NOTE: This is the case where no stats row exists.
         # This can happen when querying a historical period before the earliest stats row
         # (e.g. stats table was seeded in 2025 but the caller queries for 2020), or if the
@@ -419,8 +599,11 @@ def get_stats(session, month=None, year=None):
         # If manual intervention is needed, re-seed using the reconciliation command,
         # which recomputes stats from the active record table and backfills stats:
         #   python bin/reconcile_stats.py
-        return (0, 0)
-    return (stats.total_record_count, stats.total_record_bytes)
+        return (int(pending_count), int(pending_bytes))
+    return (
+        snapshot_count + int(pending_count),
+        snapshot_bytes + int(pending_bytes),
+    )
 
 
 class SQLAlchemyIndexDriver(IndexDriverABC):
@@ -435,6 +618,8 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
         super().__init__(conn, **config)
         self.logger = logger or get_logger("SQLAlchemyIndexDriver")
         self.config = index_config or {}
+        self.record_cache = RecordCache.from_config(self.config)
+        self.miss_cache = MissCache.from_config(self.config)
         Base.metadata.bind = self.engine
         self.Session = sessionmaker(bind=self.engine)
 
@@ -486,119 +671,65 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
         ids=None,
         urls_metadata=None,
         negate_params=None,
+        cursor=None,
     ):
         """
         Returns list of records stored by the backend.
+
+        `cursor` is an (updated_date, did) tuple taken from the last record of
+        the previous page. When provided, records are returned in
+        (updated_date, did) order starting right after it, which uses the
+        composite index instead of an OFFSET scan.
         """
         with self.session as session:
-            query = session.query(IndexRecord)
-
-            # Enable joinedload on all relationships so that we won't have to
-            # do a bunch of selects when we assemble our response.
-            query = query.options(
-                joinedload(IndexRecord.urls).joinedload(IndexRecordUrl.url_metadata)
-            )
-            query = query.options(joinedload(IndexRecord.acl))
-            query = query.options(joinedload(IndexRecord.authz))
-            query = query.options(joinedload(IndexRecord.hashes))
-            query = query.options(joinedload(IndexRecord.index_metadata))
-            query = query.options(joinedload(IndexRecord.aliases))
+            # Select the record columns only and build the documents from
+            # plain rows, reading each child table with one select for the
+            # whole page, so LIMIT applies to records rather than joined rows.
+            query = session.query(*RECORD_COLUMNS)
 
             if start is not None:
                 query = query.filter(IndexRecord.did > start)
 
-            if size is not None:
-                query = query.filter(IndexRecord.size == size)
-
-            if file_name is not None:
-                query = query.filter(IndexRecord.file_name == file_name)
-
-            if version is not None:
-                query = query.filter(IndexRecord.version == version)
-
-            if uploader is not None:
-                query = query.filter(IndexRecord.uploader == uploader)
-
-            # filter records that have ALL the URLs
-            if urls:
-                for u in urls:
-                    sub = session.query(IndexRecordUrl.did).filter(
-                        IndexRecordUrl.url == u
-                    )
-                    query = query.filter(IndexRecord.did.in_(sub.subquery()))
-
-            # filter records that have ALL the ACL elements
-            if acl:
-                for u in acl:
-                    sub = session.query(IndexRecordACE.did).filter(
-                        IndexRecordACE.ace == u
-                    )
-                    query = query.filter(IndexRecord.did.in_(sub.subquery()))
-            elif acl == []:
-                query = query.filter(IndexRecord.acl == None)
-
-            # filter records that have ALL the authz elements
-            if authz:
-                for u in authz:
-                    sub = session.query(IndexRecordAuthz.did).filter(
-                        IndexRecordAuthz.resource == u
-                    )
-                    query = query.filter(IndexRecord.did.in_(sub.subquery()))
-            elif authz == []:
-                query = query.filter(IndexRecord.authz == None)
-
-            if hashes:
-                for h, v in hashes.items():
-                    sub = session.query(IndexRecordHash.did)
-                    sub = sub.filter(
-                        and_(
-                            IndexRecordHash.hash_type == h,
-                            IndexRecordHash.hash_value == v,
-                        )
-                    )
-                    query = query.filter(IndexRecord.did.in_(sub.subquery()))
-
-            if metadata:
-                for k, v in metadata.items():
-                    sub = session.query(IndexRecordMetadata.did)
-                    sub = sub.filter(
-                        and_(
-                            IndexRecordMetadata.key == k, IndexRecordMetadata.value == v
-                        )
-                    )
-                    query = query.filter(IndexRecord.did.in_(sub.subquery()))
-
-            if urls_metadata:
-                query = query.join(IndexRecord.urls).join(IndexRecordUrl.url_metadata)
-                for url_key, url_dict in urls_metadata.items():
-                    query = query.filter(IndexRecordUrlMetadata.url.contains(url_key))
-                    for k, v in url_dict.items():
-                        query = query.filter(
-                            IndexRecordUrl.url_metadata.any(
-                                and_(
-                                    IndexRecordUrlMetadata.key == k,
-                                    IndexRecordUrlMetadata.value == v,
-                                )
-                            )
-                        )
+            if cursor is not None:
+                query = query.filter(
+                    tuple_(IndexRecord.updated_date, IndexRecord.did) > tuple_(*cursor)
+                )
 
-            if negate_params:
-                query = self._negate_filter(session, query, **negate_params)
+            query = self._filter_records(
+                session,
+                query,
+                size=size,
+                urls=urls,
+                acl=acl,
+                authz=authz,
+                hashes=hashes,
+                file_name=file_name,
+                version=version,
+                uploader=uploader,
+                metadata=metadata,
+                urls_metadata=urls_metadata,
+                negate_params=negate_params,
+            )
 
             # joining url metadata will have duplicate results
             # url or acl doesn't have duplicate results for current filter
             # so we don't need to select distinct for these cases
             if urls_metadata or negate_params:
-                query = query.distinct(IndexRecord.did)
+                if page is not None or cursor is not None:
+                    # DISTINCT ON must match the leading ORDER BY column
+                    query = query.distinct()
+                else:
+                    query = query.distinct(IndexRecord.did)
 
-            if page is not None:
+            if page is not None or cursor is not None:
                 # order by updated date so newly added stuff is
                 # at the end (reduce risk that a new records ends up in a page
                 # earlier on) and allows for some logic to check for newly added records
                 # (e.g. parallelly processing from beginning -> middle and ending -> middle
                 #       and as a final step, checking the "ending"+1 to see if there are
                 #       new records).
-                query = query.order_by(IndexRecord.updated_date)
+                # did breaks ties so that cursors are unambiguous.
+                query = query.order_by(IndexRecord.updated_date, IndexRecord.did)
             else:
                 query = query.order_by(IndexRecord.did)
 
@@ -629,7 +760,158 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
             if page is not None:
                 query = query.offset(limit * page)
 
-            return [i.to_document_dict() for i in query]
+            return record_documents(session, query.all())
+
+    def _filter_records(
+        self,
+        session,
+        query,
+        size=None,
+        urls=None,
+        acl=None,
+        authz=None,
+        hashes=None,
+        file_name=None,
+        version=None,
+        uploader=None,
+        metadata=None,
+        urls_metadata=None,
+        negate_params=None,
+    ):
+        """
+        Apply the record filters shared by `ids` and `export` to an
+        IndexRecord query.
+        """
+        if size is not None:
+            query = query.filter(IndexRecord.size == size)
+
+        if file_name is not None:
+            query = query.filter(IndexRecord.file_name == file_name)
+
+        if version is not None:
+            query = query.filter(IndexRecord.version == version)
+
+        if uploader is not None:
+            query = query.filter(IndexRecord.uploader == uploader)
+
+        # Each required value is its own EXISTS semi-join, which the planner
+        # can drive from the (value, did) indexes of the child tables.
+
+        # filter records that have ALL the URLs
+        if urls:
+            for u in urls:
+                query = query.filter(IndexRecord.urls.any(IndexRecordUrl.url == u))
+
+        # filter records that have ALL the ACL elements
+        if acl:
+            for u in acl:
+                query = query.filter(IndexRecord.acl.any(IndexRecordACE.ace == u))
+        elif acl == []:
+            query = query.filter(IndexRecord.acl == None)
+
+        # filter records that have ALL the authz elements
+        if authz:
+            for u in authz:
+                query = query.filter(
+                    IndexRecord.authz.any(IndexRecordAuthz.resource == u)
+                )
+        elif authz == []:
+            query = query.filter(IndexRecord.authz == None)
+
+        if hashes:
+            for h, v in hashes.items():
+                query = query.filter(
+                    IndexRecord.hashes.any(
+                        and_(
+                            IndexRecordHash.hash_type == h,
+                            IndexRecordHash.hash_value == v,
+                        )
+                    )
+                )
+
+        if metadata:
+            for k, v in metadata.items():
+                query = query.filter(
+                    IndexRecord.index_metadata.any(
+                        and_(
+                            IndexRecordMetadata.key == k,
+                            IndexRecordMetadata.value == v,
+                        )
+                    )
+                )
+
+        if urls_metadata:
+            query = query.join(IndexRecord.urls).join(IndexRecordUrl.url_metadata)
+            for url_key, url_dict in urls_metadata.items():
+                query = query.filter(IndexRecordUrlMetadata.url.contains(url_key))
+                for k, v in url_dict.items():
+                    query = query.filter(
+                        IndexRecordUrl.url_metadata.any(
+                            and_(
+                                IndexRecordUrlMetadata.key == k,
+                                IndexRecordUrlMetadata.value == v,
+                            )
+                        )
+                    )
+
+        if negate_params:
+            query = self._negate_filter(session, query, **negate_params)
+
+        return query
+
+    def export(
+        self,
+        start=None,
+        size=None,
+        urls=None,
+        acl=None,
+        authz=None,
+        hashes=None,
+        file_name=None,
+        version=None,
+        uploader=None,
+        metadata=None,
+        urls_metadata=None,
+        negate_params=None,
+        batch_size=1000,
+    ):
+        """
+        Yield every record matching the filters, in did order, as a
+        document dict.
+
+        Rows are read through a server-side cursor `batch_size` at a time,
+        so memory stays bounded however many records match. The session is
+        held open until the generator is exhausted or closed.
+        """
+        with self.session as session:
+            query = session.query(IndexRecord).options(*bulk_load_options())
+
+            if start is not None:
+                query = query.filter(IndexRecord.did > start)
+
+            query = self._filter_records(
+                session,
+                query,
+                size=size,
+                urls=urls,
+                acl=acl,
+                authz=authz,
+                hashes=hashes,
+                file_name=file_name,
+                version=version,
+                uploader=uploader,
+                metadata=metadata,
+                urls_metadata=urls_metadata,
+                negate_params=negate_params,
+            )
+
+            if urls_metadata or negate_params:
+                query = query.distinct(IndexRecord.did)
+
+            query = query.order_by(IndexRecord.did).yield_per(batch_size)
+
+            for record in query:
+                yield record.to_document_dict()
 
     @staticmethod
     def _negate_filter(
@@ -886,8 +1168,223 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
                     'did "{did}" already exists'.format(did=record.did)
                 )
 
+            # a new version of an existing baseid changes what get(baseid) returns,
+            # and the new did may have been looked up before it existed
+            self.invalidate_cached_records(record.did, baseid)
+
             return record.did, record.rev, record.baseid
 
+    def bulk_add(self, records):
+        """
+        Creates many records in a single transaction.
+
+        `records` is a list of dicts accepting the same fields as `add`, with
+        the did under "did". Rows for every accepted record are written with
+        one multi-row INSERT per table, and a single stats delta is recorded
+        for the whole batch.
+
+        Returns a list aligned with `records` holding either
+        {"did", "rev", "baseid"} or {"did", "error"} for a rejected record.
+        """
+        results = [None] * len(records)
+        accepted = []
+        seen = set()
+
+        for i, doc in enumerate(records):
+            did = doc.get("did")
+            if not did:
+                did = str(uuid.uuid4())
+                if self.config.get("PREPEND_PREFIX"):
+                    did = self.config["DEFAULT_PREFIX"] + did
+
+            if did in seen:
+                results[i] = {
+                    "did": did,
+                    "error": 'did "{}" is duplicated in the request'.format(did),
+                }
+                continue
+            seen.add(did)
+
+            urls = list(dict.fromkeys(doc.get("urls") or []))
+            urls_metadata = doc.get("urls_metadata") or {}
+            missing = [url for url in urls_metadata if url not in urls]
+            if missing:
+                results[i] = {
+                    "did": did,
+                    "error": "url {} in urls_metadata does not exist".format(
+                        missing[0]
+                    ),
+                }
+                continue
+
+            content_created_date = doc.get("content_created_date")
+            content_updated_date = doc.get("content_updated_date")
+            try:
+                if content_created_date is not None:
+                    content_created_date = datetime.datetime.fromisoformat(
+                        content_created_date
+                    )
+                    content_updated_date = (
+                        datetime.datetime.fromisoformat(content_updated_date)
+                        if content_updated_date is not None
+                        else content_created_date
+                    )
+            except ValueError as err:
+                results[i] = {"did": did, "error": str(err)}
+                continue
+
+            accepted.append(
+                (
+                    i,
+                    {
+                        "did": did,
+                        "baseid": doc.get("baseid") or str(uuid.uuid4()),
+                        "rev": str(uuid.uuid4())[:8],
+                        "form": doc["form"],
+                        "size": doc.get("size"),
+                        "file_name": doc.get("file_name"),
+                        "version": doc.get("version"),
+                        "uploader": doc.get("uploader"),
+                        "description": doc.get("description"),
+                        "content_created_date": content_created_date,
+                        "content_updated_date": content_updated_date,
+                    },
+                    urls,
+                    urls_metadata,
+                    doc,
+                )
+            )
+
+        if not accepted:
+            return results
+
+        dids = [row["did"] for _, row, *_ in accepted]
+        with self.session as session:
+            existing = self._existing_dids(session, dids)
+            # a record created between the check and the insert fails the
+            # whole batch; it is retried once without the records created since
+            for attempt in range(2):
+                try:
+                    record_rows = self._bulk_insert(
+                        session, accepted, existing, results
+                    )
+                    session.commit()
+                    break
+                except IntegrityError as err:
+                    session.rollback()
+                    created = self._existing_dids(session, dids) - existing
+                    if attempt or not created:
+                        # the error names the conflicting key
+                        raise MultipleRecordsFound(
+                            "could not add the batch: {}".format(err.orig)
+                        )
+                    existing |= created
+
+            if not record_rows:
+                return results
+
+            self.invalidate_cached_records(
+                *{row["baseid"] for row in record_rows},
+                *[row["did"] for row in record_rows],
+            )
+
+            return results
+
+    @staticmethod
+    def _existing_dids(session, dids):
+        """
+        Return the dids of `dids` that are already records.
+        """
+        return {
+            did
+            for (did,) in session.query(IndexRecord.did).filter(
+                IndexRecord.did.in_(dids)
+            )
+        }
+
+    def _bulk_insert(self, session, accepted, existing, results):
+        """
+        Insert the `accepted` records of `bulk_add` whose did isn't in
+        `existing`, without committing, and fill in their `results`.
+
+        Returns the inserted index_record rows.
+        """
+        tables = {
+            table: []
+            for table in (
+                IndexRecordUrl,
+                IndexRecordUrlMetadata,
+                IndexRecordACE,
+                IndexRecordAuthz,
+                IndexRecordHash,
+                IndexRecordMetadata,
+                IndexRecordAlias,
+            )
+        }
+        record_rows = []
+        total_bytes = 0
+
+        for i, row, urls, urls_metadata, doc in accepted:
+            did = row["did"]
+            if did in existing:
+                results[i] = {
+                    "did": did,
+                    "error": 'did "{did}" already exists'.format(did=did),
+                }
+                continue
+
+            record_rows.append(row)
+            total_bytes += row["size"] or 0
+            tables[IndexRecordUrl] += [{"did": did, "url": url} for url in urls]
+            tables[IndexRecordUrlMetadata] += [
+                {"did": did, "url": url, "key": k, "value": v}
+                for url, url_metadata in urls_metadata.items()
+                for k, v in url_metadata.items()
+            ]
+            tables[IndexRecordACE] += [
+                {"did": did, "ace": ace} for ace in set(doc.get("acl") or [])
+            ]
+            tables[IndexRecordAuthz] += [
+                {"did": did, "resource": resource}
+                for resource in set(doc.get("authz") or [])
+            ]
+            tables[IndexRecordHash] += [
+                {"did": did, "hash_type": h, "hash_value": v}
+                for h, v in (doc.get("hashes") or {}).items()
+            ]
+            tables[IndexRecordMetadata] += [
+                {"did": did, "key": k, "value": v}
+                for k, v in (doc.get("metadata") or {}).items()
+            ]
+            if self.config.get("ADD_PREFIX_ALIAS"):
+                tables[IndexRecordAlias].append(
+                    {"did": did, "name": self.config["DEFAULT_PREFIX"] + did}
+                )
+            results[i] = {"did": did, "rev": row["rev"], "baseid": row["baseid"]}
+
+        if not record_rows:
+            return record_rows
+
+        session.execute(
+            pg_insert(BaseVersion.__table__)
+            .values(
+                [
+                    {"baseid": baseid}
+                    for baseid in {row["baseid"] for row in record_rows}
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+        session.execute(IndexRecord.__table__.insert(), record_rows)
+        # children are inserted after their parents so the foreign
+        # keys (url_metadata -> url -> record) are satisfied
+        for table, rows in tables.items():
+            if rows:
+                session.execute(table.__table__.insert(), rows)
+
+        update_stats(session, len(record_rows), total_bytes)
+        return record_rows
+
     def add_blank_record(self, uploader, file_name=None, authz=None):
         """
         Create a new blank record with only uploader and optionally
@@ -1034,6 +1531,8 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
             update_stats(session, 0, size)
             session.commit()
 
+            self.invalidate_cached_records(record.did, record.baseid)
+
             return record.did, record.rev, record.baseid
 
     def add_prefix_alias(self, record, session):
@@ -1048,6 +1547,9 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
         """
         Gets a record given a record alias
         """
+        if self.is_known_missing("alias:" + alias):
+            raise NoRecordFound("no record found")
+
         with self.session as session:
             try:
                 record = (
@@ -1056,6 +1558,7 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
                     .one()
                 )
             except NoResultFound:
+                self.remember_missing("alias:" + alias)
                 raise NoRecordFound("no record found")
             except MultipleResultsFound:
                 raise MultipleRecordsFound("multiple records found")
@@ -1117,6 +1620,8 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
                     f"One or more aliases in request already associated with this or another GUID: {aliases}"
                 )
 
+            self.invalidate_missing_aliases(*aliases)
+
     def replace_aliases_for_did(self, aliases, did):
         """
         Replace all aliases for one DID / GUID with new aliases.
@@ -1164,6 +1669,8 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
                     f"One or more aliases in request already associated with another GUID: {aliases}"
                 )
 
+            self.invalidate_missing_aliases(*aliases)
+
     def delete_all_aliases_for_did(self, did):
         """
         Delete all of this DID / GUID's aliases.
@@ -1233,14 +1740,18 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
         Gets a record given the record id or baseid.
         If the given id is a baseid, it will return the latest version
         """
+        cached = self.get_cached_record(did)
+        if cached is not None:
+            return cached
+
         with self.session as session:
-            query = session.query(IndexRecord)
+            query = session.query(*RECORD_COLUMNS)
             query = query.filter(
                 or_(IndexRecord.did == did, IndexRecord.baseid == did)
             ).order_by(IndexRecord.created_date.desc())
 
-            record = query.first()
-            if record is None:
+            row = query.first()
+            if row is None:
                 try:
                     record = self.get_bundle(bundle_id=did, expand=expand)
                     return record
@@ -1248,39 +1759,77 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
                     # overwrite the "no bundle found" message
                     raise NoRecordFound("no record found")
 
-            return record.to_document_dict()
+            (doc,) = record_documents(session, [row])
+
+        self.cache_record(did, doc)
+        return doc
 
     def get_bulk(self, guid_list, expand=True):
         """
         Gets record given the record ids.
+
+        Child tables are loaded with one `IN` select per child table rather
+        than one lazy select per record, so the number of statements issued
+        does not grow with the length of `guid_list`.
         """
         with self.session as session:
-            query = session.query(IndexRecord)
-            subquery = query.filter(IndexRecord.did.in_(guid_list))
-            compiled_list = [q.to_document_dict() for q in subquery]
-            return compiled_list
+            query = session.query(*RECORD_COLUMNS)
+            query = query.filter(IndexRecord.did.in_(guid_list))
+            return record_documents(session, query.all())
 
     def get_with_nonstrict_prefix(self, did, expand=True):
         """
         Attempt to retrieve a record both with and without a prefix.
-        Proxies 'get' with provided id.
-        If not found but prefix matches default, attempt with prefix stripped.
-        If not found and id has no prefix, attempt with default prefix prepended.
-        """
-        try:
-            record = self.get(did, expand=expand)
-        except NoRecordFound as e:
-            DEFAULT_PREFIX = self.config.get("DEFAULT_PREFIX")
-            if not DEFAULT_PREFIX:
-                raise e
-
-            if not did.startswith(DEFAULT_PREFIX):
-                record = self.get(DEFAULT_PREFIX + did, expand=expand)
-            else:
-                stripped = did.split(DEFAULT_PREFIX, 1)[1]
-                record = self.get(stripped, expand=expand)
+        If not found but prefix matches default, the record with the prefix
+        stripped is returned; if not found and id has no prefix, the record
+        with the default prefix prepended.
+
+        Both forms are matched against dids and baseids in one query, then
+        against bundle ids in a second one only if no record matched the
+        first form. Ids that match nothing are remembered in the negative
+        cache.
+        """
+        cached = self.get_cached_record(did, nonstrict=True)
+        if cached is not None:
+            return cached
+        if self.is_known_missing(did):
+            raise NoRecordFound("no record found")
+
+        forms = self.prefix_forms(did)
+        with self.session as session:
+            preference = case(
+                *[
+                    (or_(IndexRecord.did == form, IndexRecord.baseid == form), i)
+                    for i, form in enumerate(forms)
+                ]
+            )
+            row = (
+                session.query(*RECORD_COLUMNS)
+                .filter(or_(IndexRecord.did.in_(forms), IndexRecord.baseid.in_(forms)))
+                .order_by(preference, IndexRecord.created_date.desc())
+                .first()
+            )
+            # as with a `get` per form, a record matching a form comes after
+            # a bundle matching an earlier one
+            rank = len(forms)
+            if row is not None:
+                rank = min(
+                    i for i, form in enumerate(forms) if form in (row.did, row.baseid)
+                )
+            bundle = get_first_bundle(forms[:rank], session) if rank else None
+            if bundle is not None:
+                return bundle.to_document_dict(expand)
+            if row is None:
+                self.remember_missing(did)
+                raise NoRecordFound("no record found")
+
+            # cache under the key `get` would have found it by, and under
+            # the id as given for the next nonstrict lookup of it
+            key = row.did if row.did in forms else row.baseid
+            (doc,) = record_documents(session, [row])
 
-        return record
+        self.cache_record(key, doc, requested=did)
+        return doc
 
     def update(self, did, rev, changing_fields):
         """
@@ -1399,8 +1948,11 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
             record.updated_date = datetime.datetime.utcnow()
 
             session.add(record)
+            ret = record.did, record.baseid, record.rev
 
-            return record.did, record.baseid, record.rev
+        self.invalidate_cached_records(ret[0], ret[1])
+
+        return ret
 
     def delete(self, did, rev):
         """
@@ -1425,8 +1977,11 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
             size = record.size if record.size is not None else 0
             update_stats(session, -1, -1 * size)
 
+            baseid = record.baseid
             session.delete(record)
 
+        self.invalidate_cached_records(did, baseid)
+
     def add_version(
         self,
         current_did,
@@ -1517,6 +2072,8 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
             except IntegrityError:
                 raise MultipleRecordsFound("{did} already exists".format(did=did))
 
+            self.invalidate_cached_records(record.did, baseid)
+
             return record.did, record.baseid, record.rev
 
     def add_blank_version(
@@ -1588,6 +2145,8 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
             except IntegrityError:
                 raise MultipleRecordsFound("{did} already exists".format(did=did))
 
+            self.invalidate_cached_records(new_record.did, new_record.baseid)
+
             return new_record.did, new_record.baseid, new_record.rev
 
     def get_all_versions(self, did):
@@ -1671,6 +2230,7 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
                     {"did": record.did, "baseid": record.baseid, "rev": record.rev}
                 )
             session.commit()
+            self.invalidate_cached_records(baseid, *[rec["did"] for rec in ret])
             return ret
 
     def get_latest_version(self, did, has_version=None):
@@ -1800,6 +2360,8 @@ class SQLAlchemyIndexDriver(IndexDriverABC):
                     )
                 )
 
+            self.invalidate_cached_records(record.bundle_id)
+
             return record.bundle_id, record.name, record.bundle_data
 
     def get_bundle_list(self, start=None, limit=100, page=None):
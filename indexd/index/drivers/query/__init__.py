@@ -13,6 +13,7 @@ class URLsQueryDriver(object, metaclass=ABCMeta):
         offset=0,
         limit=1000,
         fields="did,urls",
+        start=None,
         **kwargs
     ):
         """The exclude and include patterns are used to match per record. That is a record wth 3 urls will
@@ -24,6 +25,7 @@ class URLsQueryDriver(object, metaclass=ABCMeta):
             offset (int):
             limit (int):
             fields (str): comma separated list of fields to return, if not specified return all fields
+            start (str): only return records with a did after this one, records are ordered by did
             kwargs (dict): unexpected query parameters
         Returns:
             list: result list
@@ -40,6 +42,8 @@ class URLsQueryDriver(object, metaclass=ABCMeta):
         offset=0,
         limit=1000,
         fields="dir,urls,rev",
+        start=None,
+        start_url=None,
         **kwargs
     ):
         """Queries urls_metadata based on provided key and value
@@ -51,6 +55,9 @@ class URLsQueryDriver(object, metaclass=ABCMeta):
             offset (int): query offset
             limit (int): Maximum rows to return
             fields (str): comma separated list of fields to return, if not specified return all fields
+            start (str): only return entries with a did after this one, entries are ordered by did
+            start_url (str): with `start`, also return the entries of did `start` whose url comes
+                after this one, for drivers returning one entry per url
             kwargs (dict): unexpected query parameters
         Returns:
             list: result list
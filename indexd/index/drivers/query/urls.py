@@ -1,4 +1,5 @@
-from sqlalchemy import func, and_
+from sqlalchemy import exists, tuple_
+from sqlalchemy.orm import aliased
 
 from indexd.errors import UserError
 from indexd.index.drivers.alchemy import (
@@ -9,12 +10,6 @@ from indexd.index.drivers.alchemy import (
 from indexd.index.drivers.query import URLsQueryDriver
 
 
-driver_query_map = {
-    "sqlite": dict(array_agg=func.group_concat, string_agg=func.group_concat),
-    "postgresql": dict(array_agg=func.array_agg, string_agg=func.string_agg),
-}
-
-
 class AlchemyURLsQueryDriver(URLsQueryDriver):
     """SQLAlchemy based impl"""
 
@@ -33,6 +28,7 @@ class AlchemyURLsQueryDriver(URLsQueryDriver):
         offset=0,
         limit=1000,
         fields="did,urls",
+        start=None,
         **kwargs
     ):
         if kwargs:
@@ -45,48 +41,47 @@ class AlchemyURLsQueryDriver(URLsQueryDriver):
         )
 
         with self.driver.session as session:
-            # special database specific functions dependent of the selected dialect
-            q_func = driver_query_map.get(session.bind.dialect.name)
-
-            query = session.query(
-                IndexRecordUrl.did, q_func["string_agg"](IndexRecordUrl.url, ",")
-            )
+            # select the page of dids first: `include` is matched against
+            # single urls, which the trigram index on the url column serves,
+            # and only the urls of the dids on the page are read afterwards
+            query = session.query(IndexRecordUrl.did).distinct()
 
             # add version filter if versioned is not None
             if versioned is True:  # retrieve only those with a version number
-                query = query.outerjoin(IndexRecord)
+                query = query.join(IndexRecord)
                 query = query.filter(IndexRecord.version.isnot(None))
             elif versioned is False:  # retrieve only those without a version number
-                query = query.outerjoin(IndexRecord)
+                query = query.join(IndexRecord)
                 query = query.filter(~IndexRecord.version.isnot(None))
 
-            query = query.group_by(IndexRecordUrl.did)
-
             # add url filters
-            if include and exclude:
-                query = query.having(
-                    and_(
-                        ~q_func["string_agg"](IndexRecordUrl.url, ",").contains(
-                            exclude
-                        ),
-                        q_func["string_agg"](IndexRecordUrl.url, ",").contains(include),
+            if include:
+                query = query.filter(IndexRecordUrl.url.contains(include))
+            if exclude:
+                excluded = aliased(IndexRecordUrl)
+                query = query.filter(
+                    ~exists().where(
+                        excluded.did == IndexRecordUrl.did,
+                        excluded.url.contains(exclude),
                     )
                 )
-            elif include:
-                query = query.having(
-                    q_func["string_agg"](IndexRecordUrl.url, ",").contains(include)
-                )
-            elif exclude:
-                query = query.having(
-                    ~q_func["string_agg"](IndexRecordUrl.url, ",").contains(exclude)
-                )
-            # [('did', 'urls')]
-            record_list = (
-                query.order_by(IndexRecordUrl.did.asc())
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
+
+            # continue after the last did of the previous page
+            if start:
+                query = query.filter(IndexRecordUrl.did > start)
+
+            query = query.order_by(IndexRecordUrl.did.asc()).offset(offset).limit(limit)
+            dids = [row.did for row in query]
+
+            urls = {did: [] for did in dids}
+            if dids:
+                for did, url in session.query(
+                    IndexRecordUrl.did, IndexRecordUrl.url
+                ).filter(IndexRecordUrl.did.in_(dids)):
+                    urls[did].append(url)
+
+            # [('did', ['url'])]
+            record_list = list(urls.items())
         return self._format_response(fields, record_list)
 
     def query_metadata_by_key(
@@ -98,6 +93,8 @@ class AlchemyURLsQueryDriver(URLsQueryDriver):
         offset=0,
         limit=1000,
         fields="did,urls,rev",
+        start=None,
+        start_url=None,
         **kwargs
     ):
         if kwargs:
@@ -109,12 +106,19 @@ class AlchemyURLsQueryDriver(URLsQueryDriver):
             versioned.lower() in ["true", "t", "yes", "y"] if versioned else None
         )
         with self.driver.session as session:
-            query = session.query(
-                IndexRecordUrlMetadata.did, IndexRecordUrlMetadata.url, IndexRecord.rev
-            ).filter(
-                IndexRecord.did == IndexRecordUrlMetadata.did,
-                IndexRecordUrlMetadata.key == key,
-                IndexRecordUrlMetadata.value == value,
+            # matches are read from the (key, value, did, url) index in
+            # (did, url) order, so a page costs its size rather than a scan
+            query = (
+                session.query(
+                    IndexRecordUrlMetadata.did,
+                    IndexRecordUrlMetadata.url,
+                    IndexRecord.rev,
+                )
+                .join(IndexRecord, IndexRecord.did == IndexRecordUrlMetadata.did)
+                .filter(
+                    IndexRecordUrlMetadata.key == key,
+                    IndexRecordUrlMetadata.value == value,
+                )
             )
 
             # filter by version
@@ -129,9 +133,20 @@ class AlchemyURLsQueryDriver(URLsQueryDriver):
                     IndexRecordUrlMetadata.url.like("%{}%".format(url))
                 )
 
+            # continue after the last (did, url) of the previous page
+            if start and start_url:
+                query = query.filter(
+                    tuple_(IndexRecordUrlMetadata.did, IndexRecordUrlMetadata.url)
+                    > tuple_(start, start_url)
+                )
+            elif start:
+                query = query.filter(IndexRecordUrlMetadata.did > start)
+
             # [('did', 'url', 'rev')]
             record_list = (
-                query.order_by(IndexRecordUrlMetadata.did.asc())
+                query.order_by(
+                    IndexRecordUrlMetadata.did.asc(), IndexRecordUrlMetadata.url.asc()
+                )
                 .offset(offset)
                 .limit(limit)
                 .all()
@@ -154,7 +169,8 @@ class AlchemyURLsQueryDriver(URLsQueryDriver):
             if provided_fields_dict.get("did"):
                 resp_dict["did"] = record[0]
             if provided_fields_dict.get("urls"):
-                resp_dict["urls"] = record[1].split(",") if record[1] else []
+                urls = record[1] or []
+                resp_dict["urls"] = urls.split(",") if isinstance(urls, str) else urls
 
             # check if record is returned in tuple
             if provided_fields_dict.get("rev") and len(record) == 3:
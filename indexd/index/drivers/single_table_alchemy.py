@@ -1,4 +1,5 @@
 import datetime
+import json
 import uuid
 
 from cdislogging import get_logger
@@ -13,10 +14,12 @@ from sqlalchemy import (
     or_,
     text,
     not_,
-    and_,
     cast,
     TEXT,
     select,
+    tuple_,
+    Index,
+    case,
 )
 from sqlalchemy.dialects.postgresql import JSONB, ARRAY
 from sqlalchemy.exc import IntegrityError, ProgrammingError
@@ -32,6 +35,7 @@ from indexd.index.drivers.alchemy import (
     IndexSchemaVersion,
     DrsBundleRecord,
     StatsRecord,
+    get_first_bundle,
     get_stats,
     update_stats,
 )
@@ -41,6 +45,7 @@ from indexd.index.errors import (
     RevisionMismatch,
     UnhealthyCheck,
 )
+from indexd.index.record_cache import MissCache, RecordCache
 
 Base = declarative_base()
 
@@ -66,7 +71,7 @@ class Record(Base):
     description = Column(String)
     content_created_date = Column(DateTime)
     content_updated_date = Column(DateTime)
-    hashes = Column(JSONB, index=True)
+    hashes = Column(JSONB)
     acl = Column(ARRAY(String))
     authz = Column(ARRAY(String))
     urls = Column(ARRAY(String))
@@ -74,6 +79,28 @@ class Record(Base):
     url_metadata = Column(JSONB)
     alias = Column(ARRAY(String))
 
+    __table_args__ = (
+        Index("ix_record_updated_date_guid", "updated_date", "guid"),
+        Index("ix_record_url_metadata", "url_metadata", postgresql_using="gin"),
+        # filters on these columns are containment (@>) checks
+        Index("ix_record_urls", "urls", postgresql_using="gin"),
+        Index("ix_record_acl", "acl", postgresql_using="gin"),
+        Index("ix_record_authz", "authz", postgresql_using="gin"),
+        Index("ix_record_alias", "alias", postgresql_using="gin"),
+        Index(
+            "ix_record_hashes_gin",
+            "hashes",
+            postgresql_using="gin",
+            postgresql_ops={"hashes": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_record_record_metadata",
+            "record_metadata",
+            postgresql_using="gin",
+            postgresql_ops={"record_metadata": "jsonb_path_ops"},
+        ),
+    )
+
     def to_document_dict(self):
         """
         Get the full index document
@@ -120,6 +147,8 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
         super().__init__(conn, **config)
         self.logger = logger or get_logger("SQLAlchemyIndexDriver")
         self.config = index_config or {}
+        self.record_cache = RecordCache.from_config(self.config)
+        self.miss_cache = MissCache.from_config(self.config)
         Base.metadata.bind = self.engine
         self.Session = sessionmaker(bind=self.engine)
 
@@ -157,9 +186,13 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
         urls_metadata=None,
         negate_params=None,
         page=None,
+        cursor=None,
     ):
         """
         Returns list of records stored by the backend.
+
+        `cursor` is an (updated_date, guid) tuple taken from the last record of
+        the previous page; see `SQLAlchemyIndexDriver.ids`.
         """
         with self.session as session:
             query = session.query(Record)
@@ -167,65 +200,36 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             if start is not None:
                 query = query.filter(Record.guid > start)
 
-            if size is not None:
-                query = query.filter(Record.size == size)
-
-            if file_name is not None:
-                query = query.filter(Record.file_name == file_name)
-
-            if version is not None:
-                query = query.filter(Record.version == version)
-
-            if uploader is not None:
-                query = query.filter(Record.uploader == uploader)
-
-            if urls:
-                for u in urls:
-                    query = query.filter(Record.urls.any(u))
-
-            if acl:
-                for u in acl:
-                    query = query.filter(Record.acl.any(u))
-            elif acl == []:
-                query = query.filter(Record.acl == None)
-
-            if authz:
-                for u in authz:
-                    query = query.filter(Record.authz.any(u))
-            elif authz == []:
-                query = query.filter(Record.authz == None)
-
-            if hashes:
-                for h, v in hashes.items():
-                    query = query.filter(Record.hashes == {h: v})
-
-            if metadata:
-                for k, v in metadata.items():
-                    query = query.filter(Record.record_metadata[k].astext == v)
-
-            if urls_metadata:
-                for url_key, url_dict in urls_metadata.items():
-                    matches = ""
-                    for k, v in url_dict.items():
-                        matches += '@.{} == "{}" && '.format(k, v)
-                    if matches:
-                        matches = matches.rstrip("&& ")
-                        match_string = "$.* ? ({})".format(matches)
-                        query = query.filter(
-                            func.jsonb_path_exists(Record.url_metadata, match_string)
-                        )
+            if cursor is not None:
+                query = query.filter(
+                    tuple_(Record.updated_date, Record.guid) > tuple_(*cursor)
+                )
 
-            if negate_params:
-                query = self._negate_filter(session, query, **negate_params)
+            query = self._filter_records(
+                session,
+                query,
+                size=size,
+                urls=urls,
+                acl=acl,
+                authz=authz,
+                hashes=hashes,
+                file_name=file_name,
+                version=version,
+                uploader=uploader,
+                metadata=metadata,
+                urls_metadata=urls_metadata,
+                negate_params=negate_params,
+            )
 
-            if page is not None:
+            if page is not None or cursor is not None:
                 # order by updated date so newly added stuff is
                 # at the end (reduce risk that a new records ends up in a page
                 # earlier on) and allows for some logic to check for newly added records
                 # (e.g. parallelly processing from beginning -> middle and ending -> middle
                 #       and as a final step, checking the "ending"+1 to see if there are
                 #       new records).
-                query = query.order_by(Record.updated_date)
+                # guid breaks ties so that cursors are unambiguous.
+                query = query.order_by(Record.updated_date, Record.guid)
             else:
                 query = query.order_by(Record.guid)
 
@@ -257,6 +261,127 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
 
             return [i.to_document_dict() for i in query]
 
+    def _filter_records(
+        self,
+        session,
+        query,
+        size=None,
+        urls=None,
+        acl=None,
+        authz=None,
+        hashes=None,
+        file_name=None,
+        version=None,
+        uploader=None,
+        metadata=None,
+        urls_metadata=None,
+        negate_params=None,
+    ):
+        """
+        Apply the record filters shared by `ids` and `export` to a Record
+        query.
+        """
+        if size is not None:
+            query = query.filter(Record.size == size)
+
+        if file_name is not None:
+            query = query.filter(Record.file_name == file_name)
+
+        if version is not None:
+            query = query.filter(Record.version == version)
+
+        if uploader is not None:
+            query = query.filter(Record.uploader == uploader)
+
+        # the array and jsonb filters are containment (@>) checks, which the
+        # GIN indexes on these columns serve
+
+        # filter records that have ALL the URLs
+        if urls:
+            query = query.filter(Record.urls.contains(urls))
+
+        if acl:
+            query = query.filter(Record.acl.contains(acl))
+        elif acl == []:
+            query = query.filter(Record.acl == None)
+
+        if authz:
+            query = query.filter(Record.authz.contains(authz))
+        elif authz == []:
+            query = query.filter(Record.authz == None)
+
+        # records may have more hash types than the ones asked for
+        if hashes:
+            query = query.filter(Record.hashes.contains(hashes))
+
+        if metadata:
+            for k, v in metadata.items():
+                query = query.filter(metadata_matches(k, v))
+
+        if urls_metadata:
+            for url_key, url_dict in urls_metadata.items():
+                matches = " && ".join(
+                    "@.{} == {}".format(json.dumps(k), json.dumps(v))
+                    for k, v in url_dict.items()
+                )
+                if matches:
+                    match_string = "$.* ? ({})".format(matches)
+                    query = query.filter(Record.url_metadata.op("@?")(match_string))
+
+        if negate_params:
+            query = self._negate_filter(session, query, **negate_params)
+
+        return query
+
+    def export(
+        self,
+        start=None,
+        size=None,
+        urls=None,
+        acl=None,
+        authz=None,
+        hashes=None,
+        file_name=None,
+        version=None,
+        uploader=None,
+        metadata=None,
+        urls_metadata=None,
+        negate_params=None,
+        batch_size=1000,
+    ):
+        """
+        Yield every record matching the filters, in guid order, as a
+        document dict.
+
+        See `SQLAlchemyIndexDriver.export`.
+        """
+        with self.session as session:
+            query = session.query(Record)
+
+            if start is not None:
+                query = query.filter(Record.guid > start)
+
+            query = self._filter_records(
+                session,
+                query,
+                size=size,
+                urls=urls,
+                acl=acl,
+                authz=authz,
+                hashes=hashes,
+                file_name=file_name,
+                version=version,
+                uploader=uploader,
+                metadata=metadata,
+                urls_metadata=urls_metadata,
+                negate_params=negate_params,
+            )
+
+            query = query.order_by(Record.guid).yield_per(batch_size)
+
+            for record in query:
+                yield record.to_document_dict()
+
     @staticmethod
     def _negate_filter(
         session,
@@ -496,8 +621,154 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             except Exception as e:
                 print(e)
 
+            # a new version of an existing baseid changes what get(baseid) returns,
+            # and the new did may have been looked up before it existed
+            self.invalidate_cached_records(record.guid, baseid)
+
             return record.guid, record.rev, record.baseid
 
+    def bulk_add(self, records):
+        """
+        Creates many records in a single transaction with one multi-row
+        INSERT; see `SQLAlchemyIndexDriver.bulk_add`.
+        """
+        results = [None] * len(records)
+        accepted = []
+        seen = set()
+
+        for i, doc in enumerate(records):
+            guid = doc.get("did")
+            if not guid:
+                guid = str(uuid.uuid4())
+                if self.config.get("PREPEND_PREFIX"):
+                    guid = self.config["DEFAULT_PREFIX"] + guid
+
+            if guid in seen:
+                results[i] = {
+                    "did": guid,
+                    "error": 'guid "{}" is duplicated in the request'.format(guid),
+                }
+                continue
+            seen.add(guid)
+
+            urls = list(set(doc.get("urls") or []))
+            url_metadata = doc.get("urls_metadata") or {}
+            missing = [url for url in url_metadata if url not in urls]
+            if missing:
+                results[i] = {
+                    "did": guid,
+                    "error": "url {} in url_metadata does not exist".format(missing[0]),
+                }
+                continue
+
+            content_created_date = doc.get("content_created_date")
+            content_updated_date = doc.get("content_updated_date")
+            try:
+                if content_created_date is not None:
+                    content_created_date = datetime.datetime.fromisoformat(
+                        content_created_date
+                    )
+                    content_updated_date = (
+                        datetime.datetime.fromisoformat(content_updated_date)
+                        if content_updated_date is not None
+                        else content_created_date
+                    )
+            except ValueError as err:
+                results[i] = {"did": guid, "error": str(err)}
+                continue
+
+            alias = None
+            if self.config.get("ADD_PREFIX_ALIAS"):
+                alias = [self.config["DEFAULT_PREFIX"] + guid]
+
+            accepted.append(
+                (
+                    i,
+                    {
+                        "guid": guid,
+                        "baseid": doc.get("baseid") or str(uuid.uuid4()),
+                        "rev": str(uuid.uuid4())[:8],
+                        "form": doc["form"],
+                        "size": doc.get("size"),
+                        "file_name": doc.get("file_name"),
+                        "version": doc.get("version"),
+                        "uploader": doc.get("uploader"),
+                        "description": doc.get("description"),
+                        "content_created_date": content_created_date,
+                        "content_updated_date": content_updated_date,
+                        "urls": urls,
+                        "acl": list(set(doc.get("acl") or [])),
+                        "authz": list(set(doc.get("authz") or [])),
+                        "hashes": doc.get("hashes") or {},
+                        "record_metadata": doc.get("metadata") or {},
+                        "url_metadata": url_metadata,
+                        "alias": alias,
+                    },
+                )
+            )
+
+        if not accepted:
+            return results
+
+        guids = [row["guid"] for _, row in accepted]
+        with self.session as session:
+            existing = self._existing_guids(session, guids)
+            # a record created between the check and the insert fails the
+            # whole batch; it is retried once without the records created since
+            for attempt in range(2):
+                rows = []
+                for i, row in accepted:
+                    if row["guid"] in existing:
+                        results[i] = {
+                            "did": row["guid"],
+                            "error": 'guid "{guid}" already exists'.format(
+                                guid=row["guid"]
+                            ),
+                        }
+                        continue
+                    rows.append(row)
+                    results[i] = {
+                        "did": row["guid"],
+                        "rev": row["rev"],
+                        "baseid": row["baseid"],
+                    }
+
+                if not rows:
+                    return results
+
+                try:
+                    session.execute(Record.__table__.insert(), rows)
+                    update_stats(
+                        session, len(rows), sum(row["size"] or 0 for row in rows)
+                    )
+                    session.commit()
+                    break
+                except IntegrityError as err:
+                    session.rollback()
+                    created = self._existing_guids(session, guids) - existing
+                    if attempt or not created:
+                        # the error names the conflicting key
+                        raise MultipleRecordsFound(
+                            "could not add the batch: {}".format(err.orig)
+                        )
+                    existing |= created
+
+            self.invalidate_cached_records(
+                *{row["baseid"] for row in rows}, *[row["guid"] for row in rows]
+            )
+
+            return results
+
+    @staticmethod
+    def _existing_guids(session, guids):
+        """
+        Return the guids of `guids` that are already records.
+        """
+        return {
+            guid
+            for (guid,) in session.query(Record.guid).filter(Record.guid.in_(guids))
+        }
+
     def add_blank_record(self, uploader, file_name=None, authz=None):
         """
         Create a new blank record with only uploader and optionally
@@ -615,16 +886,24 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             update_stats(session, 0, size)
             session.commit()
 
+            self.invalidate_cached_records(record.guid, record.baseid)
+
             return record.guid, record.rev, record.baseid
 
     def get_by_alias(self, alias):
         """
         Gets a record given a record alias
         """
+        if self.is_known_missing("alias:" + alias):
+            raise NoRecordFound("no record found")
+
         with self.session as session:
             try:
-                record = session.query(Record).filter(Record.alias.any(alias)).one()
+                record = (
+                    session.query(Record).filter(Record.alias.contains([alias])).one()
+                )
             except NoResultFound:
+                self.remember_missing("alias:" + alias)
                 raise NoRecordFound("no record found")
             except MultipleResultsFound:
                 raise MultipleRecordsFound("multiple records found")
@@ -689,6 +968,8 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
                     f"One or more aliases in request already associated with this or another GUID: {aliases}"
                 )
 
+            self.invalidate_missing_aliases(*aliases)
+
     def replace_aliases_for_did(self, aliases, did):
         """
         Replace all aliases for one DID / GUID with new aliases.
@@ -731,6 +1012,8 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
                     f"One or more aliases in request already associated with another GUID: {aliases}"
                 )
 
+            self.invalidate_missing_aliases(*aliases)
+
     def delete_all_aliases_for_did(self, did):
         """
         Delete all of this DID / GUID's aliases.
@@ -800,6 +1083,10 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
         Gets a record given the record id or baseid.
         If the given id is a baseid, it will return the latest version
         """
+        cached = self.get_cached_record(guid)
+        if cached is not None:
+            return cached
+
         with self.session as session:
             query = session.query(Record)
             query = query.filter(
@@ -814,7 +1101,10 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
                 except NoRecordFound:
                     raise NoRecordFound("no record found")
 
-            return record.to_document_dict()
+            doc = record.to_document_dict()
+
+        self.cache_record(guid, doc)
+        return doc
 
     def get_bulk(self, guid_list, expand=True):
         """
@@ -829,24 +1119,58 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
     def get_with_nonstrict_prefix(self, guid, expand=True):
         """
         Attempt to retrieve a record both with and without a prefix.
-        Proxies 'get' with provided id.
-        If not found but prefix matches default, attempt with prefix stripped.
-        If not found and id has no prefix, attempt with default prefix prepended.
-        """
-        try:
-            record = self.get(guid, expand=expand)
-        except NoRecordFound as e:
-            DEFAULT_PREFIX = self.config.get("DEFAULT_PREFIX")
-            if not DEFAULT_PREFIX:
-                raise e
-
-            if not guid.startswith(DEFAULT_PREFIX):
-                record = self.get(DEFAULT_PREFIX + guid, expand=expand)
-            else:
-                stripped = guid.split(DEFAULT_PREFIX, 1)[1]
-                record = self.get(stripped, expand=expand)
+        If not found but prefix matches default, the record with the prefix
+        stripped is returned; if not found and id has no prefix, the record
+        with the default prefix prepended.
+
+        Both forms are matched against guids and baseids in one query, then
+        against bundle ids in a second one only if no record matched the
+        first form. Ids that match nothing are remembered in the negative
+        cache.
+        """
+        cached = self.get_cached_record(guid, nonstrict=True)
+        if cached is not None:
+            return cached
+        if self.is_known_missing(guid):
+            raise NoRecordFound("no record found")
+
+        forms = self.prefix_forms(guid)
+        with self.session as session:
+            preference = case(
+                *[
+                    (or_(Record.guid == form, Record.baseid == form), i)
+                    for i, form in enumerate(forms)
+                ]
+            )
+            record = (
+                session.query(Record)
+                .filter(or_(Record.guid.in_(forms), Record.baseid.in_(forms)))
+                .order_by(preference, Record.created_date.desc())
+                .first()
+            )
+            # as with a `get` per form, a record matching a form comes after
+            # a bundle matching an earlier one
+            rank = len(forms)
+            if record is not None:
+                rank = min(
+                    i
+                    for i, form in enumerate(forms)
+                    if form in (record.guid, record.baseid)
+                )
+            bundle = get_first_bundle(forms[:rank], session) if rank else None
+            if bundle is not None:
+                return bundle.to_document_dict(expand)
+            if record is None:
+                self.remember_missing(guid)
+                raise NoRecordFound("no record found")
 
-        return record
+            # cache under the key `get` would have found it by, and under
+            # the id as given for the next nonstrict lookup of it
+            key = record.guid if record.guid in forms else record.baseid
+            doc = record.to_document_dict()
+
+        self.cache_record(key, doc, requested=guid)
+        return doc
 
     def update(self, did, rev, changing_fields):
         """
@@ -937,8 +1261,11 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             record.updated_date = datetime.datetime.utcnow()
 
             session.add(record)
+            ret = record.guid, record.baseid, record.rev
 
-            return record.guid, record.baseid, record.rev
+        self.invalidate_cached_records(ret[0], ret[1])
+
+        return ret
 
     def delete(self, guid, rev):
         """
@@ -963,8 +1290,11 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             size = record.size if record.size is not None else 0
             update_stats(session, -1, -1 * size)
 
+            baseid = record.baseid
             session.delete(record)
 
+        self.invalidate_cached_records(guid, baseid)
+
     def add_version(
         self,
         current_guid,
@@ -1043,6 +1373,8 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             except IntegrityError:
                 raise MultipleRecordsFound("{guid} already exists".format(guid=guid))
 
+            self.invalidate_cached_records(record.guid, baseid)
+
             return record.guid, record.baseid, record.rev
 
     def add_blank_version(
@@ -1110,6 +1442,8 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             except IntegrityError:
                 raise MultipleRecordsFound("{guid} already exists".format(guid=guid))
 
+            self.invalidate_cached_records(new_record.guid, new_record.baseid)
+
             return new_record.guid, new_record.baseid, new_record.rev
 
     def get_all_versions(self, guid):
@@ -1191,6 +1525,7 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
                     {"did": record.guid, "baseid": record.baseid, "rev": record.rev}
                 )
             session.commit()
+            self.invalidate_cached_records(baseid, *[rec["did"] for rec in ret])
             return ret
 
     def get_latest_version(self, guid, has_version=None):
@@ -1323,6 +1658,8 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
                     )
                 )
 
+            self.invalidate_cached_records(record.bundle_id)
+
             return record.bundle_id, record.name, record.bundle_data
 
     def get_bundle_list(self, start=None, limit=100, page=None):
@@ -1439,6 +1776,7 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
         offset=0,
         limit=1000,
         fields="did,urls",
+        start=None,
         **kwargs,
     ):
         if kwargs:
@@ -1459,24 +1797,18 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
             elif versioned is False:  # retrieve only those without a version number
                 query = query.filter(~Record.version.isnot(None))
 
-            query = query.group_by(Record.guid)
+            # add url filters; indexd_urls_text is the expression the trigram
+            # index on the urls is built on, see migration d8c931be6212
+            urls_text = func.indexd_urls_text(Record.urls)
+            if include:
+                query = query.filter(urls_text.contains(include))
+            if exclude:
+                query = query.filter(~urls_text.contains(exclude))
+
+            # continue after the last guid of the previous page
+            if start:
+                query = query.filter(Record.guid > start)
 
-            # add url filters
-            if include and exclude:
-                query = query.having(
-                    and_(
-                        ~func.array_to_string(Record.urls, ",").contains(exclude),
-                        func.array_to_string(Record.urls, ",").contains(include),
-                    )
-                )
-            elif include:
-                query = query.having(
-                    func.array_to_string(Record.urls, ",").contains(include)
-                )
-            elif exclude:
-                query = query.having(
-                    ~func.array_to_string(Record.urls, ",").contains(exclude)
-                )
             record_list = (
                 query.order_by(Record.guid.asc()).offset(offset).limit(limit).all()
             )
@@ -1491,6 +1823,8 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
         offset=0,
         limit=1000,
         fields="did,urls,rev",
+        start=None,
+        start_url=None,
         **kwargs,
     ):
         if kwargs:
@@ -1504,9 +1838,11 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
         with self.session as session:
             query = session.query(Record.guid, Record.urls, Record.rev)
 
+            # the @? operator, unlike jsonb_path_exists, can use the GIN index
+            # on url_metadata
             query = query.filter(
-                func.jsonb_path_exists(
-                    Record.url_metadata, f'$.* ? (@.{key} == "{value}")'
+                Record.url_metadata.op("@?")(
+                    "$.* ? (@.{} == {})".format(json.dumps(key), json.dumps(value))
                 )
             )
 
@@ -1517,9 +1853,13 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
                 query = query.filter(~Record.version.isnot(None))
 
             if url:
-                query = query.filter(
-                    func.array_to_string(Record.urls, ",").contains(url)
-                )
+                query = query.filter(func.indexd_urls_text(Record.urls).contains(url))
+
+            # each entry is a whole record, so pages continue after the last
+            # guid and `start_url` isn't needed
+            if start:
+                query = query.filter(Record.guid > start)
+
             # [('did', 'url', 'rev')]
             record_list = (
                 query.order_by(Record.guid.asc()).offset(offset).limit(limit).all()
@@ -1551,6 +1891,28 @@ class SingleTableSQLAlchemyIndexDriver(IndexDriverABC):
         return result
 
 
+def metadata_matches(key, value):
+    """
+    Filter on records whose metadata `key` is `value`, with containment
+    checks that the GIN index on `record_metadata` can serve.
+
+    Query parameters are strings while metadata values can be any JSON, so
+    a value that parses as a JSON number, boolean or null also matches the
+    record holding that value, as comparing `->>` text would. Objects and
+    arrays keep the `->>` text comparison, which the index can't serve.
+    """
+    clauses = [Record.record_metadata.contains({key: value})]
+    try:
+        parsed = json.loads(value)
+    except (TypeError, ValueError):
+        parsed = value
+    if isinstance(parsed, (dict, list)):
+        clauses.append(Record.record_metadata[key].astext == value)
+    elif not isinstance(parsed, str):
+        clauses.append(Record.record_metadata.contains({key: parsed}))
+    return or_(*clauses)
+
+
 def check_url_metadata(url_metadata, record):
     """
     create url metadata record in database
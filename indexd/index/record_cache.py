@@ -0,0 +1,193 @@
+"""
+Read-through cache of record documents for the index drivers, and a cache
+of ids that recently resolved to nothing.
+
+Drivers look records up by did or baseid in `get` and drop the affected keys
+after every write that changes what `get` would return. The record cache is
+configured through the driver's `index_config`:
+
+- RECORD_CACHE_SIZE: number of records kept in the in-process LRU.
+  0 (the default) disables caching unless a backend is given.
+- RECORD_CACHE_TTL: seconds a cached record may be served (default 60).
+  This bounds how long another worker can serve a record that was changed
+  through a different process when only the in-process LRU is used.
+- RECORD_CACHE_BACKEND: a `cachelib` cache shared by every worker (e.g.
+  `cachelib.RedisCache`), used instead of the in-process LRU so that
+  invalidations are seen by all of them.
+
+The negative cache remembers ids that `get_with_nonstrict_prefix` or
+`get_by_alias` failed to resolve, so repeated lookups of unknown ids don't
+reach the database. Creating a record, bundle or alias forgets the ids it
+makes resolvable. It is configured the same way:
+
+- NEGATIVE_CACHE_SIZE: number of missed ids kept in the in-process LRU.
+  0 (the default) disables it unless a backend is given.
+- NEGATIVE_CACHE_TTL: seconds a miss is remembered (default 30).
+- NEGATIVE_CACHE_BACKEND: a shared `cachelib` cache, as above.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from cachelib import BaseCache
+
+from indexd.metrics import metrics
+
+KEY_PREFIX = "indexd:record:"
+MISS_KEY_PREFIX = "indexd:miss:"
+
+
+class LRUCache(BaseCache):
+    """
+    Thread-safe in-process cachelib cache that evicts the least recently
+    used entry once `threshold` entries are stored.
+
+    Values are copied on the way in and out so callers can't mutate the
+    cached document.
+    """
+
+    def __init__(self, threshold=1000, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self._threshold = threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires and expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key, value, timeout=None):
+        timeout = self._normalize_timeout(timeout)
+        expires = time.monotonic() + timeout if timeout else 0
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._threshold:
+                self._entries.popitem(last=False)
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout=timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RecordCache(object):
+    """
+    Cache of `to_document_dict()` results keyed by the did or baseid they
+    were looked up with, counting hits and misses.
+    """
+
+    def __init__(self, backend, timeout=None):
+        self.backend = backend
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build the cache described by an index_config, or return None when
+        record caching is disabled.
+        """
+        ttl = config.get("RECORD_CACHE_TTL", 60)
+        backend = config.get("RECORD_CACHE_BACKEND")
+        if backend is None:
+            size = config.get("RECORD_CACHE_SIZE", 0)
+            if not size:
+                return None
+            backend = LRUCache(threshold=size, default_timeout=ttl)
+        return cls(backend, timeout=ttl)
+
+    def get(self, key):
+        """
+        Return the cached document for `key`, or None.
+        """
+        doc = self.backend.get(KEY_PREFIX + key)
+        with self._lock:
+            if doc is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.cache_lookup("record", "miss" if doc is None else "hit")
+        return doc
+
+    def set(self, key, doc):
+        self.backend.set(KEY_PREFIX + key, doc, timeout=self.timeout)
+
+    def invalidate(self, *keys):
+        """
+        Drop the cached documents for every given did or baseid.
+        """
+        keys = [KEY_PREFIX + key for key in keys if key]
+        if keys:
+            self.backend.delete_many(*keys)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class MissCache(object):
+    """
+    Bounded cache of keys that were recently looked up and not found.
+    """
+
+    def __init__(self, backend, timeout=None):
+        self.backend = backend
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Build the cache described by an index_config, or return None when
+        negative caching is disabled.
+        """
+        ttl = config.get("NEGATIVE_CACHE_TTL", 30)
+        backend = config.get("NEGATIVE_CACHE_BACKEND")
+        if backend is None:
+            size = config.get("NEGATIVE_CACHE_SIZE", 0)
+            if not size:
+                return None
+            backend = LRUCache(threshold=size, default_timeout=ttl)
+        return cls(backend, timeout=ttl)
+
+    def __contains__(self, key):
+        found = self.backend.get(MISS_KEY_PREFIX + key) is not None
+        metrics.cache_lookup("miss", "hit" if found else "miss")
+        return found
+
+    def add(self, key):
+        self.backend.set(MISS_KEY_PREFIX + key, 1, timeout=self.timeout)
+
+    def discard(self, *keys):
+        keys = [MISS_KEY_PREFIX + key for key in keys if key]
+        if keys:
+            self.backend.delete_many(*keys)
@@ -0,0 +1,89 @@
+"""
+Incremental JSON encoding of large list responses.
+
+`json_response` sends a document as it is encoded instead of building the
+whole body first: lists (or generators) of records, at the top level or as a
+value of the top-level object, are encoded one element at a time and sent in
+chunks of about `CHUNK_SIZE` bytes, so a worker never holds more than one
+encoded chunk next to the records themselves. Records produced by a
+generator are only built as the response is sent, after the status and
+headers: only pass generators that can't fail halfway, since an error then
+truncates the body instead of reaching the error handlers.
+
+Output is compact. When `orjson` is installed it is used to encode each
+element, otherwise the standard library `json` module is.
+"""
+
+import json
+from collections.abc import Iterator
+
+import flask
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+def dumps(obj):
+    """
+    Return `obj` encoded as compact JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _is_array(obj):
+    return isinstance(obj, (list, tuple, Iterator))
+
+
+def _encode_array(items):
+    yield b"["
+    for i, item in enumerate(items):
+        if i:
+            yield b","
+        yield dumps(item)
+    yield b"]"
+
+
+def _encode(obj):
+    if isinstance(obj, dict):
+        yield b"{"
+        for i, (key, value) in enumerate(obj.items()):
+            yield (b"," if i else b"") + dumps(str(key)) + b":"
+            if _is_array(value):
+                yield from _encode_array(value)
+            else:
+                yield dumps(value)
+        yield b"}"
+    elif _is_array(obj):
+        yield from _encode_array(obj)
+    else:
+        yield dumps(obj)
+
+
+def iterencode(obj, chunk_size=CHUNK_SIZE):
+    """
+    Yield `obj` encoded as compact JSON, in chunks of about `chunk_size`
+    bytes.
+    """
+    buffer = bytearray()
+    for piece in _encode(obj):
+        buffer += piece
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def json_response(obj):
+    """
+    Return a response streaming `obj` as JSON, see `iterencode`.
+    """
+    return flask.Response(
+        flask.stream_with_context(iterencode(obj)), mimetype="application/json"
+    )
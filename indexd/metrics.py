@@ -0,0 +1,179 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Enabled with CONFIG["ENABLE_PROMETHEUS_METRICS"], which needs the
+`prometheus_client` package. When gunicorn runs several workers, point the
+PROMETHEUS_MULTIPROC_DIR environment variable to a directory emptied before
+the server starts (see `clear_prometheus_multiproc`), so that /metrics
+aggregates the samples of every worker instead of the one answering.
+
+- indexd_request_duration_seconds{blueprint, route, method, status}:
+  time spent handling each request, by matched route, until its body is
+  sent (streamed bodies included).
+- indexd_request_sql_statements{blueprint, route} and
+  indexd_request_sql_seconds{blueprint, route}: SQL statements each request
+  executed and the time spent executing them (see indexd/sql_profiling.py).
+  As with the profiling headers, statements run while a streamed body is
+  sent are not included.
+- indexd_db_pool_checkout_wait_seconds and
+  indexd_db_pool_checkout_timeouts_total: time spent waiting for a pooled
+  database connection, and waits that gave up.
+- indexd_cache_lookups_total{cache, result}: lookups in the record, negative
+  (miss), authz, credential and dist caches, by hit or miss.
+- indexd_records_total{endpoint, outcome}: ids served by the bulk and DRS
+  endpoints, by whether they were resolved.
+
+Instrumented code calls the module-level `metrics` whether or not metrics
+are enabled; every call is a no-op until `init_app` enables them.
+"""
+
+import os
+import time
+
+import flask
+from cdislogging import get_logger
+
+from indexd.sql_profiling import listen, request_sql_stats
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+logger = get_logger(__name__)
+
+# statements per request; most handlers run a handful, listing and bulk
+# endpoints with the child tables loaded separately a few more
+STATEMENT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+
+class Metrics(object):
+    """
+    The indexd metrics, created the first time an app enables them.
+    """
+
+    def __init__(self):
+        self.enabled = False
+
+    def init_app(self, app):
+        """
+        Instrument `app` and add the /metrics route, if
+        CONFIG["ENABLE_PROMETHEUS_METRICS"] is set.
+        """
+        if not app.config.get("ENABLE_PROMETHEUS_METRICS"):
+            return
+        if prometheus_client is None:
+            raise RuntimeError(
+                "ENABLE_PROMETHEUS_METRICS is set but prometheus_client is not installed"
+            )
+
+        if not self.enabled:
+            # metrics are per process: apps created later (e.g. in tests)
+            # share them
+            self._create_metrics()
+            self.enabled = True
+        listen()
+
+        app.before_request(_start_request)
+        app.after_request(self._end_request)
+        app.add_url_rule("/metrics", "metrics", self.render, methods=["GET"])
+
+    def _create_metrics(self):
+        route_labels = ["blueprint", "route"]
+        self.request_duration = prometheus_client.Histogram(
+            "indexd_request_duration_seconds",
+            "Time spent handling requests",
+            route_labels + ["method", "status"],
+        )
+        self.request_sql_statements = prometheus_client.Histogram(
+            "indexd_request_sql_statements",
+            "SQL statements executed per request",
+            route_labels,
+            buckets=STATEMENT_BUCKETS,
+        )
+        self.request_sql_seconds = prometheus_client.Histogram(
+            "indexd_request_sql_seconds",
+            "Time spent executing SQL statements per request",
+            route_labels,
+        )
+        self.pool_checkout_wait = prometheus_client.Histogram(
+            "indexd_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a pooled database connection",
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+        )
+        self.pool_checkout_timeouts = prometheus_client.Counter(
+            "indexd_db_pool_checkout_timeouts",
+            "Waits for a pooled database connection that timed out",
+        )
+        self.cache_lookups = prometheus_client.Counter(
+            "indexd_cache_lookups",
+            "Cache lookups by cache and result",
+            ["cache", "result"],
+        )
+        self.records = prometheus_client.Counter(
+            "indexd_records",
+            "Ids served by the bulk and DRS endpoints, by outcome",
+            ["endpoint", "outcome"],
+        )
+
+    def _end_request(self, response):
+        start = flask.g.pop("metrics_start", None)
+        if start is None:
+            return response
+        rule = flask.request.url_rule
+        labels = {
+            "blueprint": flask.request.blueprint or "",
+            "route": rule.rule if rule is not None else "unmatched",
+        }
+        method = flask.request.method
+        sql = request_sql_stats()
+
+        def observe():
+            # once the body is sent, so that the latency of streamed
+            # responses (e.g. /index/export) includes producing their body
+            self.request_duration.labels(
+                method=method, status=response.status_code, **labels
+            ).observe(time.perf_counter() - start)
+            self.request_sql_statements.labels(**labels).observe(sql.statements)
+            self.request_sql_seconds.labels(**labels).observe(sql.seconds)
+
+        response.call_on_close(observe)
+        return response
+
+    def render(self):
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return flask.Response(
+            prometheus_client.generate_latest(registry),
+            mimetype=prometheus_client.CONTENT_TYPE_LATEST,
+        )
+
+    def pool_checkout(self, waited, timed_out=False):
+        if not self.enabled:
+            return
+        self.pool_checkout_wait.observe(waited)
+        if timed_out:
+            self.pool_checkout_timeouts.inc()
+
+    def cache_lookup(self, cache, result):
+        """
+        Count a lookup in `cache`, `result` being "hit" or "miss" (or
+        "coalesced" for a lookup that waited on another's).
+        """
+        if self.enabled:
+            self.cache_lookups.labels(cache=cache, result=result).inc()
+
+    def count_records(self, endpoint, outcome, count=1):
+        if self.enabled and count:
+            self.records.labels(endpoint=endpoint, outcome=outcome).inc(count)
+
+
+def _start_request():
+    flask.g.metrics_start = time.perf_counter()
+
+
+metrics = Metrics()
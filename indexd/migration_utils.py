@@ -0,0 +1,48 @@
+"""
+Helpers for migrations that build or drop indexes online.
+
+CREATE INDEX CONCURRENTLY can't run inside a transaction, so these run in an
+Alembic autocommit block; building the indexes online keeps large tables
+writable while they are created. A build that fails or is interrupted leaves
+an INVALID index behind under the same name, which is dropped before the
+index is created again so the migration can simply be rerun.
+"""
+
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from alembic import op
+
+IS_INVALID_INDEX = sa.text(
+    "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+)
+
+
+@contextmanager
+def online_index_changes():
+    """
+    Run the enclosed index changes outside of the migration's transaction.
+    """
+    with op.get_context().autocommit_block():
+        yield
+
+
+def create_index_concurrently(name, table, columns, **kwargs):
+    """
+    Build the index without locking writes out of the table. A valid index of
+    that name is kept, an INVALID one left by an earlier attempt rebuilt.
+    """
+    if op.get_bind().execute(IS_INVALID_INDEX, {"name": name}).scalar():
+        drop_index_concurrently(name, table)
+    op.create_index(
+        name,
+        table,
+        columns,
+        postgresql_concurrently=True,
+        if_not_exists=True,
+        **kwargs,
+    )
+
+
+def drop_index_concurrently(name, table):
+    op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,187 @@
+"""
+Per-request accounting of the SQL statements run by the drivers.
+
+Every statement executed while handling a request is counted and timed
+through the `before_cursor_execute` / `after_cursor_execute` events of the
+engines, for the Prometheus metrics (see indexd/metrics.py) and the opt-in
+profiling mode below.
+
+Profiling is configured through CONFIG["SQL_PROFILING"], all keys optional:
+
+- enabled: turn profiling on (default False).
+- response_headers: add `X-Indexd-Query-Count` (statements executed) and
+  `X-Indexd-DB-Time` (milliseconds spent executing them) to every response
+  (default True). Statements run while a streamed body is sent are not
+  included.
+- slow_query_threshold: seconds a statement must take for the request to be
+  logged as slow (default 0.5), None disables the log.
+- slow_query_sample_rate: fraction of slow requests that are logged
+  (default 1.0).
+- slowest_statements: number of the slowest statements of a request that are
+  kept and logged (default 5).
+
+A slow request is logged once, as a JSON object with the route, statement
+count, total DB time and its slowest statements. Statement parameters are
+never logged.
+"""
+
+import heapq
+import json
+import random
+import time
+
+import flask
+from cdislogging import get_logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = get_logger(__name__)
+
+# longest statement text included in the slow query log
+MAX_STATEMENT_LENGTH = 2000
+
+_listening = False
+
+
+class SQLStats(object):
+    """
+    SQL statements executed while handling a request, and the `keep` slowest
+    of them.
+    """
+
+    def __init__(self, keep=0):
+        self.statements = 0
+        self.seconds = 0.0
+        self.keep = keep
+        self._slowest = []
+
+    def record(self, statement, seconds):
+        self.statements += 1
+        self.seconds += seconds
+        if not self.keep:
+            return
+        # min-heap of the slowest statements seen so far
+        entry = (seconds, self.statements, statement)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    def slowest(self):
+        """
+        Return the kept `(seconds, statement)` pairs, slowest first.
+        """
+        return [
+            (seconds, statement)
+            for seconds, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+
+def listen():
+    """
+    Start recording the statements run during requests, once per process.
+    """
+    global _listening
+    if _listening:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _listening = True
+
+
+def request_sql_stats():
+    """
+    Return the `SQLStats` of the current request.
+    """
+    stats = flask.g.get("sql_stats")
+    if stats is None:
+        stats = flask.g.sql_stats = SQLStats()
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._indexd_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # statements run outside of a request (e.g. from background threads)
+    # aren't attributed to any
+    if not flask.has_request_context():
+        return
+    request_sql_stats().record(
+        statement, time.perf_counter() - context._indexd_query_start
+    )
+
+
+class SQLProfiler(object):
+    """
+    Profiling mode described in the module docstring.
+    """
+
+    def __init__(
+        self,
+        response_headers=True,
+        slow_query_threshold=0.5,
+        slow_query_sample_rate=1.0,
+        slowest_statements=5,
+    ):
+        self.response_headers = response_headers
+        self.slow_query_threshold = slow_query_threshold
+        self.slow_query_sample_rate = slow_query_sample_rate
+        self.slowest_statements = slowest_statements
+
+    @classmethod
+    def init_app(cls, app):
+        """
+        Profile the requests handled by `app` if CONFIG["SQL_PROFILING"]
+        enables it, and return the profiler or None.
+        """
+        config = dict(app.config.get("SQL_PROFILING") or {})
+        if not config.pop("enabled", False):
+            return None
+        profiler = cls(**config)
+        listen()
+        app.before_request(profiler._start_request)
+        app.after_request(profiler._end_request)
+        return profiler
+
+    def _start_request(self):
+        flask.g.sql_stats = SQLStats(keep=self.slowest_statements)
+
+    def _end_request(self, response):
+        stats = request_sql_stats()
+        if self.response_headers:
+            response.headers["X-Indexd-Query-Count"] = str(stats.statements)
+            response.headers["X-Indexd-DB-Time"] = "{:.3f}".format(stats.seconds * 1000)
+        if self._is_slow(stats) and random.random() < self.slow_query_sample_rate:
+            self._log_slow_request(stats, response)
+        return response
+
+    def _is_slow(self, stats):
+        if self.slow_query_threshold is None:
+            return False
+        slowest = stats.slowest()
+        return bool(slowest) and slowest[0][0] >= self.slow_query_threshold
+
+    def _log_slow_request(self, stats, response):
+        rule = flask.request.url_rule
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "slow_query",
+                    "method": flask.request.method,
+                    "route": rule.rule if rule is not None else None,
+                    "path": flask.request.path,
+                    "status": response.status_code,
+                    "statements": stats.statements,
+                    "db_time_ms": round(stats.seconds * 1000, 3),
+                    "slowest": [
+                        {
+                            "duration_ms": round(seconds * 1000, 3),
+                            "statement": statement[:MAX_STATEMENT_LENGTH],
+                        }
+                        for seconds, statement in stats.slowest()
+                    ],
+                }
+            )
+        )
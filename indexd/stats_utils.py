@@ -2,16 +2,17 @@
 Stats-seeding and reconciliation utilities for the indexd stats table.
 
 - migration 9a2169051163_createstatstable uses seed_stats_from_connection with db connection.
-- reconcile_stats uses seed_stats with sqlalchemy.
+- reconcile_stats uses seed_stats and compact_stats with sqlalchemy.
 """
 
+from collections import defaultdict
 from datetime import datetime
 
 import sqlalchemy as sa
 from cdislogging import get_logger
-from sqlalchemy import and_
+from sqlalchemy import and_, or_
 
-from indexd.index.drivers.alchemy import StatsRecord
+from indexd.index.drivers.alchemy import StatsDelta, StatsRecord
 
 logger = get_logger(__name__)
 
@@ -77,16 +78,104 @@ def seed_stats_from_connection(bind):
     )
 
 
+def compact_stats(session):
+    """
+    Fold pending stats_delta rows into the monthly stats snapshots.
+
+    The deltas are deleted and applied in the caller's transaction, so
+    readers see either the pending deltas or the updated snapshots, never
+    both. Safe to run while indexd is serving writes.
+
+    Args:
+        session: SQLAlchemy ORM session.
+
+    Returns:
+        Number of delta rows that were folded in.
+    """
+    # keep concurrent compactions from creating the same snapshot row
+    session.execute(sa.text("SELECT pg_advisory_xact_lock(hashtext('stats_delta'))"))
+
+    deltas = session.execute(
+        sa.delete(StatsDelta.__table__).returning(
+            StatsDelta.year,
+            StatsDelta.month,
+            StatsDelta.record_count,
+            StatsDelta.record_bytes,
+        )
+    ).fetchall()
+
+    totals = defaultdict(lambda: [0, 0])
+    for year, month, count, total_bytes in deltas:
+        totals[(year, month)][0] += count
+        totals[(year, month)][1] += total_bytes
+
+    # oldest month first, so a snapshot created for a later month carries
+    # over totals that already include the earlier deltas
+    for (year, month), (count, total_bytes) in sorted(totals.items()):
+        snapshot = (
+            session.query(StatsRecord)
+            .filter(and_(StatsRecord.month == month, StatsRecord.year == year))
+            .first()
+        )
+        if snapshot is None:
+            previous = (
+                session.query(StatsRecord)
+                .filter(
+                    or_(
+                        and_(StatsRecord.month < month, StatsRecord.year == year),
+                        StatsRecord.year < year,
+                    )
+                )
+                .order_by(StatsRecord.year.desc(), StatsRecord.month.desc())
+                .populate_existing()
+                .first()
+            )
+            session.add(
+                StatsRecord(
+                    total_record_count=previous.total_record_count if previous else 0,
+                    total_record_bytes=previous.total_record_bytes if previous else 0,
+                    month=month,
+                    year=year,
+                )
+            )
+            session.flush()
+
+        # every snapshot from this month on is a running total that includes it
+        session.query(StatsRecord).filter(
+            or_(
+                and_(StatsRecord.month >= month, StatsRecord.year == year),
+                StatsRecord.year > year,
+            )
+        ).update(
+            {
+                StatsRecord.total_record_count: StatsRecord.total_record_count + count,
+                StatsRecord.total_record_bytes: StatsRecord.total_record_bytes
+                + total_bytes,
+            },
+            synchronize_session="fetch",
+        )
+
+    logger.info(
+        "compact_stats: folded %d deltas across %d months", len(deltas), len(totals)
+    )
+    return len(deltas)
+
+
 def seed_stats(session):
     """
     Compute current stats from the active record table and upsert into stats.
 
+    Pending deltas are compacted first so that historical months keep them
+    and the recount doesn't double count them for the current month.
+
     Args:
         session: SQLAlchemy ORM session.
 
     Returns:
         Tuple of (record_count, total_bytes) that were written.
     """
+    compact_stats(session)
+
     now = datetime.now()
     source_table, count, total_bytes = _resolve_stats_source_table(session.bind)
 
@@ -1,9 +1,8 @@
-import json
-
-from flask import Blueprint, Response, request
+from flask import Blueprint, request
 from flask.json import jsonify
 
 from indexd.errors import UserError
+from indexd.json_stream import json_response
 from indexd.index.drivers.query.urls import AlchemyURLsQueryDriver
 from indexd.index.drivers.single_table_alchemy import SingleTableSQLAlchemyIndexDriver
 
@@ -21,8 +20,10 @@ def query():
         fields (str): comma separated list of fields to return, if not specified return all fields
         limit (str): max results to return
         offset (str): where to start the next query from
+        start (str): only return documents with a did after this one; pass the
+            last did of a page to get the next page
     Returns:
-        flask.Response: json list of matching entries
+        flask.Response: json list of matching entries, ordered by did
             `
                 [
                     {"did": "AAAA-BB", "rev": "1ADs" "urls": ["s3://some-randomly-awesome-url"]},
@@ -32,11 +33,7 @@ def query():
     """
 
     record_list = blueprint.driver.query_urls(**request.args.to_dict())
-    return Response(
-        json.dumps(record_list, indent=2, separators=(", ", ": ")),
-        200,
-        mimetype="application/json",
-    )
+    return json_response(record_list), 200
 
 
 @blueprint.route("/metadata/q")
@@ -50,8 +47,12 @@ def query_metadata():
         version (str): filter only records with a version number
         limit (str): max results to return
         offset (str): where to start the next query from
+        start (str): only return entries with a did after this one
+        start_url (str): with `start`, also return the entries of that did whose url
+            comes after this one; pass the did and url of the last entry of a page to get
+            the next page
     Returns:
-        flask.Response: json list of matching entries
+        flask.Response: json list of matching entries, ordered by did
             `
                 [
                     {"did": "AAAA-BB", "rev": "1ADs" "urls": ["s3://some-randomly-awesome-url"]},
@@ -61,11 +62,7 @@ def query_metadata():
     """
 
     record_list = blueprint.driver.query_metadata_by_key(**request.args.to_dict())
-    return Response(
-        json.dumps(record_list, indent=2, separators=(", ", ": ")),
-        200,
-        mimetype="application/json",
-    )
+    return json_response(record_list), 200
 
 
 @blueprint.record
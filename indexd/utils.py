@@ -1,11 +1,18 @@
+import base64
+import datetime
+import json
 import re
 from urllib.parse import urlparse
 import os
+import random
+import threading
+import time
 import requests
-from flask import current_app as app
 from cdislogging import get_logger
 from sqlalchemy import create_engine
 
+from indexd.errors import UserError
+
 logger = get_logger(__name__)
 
 
@@ -214,8 +221,115 @@ def reverse_url(url):
     return res
 
 
+def encode_page_cursor(updated_date, did):
+    """
+    Build an opaque continuation token for keyset pagination over records
+    ordered by (updated_date, did).
+
+    Args:
+        updated_date (str): isoformat `updated_date` of the last record returned
+        did (str): did of the last record returned
+
+    Returns:
+        str: url-safe token to pass back as the `cursor` query parameter
+    """
+    raw = json.dumps([updated_date, did], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_page_cursor(cursor):
+    """
+    Decode a token built by `encode_page_cursor`.
+
+    Returns:
+        tuple: (updated_date (datetime), did (str))
+
+    Raises:
+        UserError: if the token is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        updated_date, did = json.loads(raw)
+        return datetime.datetime.fromisoformat(updated_date), str(did)
+    except Exception:
+        raise UserError("cursor is not a valid continuation token")
+
+
 FENCE_SERVICE = os.environ.get("FENCE_SERVICE_URL", "http://fence-service")
 
+BUCKET_TYPES = ("S3_BUCKETS", "GS_BUCKETS")
+
+
+class BucketRegionMatcher(object):
+    """
+    A bucket name to region mapping compiled for lookups: an exact-match dict
+    plus a trie of the prefixes of the `<prefix>.*` patterns, so resolving a
+    bucket costs O(len(bucket_name)) however many patterns there are.
+
+    When several patterns match, the first one in the mapping wins.
+    """
+
+    def __init__(self, mapping):
+        self.exact = {}
+        self.trie = {}
+        for index, (pattern, region_value) in enumerate(mapping.items()):
+            region = (
+                region_value.get("region", "")
+                if isinstance(region_value, dict)
+                else region_value
+            )
+            self.exact[pattern] = region
+            if pattern.endswith(".*"):
+                node = self.trie
+                for char in pattern[:-2]:
+                    node = node.setdefault(char, {})
+                # the `None` key marks the end of a prefix
+                node.setdefault(None, (index, region))
+
+    def lookup(self, bucket_name):
+        if bucket_name in self.exact:
+            return self.exact[bucket_name]
+
+        node = self.trie
+        match = node.get(None)
+        for char in bucket_name:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node and (match is None or node[None] < match):
+                match = node[None]
+
+        return match[1] if match else ""
+
+
+class BucketRegions(dict):
+    """
+    Bucket to region mapping, either flat or shaped like Fence's
+    {"S3_BUCKETS": {...}, "GS_BUCKETS": {...}}, that compiles a
+    `BucketRegionMatcher` for each mapping the first time it is used.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._matchers = {}
+
+    def matcher(self, protocol=None):
+        key = None
+        mapping = self
+        if any(bucket_type in self for bucket_type in BUCKET_TYPES):
+            if protocol in ("gs", "gcp", "google"):
+                key = "GS_BUCKETS"
+            elif protocol in ("s3", "aws"):
+                key = "S3_BUCKETS"
+            else:
+                key = "S3_BUCKETS" if self.get("S3_BUCKETS") else "GS_BUCKETS"
+            mapping = self.get(key) or {}
+
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = self._matchers[key] = BucketRegionMatcher(mapping)
+        return matcher
+
 
 def lookup_bucket_region(bucket_name, bucket_regions, protocol=None):
     """
@@ -223,76 +337,121 @@ def lookup_bucket_region(bucket_name, bucket_regions, protocol=None):
     Exact match first, then simple prefix fallback.
     Supports both flat bucket-region maps and Fence responses shaped as
     {"S3_BUCKETS": {...}, "GS_BUCKETS": {...}}.
+    Pass the `BucketRegions` returned by `get_bucket_regions` to reuse its
+    compiled lookups; a plain dict is compiled on every call.
     """
-    if not bucket_name:
+    if not bucket_name or not bucket_regions:
         return ""
 
-    bucket_mapping = bucket_regions
-    if isinstance(bucket_regions, dict) and (
-        "S3_BUCKETS" in bucket_regions or "GS_BUCKETS" in bucket_regions
-    ):
-        if protocol in ("gs", "gcp", "google"):
-            bucket_mapping = bucket_regions.get("GS_BUCKETS") or {}
-        elif protocol in ("s3", "aws"):
-            bucket_mapping = bucket_regions.get("S3_BUCKETS") or {}
-        else:
-            bucket_mapping = (
-                bucket_regions.get("S3_BUCKETS")
-                or bucket_regions.get("GS_BUCKETS")
-                or {}
-            )
-
-    if not bucket_mapping:
-        return ""
-
-    if bucket_name in bucket_mapping:
-        region_value = bucket_mapping[bucket_name]
-        if isinstance(region_value, dict):
-            return region_value.get("region", "")
-        return region_value
-
-    for pattern, region_value in bucket_mapping.items():
-        region = (
-            region_value.get("region", "")
-            if isinstance(region_value, dict)
-            else region_value
-        )
-        if pattern.endswith(".*") and bucket_name.startswith(pattern[:-2]):
-            return region
-
-    return ""
+    if not isinstance(bucket_regions, BucketRegions):
+        bucket_regions = BucketRegions(bucket_regions)
 
+    return bucket_regions.matcher(protocol).lookup(bucket_name)
 
-def get_bucket_regions():
-    cached = getattr(app, "cache", None)
-    if cached:
-        hit = cached.get("bucket_regions")
-        if hit:
-            return hit
 
-    url = f"{FENCE_SERVICE}/data/buckets"
-    data = {}
+def fetch_bucket_regions(url, timeout):
+    """
+    Fetch the bucket regions from Fence.
 
+    Returns:
+        BucketRegions: regions by bucket for each bucket type, or None if
+        Fence could not be reached or answered with an error
+    """
     try:
-        resp = requests.get(url)
+        resp = requests.get(url, timeout=timeout)
         resp.raise_for_status()
         response_data = resp.json() or {}
-        data = {
-            "S3_BUCKETS": response_data.get("S3_BUCKETS") or {},
-            "GS_BUCKETS": response_data.get("GS_BUCKETS") or {},
-        }
     except Exception as e:
         logger.warning(f"Failed to fetch bucket regions from Fence: {e}")
+        return None
 
-    regions = {}
-    for bucket_type in ("S3_BUCKETS", "GS_BUCKETS"):
-        bucket_map = data.get(bucket_type) or {}
+    regions = BucketRegions()
+    for bucket_type in BUCKET_TYPES:
+        bucket_map = response_data.get(bucket_type) or {}
         regions[bucket_type] = {
             k: v.get("region", "") if isinstance(v, dict) else v
             for k, v in bucket_map.items()
         }
+    return regions
 
-    if cached:
-        cached.set("bucket_regions", regions)
 
-    return regions
+class BucketRegionsCache(object):
+    """
+    Per-process copy of Fence's bucket regions, refreshed ahead of time.
+
+    The first lookup fetches the regions, with concurrent lookups waiting for
+    that one request. Afterwards lookups never wait on Fence: once
+    `refresh_interval` seconds (less up to 10% random jitter, so that workers
+    don't all refresh at once) have passed, the current regions keep being
+    served while a single background thread fetches new ones. A failed fetch
+    keeps the regions already known and is retried after `retry_interval`
+    seconds. Every request to Fence gives up after `timeout` seconds.
+    """
+
+    def __init__(self, url, refresh_interval=1800, retry_interval=60, timeout=5):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self._regions = None
+        self._refresh_at = 0
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self):
+        if self._regions is None:
+            with self._load_lock:
+                if self._regions is None and time.monotonic() >= self._refresh_at:
+                    self._refresh()
+            if self._regions is None:
+                return BucketRegions({bucket_type: {} for bucket_type in BUCKET_TYPES})
+        elif time.monotonic() >= self._refresh_at:
+            self._refresh_in_background()
+        return self._regions
+
+    def _refresh(self):
+        regions = fetch_bucket_regions(self.url, self.timeout)
+        if regions is None:
+            self._refresh_at = time.monotonic() + self.retry_interval
+            return
+        self._regions = regions
+        self._refresh_at = time.monotonic() + self.refresh_interval * random.uniform(
+            0.9, 1
+        )
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(
+            target=self._background_refresh,
+            name="indexd-bucket-regions",
+            daemon=True,
+        ).start()
+
+    def _background_refresh(self):
+        try:
+            self._refresh()
+        finally:
+            self._refreshing = False
+
+    def reset_after_fork(self):
+        # a refresh running in the parent has no thread in the child
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+
+
+bucket_regions_cache = BucketRegionsCache(f"{FENCE_SERVICE}/data/buckets")
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=bucket_regions_cache.reset_after_fork)
+
+
+def get_bucket_regions():
+    """
+    Return the bucket regions known to Fence, see `BucketRegionsCache`.
+    """
+    return bucket_regions_cache.get()
@@ -0,0 +1,52 @@
+"""Add GIN indexes for containment filters on the single table
+
+Revision ID: 0eb53e3fa0c7
+Revises: 600cdc839ed6
+Create Date: 2026-10-17 16:48:21.905317
+
+"""
+
+from indexd.migration_utils import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    online_index_changes,
+)
+
+# revision identifiers, used by Alembic.
+revision = "0eb53e3fa0c7"  # pragma: allowlist secret
+down_revision = "600cdc839ed6"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+# index name, column, operator class; the jsonb columns are only searched
+# with @>, which the smaller jsonb_path_ops indexes serve
+INDEXES = [
+    ("ix_record_urls", "urls", None),
+    ("ix_record_acl", "acl", None),
+    ("ix_record_authz", "authz", None),
+    ("ix_record_alias", "alias", None),
+    ("ix_record_hashes_gin", "hashes", "jsonb_path_ops"),
+    ("ix_record_record_metadata", "record_metadata", "jsonb_path_ops"),
+]
+
+
+def upgrade() -> None:
+    with online_index_changes():
+        for name, column, ops in INDEXES:
+            create_index_concurrently(
+                name,
+                "record",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: ops} if ops else {},
+            )
+        # hashes were matched by equality on the whole document, which is
+        # all this btree served; they are matched by containment now
+        drop_index_concurrently("ix_record_hashes", "record")
+
+
+def downgrade() -> None:
+    with online_index_changes():
+        create_index_concurrently("ix_record_hashes", "record", ["hashes"])
+        for name, _, _ in INDEXES:
+            drop_index_concurrently(name, "record")
@@ -0,0 +1,35 @@
+"""Add (updated_date, did) indexes for keyset pagination
+
+Revision ID: 48b7b210e142
+Revises: 9a2169051163
+Create Date: 2026-10-17 10:12:41.316045
+
+"""
+
+from indexd.migration_utils import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    online_index_changes,
+)
+
+# revision identifiers, used by Alembic.
+revision = "48b7b210e142"  # pragma: allowlist secret
+down_revision = "9a2169051163"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with online_index_changes():
+        create_index_concurrently(
+            "index_record_updated_date_did_idx", "index_record", ["updated_date", "did"]
+        )
+        create_index_concurrently(
+            "ix_record_updated_date_guid", "record", ["updated_date", "guid"]
+        )
+
+
+def downgrade() -> None:
+    with online_index_changes():
+        drop_index_concurrently("index_record_updated_date_did_idx", "index_record")
+        drop_index_concurrently("ix_record_updated_date_guid", "record")
@@ -0,0 +1,42 @@
+"""Add indexes for looking records up by url metadata
+
+Revision ID: 600cdc839ed6
+Revises: d8c931be6212
+Create Date: 2026-10-17 16:05:44.730192
+
+"""
+
+from indexd.migration_utils import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    online_index_changes,
+)
+
+# revision identifiers, used by Alembic.
+revision = "600cdc839ed6"  # pragma: allowlist secret
+down_revision = "d8c931be6212"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with online_index_changes():
+        # (did, url) after (key, value) serves keyset pagination of a lookup
+        create_index_concurrently(
+            "index_record_url_metadata_key_value_idx",
+            "index_record_url_metadata",
+            ["key", "value", "did", "url"],
+        )
+        # the default jsonb_ops opclass: jsonb_path_ops can't serve jsonpath
+        # queries with a wildcard member accessor like `$.* ? (...)`
+        create_index_concurrently(
+            "ix_record_url_metadata", "record", ["url_metadata"], postgresql_using="gin"
+        )
+
+
+def downgrade() -> None:
+    with online_index_changes():
+        drop_index_concurrently(
+            "index_record_url_metadata_key_value_idx", "index_record_url_metadata"
+        )
+        drop_index_concurrently("ix_record_url_metadata", "record")
@@ -0,0 +1,38 @@
+"""Add (value, did) indexes to the url, ace and authz tables
+
+Revision ID: 772f0d4d3dea
+Revises: 99f1b8607145
+Create Date: 2026-10-17 14:03:52.118304
+
+"""
+
+from indexd.migration_utils import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    online_index_changes,
+)
+
+# revision identifiers, used by Alembic.
+revision = "772f0d4d3dea"  # pragma: allowlist secret
+down_revision = "99f1b8607145"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+# index name, table, columns
+INDEXES = [
+    ("index_record_url_url_did_idx", "index_record_url", ["url", "did"]),
+    ("index_record_ace_ace_did_idx", "index_record_ace", ["ace", "did"]),
+    ("index_record_authz_resource_did_idx", "index_record_authz", ["resource", "did"]),
+]
+
+
+def upgrade() -> None:
+    with online_index_changes():
+        for name, table, columns in INDEXES:
+            create_index_concurrently(name, table, columns)
+
+
+def downgrade() -> None:
+    with online_index_changes():
+        for name, table, _ in INDEXES:
+            drop_index_concurrently(name, table)
@@ -0,0 +1,67 @@
+"""Create stats_delta table
+
+Revision ID: 99f1b8607145
+Revises: 48b7b210e142
+Create Date: 2026-10-17 19:02:17.530912
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "99f1b8607145"  # pragma: allowlist secret
+down_revision = "48b7b210e142"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stats_delta",
+        sa.Column("id", sa.BIGINT(), autoincrement=True, nullable=False),
+        sa.Column("record_count", sa.BIGINT(), autoincrement=False, nullable=False),
+        sa.Column("record_bytes", sa.BIGINT(), autoincrement=False, nullable=False),
+        sa.Column("month", sa.INTEGER(), autoincrement=False, nullable=False),
+        sa.Column("year", sa.INTEGER(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    # don't lose writes that were never compacted into the stats table
+    op.execute(
+        """
+        INSERT INTO stats (total_record_count, total_record_bytes, month, year)
+        SELECT
+            COALESCE(previous.total_record_count, 0),
+            COALESCE(previous.total_record_bytes, 0),
+            d.month,
+            d.year
+        FROM (SELECT DISTINCT month, year FROM stats_delta) d
+        LEFT JOIN LATERAL (
+            SELECT total_record_count, total_record_bytes FROM stats p
+            WHERE (p.year, p.month) < (d.year, d.month)
+            ORDER BY p.year DESC, p.month DESC
+            LIMIT 1
+        ) previous ON true
+        ON CONFLICT (month, year) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        UPDATE stats SET
+            total_record_count = stats.total_record_count + d.record_count,
+            total_record_bytes = stats.total_record_bytes + d.record_bytes
+        FROM (
+            SELECT s.month, s.year,
+                   SUM(delta.record_count) AS record_count,
+                   SUM(delta.record_bytes) AS record_bytes
+            FROM stats s JOIN stats_delta delta
+              ON (delta.year, delta.month) <= (s.year, s.month)
+            GROUP BY s.month, s.year
+        ) d
+        WHERE stats.month = d.month AND stats.year = d.year
+        """
+    )
+    op.drop_table("stats_delta")
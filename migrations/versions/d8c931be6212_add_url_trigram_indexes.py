@@ -0,0 +1,60 @@
+"""Add trigram indexes for URL substring search
+
+Revision ID: d8c931be6212
+Revises: 772f0d4d3dea
+Create Date: 2026-10-17 15:27:09.482716
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from indexd.migration_utils import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    online_index_changes,
+)
+
+# revision identifiers, used by Alembic.
+revision = "d8c931be6212"  # pragma: allowlist secret
+down_revision = "772f0d4d3dea"  # pragma: allowlist secret
+branch_labels = None
+depends_on = None
+
+# array_to_string is only STABLE, so the single table's urls are indexed
+# through an IMMUTABLE wrapper that the queries call as well
+CREATE_URLS_TEXT = """
+CREATE OR REPLACE FUNCTION indexd_urls_text(urls varchar[]) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT array_to_string(urls, ',') $$
+"""
+
+
+def upgrade() -> None:
+    # pg_trgm is a trusted extension since Postgres 13, so the database owner
+    # can create it
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(CREATE_URLS_TEXT)
+
+    with online_index_changes():
+        create_index_concurrently(
+            "index_record_url_url_trgm_idx",
+            "index_record_url",
+            ["url"],
+            postgresql_using="gin",
+            postgresql_ops={"url": "gin_trgm_ops"},
+        )
+        create_index_concurrently(
+            "ix_record_urls_trgm",
+            "record",
+            [sa.text("indexd_urls_text(urls) gin_trgm_ops")],
+            postgresql_using="gin",
+        )
+
+
+def downgrade() -> None:
+    with online_index_changes():
+        drop_index_concurrently("index_record_url_url_trgm_idx", "index_record_url")
+        drop_index_concurrently("ix_record_urls_trgm", "record")
+    op.execute("DROP FUNCTION IF EXISTS indexd_urls_text(varchar[])")
+    # pg_trgm is left installed, other schemas may use it
@@ -0,0 +1,92 @@
+"""
+Memory benchmark of encoding a page of records for a list response.
+
+Compares building the whole body with `json.dumps` (as `flask.jsonify`
+does) with streaming it through `indexd.json_stream.iterencode`, reporting
+the peak Python memory used while encoding, on top of the records
+themselves:
+
+    python -m tests.benchmarks.bench_json_encoding --page-size 1024
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+import uuid
+
+from indexd import json_stream
+from indexd.json_stream import iterencode
+
+
+def make_records(count):
+    return [
+        {
+            "did": str(uuid.uuid4()),
+            "baseid": str(uuid.uuid4()),
+            "rev": uuid.uuid4().hex[:8],
+            "size": 1024,
+            "file_name": "file.txt",
+            "urls": [
+                "s3://bench-bucket/{}".format(i),
+                "gs://bench-bucket/{}".format(i),
+            ],
+            "urls_metadata": {"s3://bench-bucket/{}".format(i): {"state": "ok"}},
+            "acl": ["a", "b"],
+            "authz": ["/programs/bench"],
+            "hashes": {"md5": uuid.uuid4().hex},
+            "metadata": {"project": "bench"},
+            "form": "object",
+            "created_date": "2024-01-01T00:00:00",
+            "updated_date": "2024-01-01T00:00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def whole_body(records):
+    return len(json.dumps({"records": records}))
+
+
+def whole_body_pretty(records):
+    return len(json.dumps(records, indent=2, separators=(", ", ": ")))
+
+
+def streamed(records):
+    return sum(len(chunk) for chunk in iterencode({"records": records}))
+
+
+def measure(fn, records):
+    gc.collect()
+    tracemalloc.start()
+    start = time.process_time()
+    size = fn(records)
+    cpu = time.process_time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, cpu, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--page-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    records = make_records(args.page_size)
+    backend = "orjson" if json_stream.orjson is not None else "json"
+    print(f"{args.page_size} records per page, streaming backend: {backend}")
+    for name, fn in (
+        ("json.dumps", whole_body),
+        ("json.dumps indent=2", whole_body_pretty),
+        ("iterencode", streamed),
+    ):
+        size, cpu, peak = measure(fn, records)
+        print(
+            f"{name:>20}: body {size / 1024:7.0f} KiB  cpu {cpu * 1000:7.1f} ms"
+            f"  peak {peak / 1024:7.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Synthetic records the benchmarks run against.
+
+The records are those of bin/generate_dataset.py, loaded with COPY and the
+stats table seeded to match. The same records are loaded into the
+multi-table schema and the single `record` table, so both index drivers are
+measured on identical data, and two loads of the same size are identical
+too.
+"""
+
+import multiprocessing
+
+from sqlalchemy import delete, func, select
+
+from bin.generate_dataset import DatasetSpec
+from bin.generate_dataset import load as load_dataset
+from indexd.index.drivers.alchemy import (
+    BaseVersion,
+    IndexRecord,
+    IndexRecordACE,
+    IndexRecordAlias,
+    IndexRecordAuthz,
+    IndexRecordHash,
+    IndexRecordMetadata,
+    IndexRecordUrl,
+    IndexRecordUrlMetadata,
+)
+from indexd.index.drivers.single_table_alchemy import Record
+
+PREFIX = "bench/"
+SPEC = DatasetSpec(prefix=PREFIX)
+BUCKETS = SPEC.buckets
+PROJECTS = SPEC.authz_paths
+
+
+def count_records(engine, single_table=False):
+    column = Record.guid if single_table else IndexRecord.did
+    with engine.connect() as conn:
+        return conn.execute(
+            select(func.count()).where(column.like(PREFIX + "%"))
+        ).scalar()
+
+
+def load(engine, count, single_table=False):
+    """
+    Add benchmark records to the database until there are `count` of them.
+    """
+    start = count_records(engine, single_table=single_table)
+    if start < count:
+        load_dataset(
+            engine.url.render_as_string(hide_password=False),
+            SPEC,
+            count - start,
+            start=start,
+            single_table=single_table,
+            workers=min(multiprocessing.cpu_count(), 8),
+        )
+
+
+def dids(count):
+    """
+    Return the dids of the first `count` benchmark records.
+    """
+    return [SPEC.record(i)["did"] for i in range(count)]
+
+
+def delete_records(engine, prefix, single_table=False):
+    """
+    Delete every record whose did starts with `prefix`.
+    """
+    pattern = prefix + "%"
+    with engine.begin() as conn:
+        if single_table:
+            conn.execute(delete(Record.__table__).where(Record.guid.like(pattern)))
+            return
+        baseids = select(IndexRecord.baseid).where(IndexRecord.did.like(pattern))
+        baseids = [row[0] for row in conn.execute(baseids)]
+        for table in (
+            IndexRecordUrlMetadata,
+            IndexRecordUrl,
+            IndexRecordACE,
+            IndexRecordAuthz,
+            IndexRecordHash,
+            IndexRecordMetadata,
+            IndexRecordAlias,
+            IndexRecord,
+        ):
+            conn.execute(delete(table.__table__).where(table.did.like(pattern)))
+        if baseids:
+            conn.execute(
+                delete(BaseVersion.__table__).where(BaseVersion.baseid.in_(baseids))
+            )
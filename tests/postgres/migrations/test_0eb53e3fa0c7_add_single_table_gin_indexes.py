@@ -0,0 +1,43 @@
+from alembic.config import main as alembic_main
+
+GET_INDEXES = """
+SELECT indexname FROM pg_indexes
+WHERE schemaname = 'public' AND tablename = 'record';
+"""
+
+EXPECTED_INDEXES = {
+    "ix_record_urls",
+    "ix_record_acl",
+    "ix_record_authz",
+    "ix_record_alias",
+    "ix_record_hashes_gin",
+    "ix_record_record_metadata",
+}
+
+
+def test_upgrade(postgres_driver):
+    """
+    Ensure the migration replaces the hashes btree with GIN indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "downgrade", "600cdc839ed6"])
+    alembic_main(["--raiseerr", "upgrade", "0eb53e3fa0c7"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert EXPECTED_INDEXES.issubset(indexes)
+    assert "ix_record_hashes" not in indexes
+
+
+def test_downgrade(postgres_driver):
+    """
+    Ensure the downgrade restores the hashes btree and removes the GIN indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "upgrade", "0eb53e3fa0c7"])
+    alembic_main(["--raiseerr", "downgrade", "600cdc839ed6"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert not EXPECTED_INDEXES.intersection(indexes)
+    assert "ix_record_hashes" in indexes
@@ -0,0 +1,67 @@
+from alembic.config import main as alembic_main
+
+GET_INDEXES = """
+SELECT indexname FROM pg_indexes
+WHERE schemaname = 'public' AND tablename IN ('index_record', 'record');
+"""
+
+EXPECTED_INDEXES = {
+    "index_record_updated_date_did_idx",
+    "ix_record_updated_date_guid",
+}
+
+
+def test_upgrade(postgres_driver):
+    """
+    Ensure the migration adds the (updated_date, did) keyset pagination indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "downgrade", "9a2169051163"])
+    alembic_main(["--raiseerr", "upgrade", "48b7b210e142"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert EXPECTED_INDEXES.issubset(indexes)
+
+
+def test_downgrade(postgres_driver):
+    """
+    Ensure the downgrade removes the keyset pagination indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "upgrade", "48b7b210e142"])
+    alembic_main(["--raiseerr", "downgrade", "9a2169051163"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert not EXPECTED_INDEXES.intersection(indexes)
+
+
+def test_upgrade_rebuilds_invalid_leftover_index(postgres_driver):
+    """
+    Ensure a rerun after an interrupted build replaces the INVALID index it
+    left behind and keeps the index that was already built
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "downgrade", "9a2169051163"])
+    conn.execute("CREATE INDEX index_record_updated_date_did_idx ON index_record (did)")
+    conn.execute(
+        "UPDATE pg_index SET indisvalid = false "
+        "WHERE indexrelid = 'index_record_updated_date_did_idx'::regclass"
+    )
+    conn.execute(
+        "CREATE INDEX ix_record_updated_date_guid ON record (updated_date, guid)"
+    )
+
+    alembic_main(["--raiseerr", "upgrade", "48b7b210e142"])
+
+    rows = conn.execute(
+        "SELECT indexrelid::regclass::text, indisvalid, indnatts FROM pg_index "
+        "WHERE indexrelid::regclass::text IN "
+        "('index_record_updated_date_did_idx', 'ix_record_updated_date_guid')"
+    )
+    assert {row[0]: (row[1], row[2]) for row in rows} == {
+        "index_record_updated_date_did_idx": (True, 2),
+        "ix_record_updated_date_guid": (True, 2),
+    }
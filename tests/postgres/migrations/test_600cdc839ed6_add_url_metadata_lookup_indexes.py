@@ -0,0 +1,34 @@
+from alembic.config import main as alembic_main
+
+GET_INDEXES = """
+SELECT indexname FROM pg_indexes
+WHERE schemaname = 'public' AND tablename IN ('index_record_url_metadata', 'record');
+"""
+
+EXPECTED_INDEXES = {"index_record_url_metadata_key_value_idx", "ix_record_url_metadata"}
+
+
+def test_upgrade(postgres_driver):
+    """
+    Ensure the migration adds the url metadata lookup indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "downgrade", "d8c931be6212"])
+    alembic_main(["--raiseerr", "upgrade", "600cdc839ed6"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert EXPECTED_INDEXES.issubset(indexes)
+
+
+def test_downgrade(postgres_driver):
+    """
+    Ensure the downgrade removes the url metadata lookup indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "upgrade", "600cdc839ed6"])
+    alembic_main(["--raiseerr", "downgrade", "d8c931be6212"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert not EXPECTED_INDEXES.intersection(indexes)
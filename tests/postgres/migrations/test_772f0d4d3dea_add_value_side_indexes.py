@@ -0,0 +1,39 @@
+from alembic.config import main as alembic_main
+
+GET_INDEXES = """
+SELECT indexname FROM pg_indexes
+WHERE schemaname = 'public'
+AND tablename IN ('index_record_url', 'index_record_ace', 'index_record_authz');
+"""
+
+EXPECTED_INDEXES = {
+    "index_record_url_url_did_idx",
+    "index_record_ace_ace_did_idx",
+    "index_record_authz_resource_did_idx",
+}
+
+
+def test_upgrade(postgres_driver):
+    """
+    Ensure the migration adds the (value, did) indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "downgrade", "99f1b8607145"])
+    alembic_main(["--raiseerr", "upgrade", "772f0d4d3dea"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert EXPECTED_INDEXES.issubset(indexes)
+
+
+def test_downgrade(postgres_driver):
+    """
+    Ensure the downgrade removes the (value, did) indexes
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "upgrade", "772f0d4d3dea"])
+    alembic_main(["--raiseerr", "downgrade", "99f1b8607145"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert not EXPECTED_INDEXES.intersection(indexes)
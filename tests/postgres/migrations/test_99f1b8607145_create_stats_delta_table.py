@@ -0,0 +1,49 @@
+from alembic.config import main as alembic_main
+
+GET_TABLES = """
+SELECT table_name FROM information_schema.tables
+WHERE table_schema = 'public' AND table_name = 'stats_delta';
+"""
+
+
+def test_upgrade(postgres_driver):
+    """
+    Ensure the migration creates the stats_delta table
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "downgrade", "48b7b210e142"])
+    alembic_main(["--raiseerr", "upgrade", "99f1b8607145"])
+
+    assert [row[0] for row in conn.execute(GET_TABLES)] == ["stats_delta"]
+
+
+def test_downgrade_keeps_pending_deltas(postgres_driver):
+    """
+    Ensure the downgrade folds pending deltas into the stats table before
+    dropping stats_delta
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "upgrade", "99f1b8607145"])
+
+    conn.execute("DELETE FROM stats")
+    conn.execute(
+        "INSERT INTO stats (total_record_count, total_record_bytes, month, year) "
+        "VALUES (10, 1000, 1, 2020)"
+    )
+    conn.execute(
+        "INSERT INTO stats_delta (record_count, record_bytes, month, year) "
+        "VALUES (1, 100, 1, 2020), (2, 200, 3, 2020)"
+    )
+
+    alembic_main(["--raiseerr", "downgrade", "48b7b210e142"])
+
+    assert conn.execute(GET_TABLES).fetchall() == []
+    rows = conn.execute(
+        "SELECT month, year, total_record_count, total_record_bytes FROM stats "
+        "ORDER BY year, month"
+    ).fetchall()
+    assert [tuple(row) for row in rows] == [(1, 2020, 11, 1100), (3, 2020, 13, 1300)]
+
+    alembic_main(["--raiseerr", "upgrade", "head"])
@@ -0,0 +1,38 @@
+from alembic.config import main as alembic_main
+
+GET_INDEXES = """
+SELECT indexname FROM pg_indexes
+WHERE schemaname = 'public' AND tablename IN ('index_record_url', 'record');
+"""
+
+GET_FUNCTION = "SELECT proname FROM pg_proc WHERE proname = 'indexd_urls_text';"
+
+EXPECTED_INDEXES = {"index_record_url_url_trgm_idx", "ix_record_urls_trgm"}
+
+
+def test_upgrade(postgres_driver):
+    """
+    Ensure the migration adds the trigram indexes on urls
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "downgrade", "772f0d4d3dea"])
+    alembic_main(["--raiseerr", "upgrade", "d8c931be6212"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert EXPECTED_INDEXES.issubset(indexes)
+    assert conn.execute(GET_FUNCTION).fetchall()
+
+
+def test_downgrade(postgres_driver):
+    """
+    Ensure the downgrade removes the trigram indexes and their function
+    """
+    conn = postgres_driver.engine.connect()
+
+    alembic_main(["--raiseerr", "upgrade", "d8c931be6212"])
+    alembic_main(["--raiseerr", "downgrade", "772f0d4d3dea"])
+
+    indexes = {row[0] for row in conn.execute(GET_INDEXES)}
+    assert not EXPECTED_INDEXES.intersection(indexes)
+    assert not conn.execute(GET_FUNCTION).fetchall()
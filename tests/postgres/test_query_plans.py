@@ -0,0 +1,116 @@
+"""
+Check that filtering records by child table values is driven by indexes.
+
+Seq scans are disabled while planning, so a table only shows up as a
+"Seq Scan" if no index can serve the query at all.
+"""
+
+import pytest
+
+from indexd.index.drivers.query.urls import AlchemyURLsQueryDriver
+from indexd.index.drivers.single_table_alchemy import SingleTableSQLAlchemyIndexDriver
+from tests.default_test_settings import settings
+from tests.util import recorded_statements
+
+
+def explain_first_statement(engine, fn):
+    """
+    Return the plan of the first statement `fn` runs.
+    """
+    with recorded_statements(engine) as statements:
+        fn()
+
+    statement, parameters = statements[0]
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SET enable_seqscan = off")
+        cursor.execute("EXPLAIN " + statement, parameters)
+        return "\n".join(row[0] for row in cursor.fetchall())
+    finally:
+        connection.rollback()
+        connection.close()
+
+
+@pytest.mark.parametrize(
+    "filters,table",
+    [
+        ({"urls": ["s3://bucket/key"]}, "index_record_url"),
+        ({"acl": ["open"]}, "index_record_ace"),
+        ({"authz": ["/programs/a/projects/b"]}, "index_record_authz"),
+        (
+            {"authz": ["/programs/a/projects/b", "/programs/a/projects/c"]},
+            "index_record_authz",
+        ),
+    ],
+)
+def test_child_value_filters_use_indexes(postgres_driver, filters, table):
+    # the records are selected first, their children are loaded afterwards
+    plan = explain_first_statement(
+        postgres_driver.engine, lambda: postgres_driver.ids(**filters)
+    )
+
+    assert table in plan
+    assert "Seq Scan on " + table not in plan, plan
+
+
+def test_url_search_uses_trigram_index(postgres_driver):
+    urls_driver = AlchemyURLsQueryDriver(postgres_driver)
+
+    plan = explain_first_statement(
+        postgres_driver.engine,
+        lambda: urls_driver.query_urls(include="bucket/key", limit=10),
+    )
+
+    assert "index_record_url_url_trgm_idx" in plan, plan
+
+
+def test_single_table_url_search_uses_trigram_index(postgres_driver):
+    driver = SingleTableSQLAlchemyIndexDriver(settings["config"]["TEST_DB"])
+
+    plan = explain_first_statement(
+        driver.engine, lambda: driver.query_urls(include="bucket/key", limit=10)
+    )
+
+    assert "ix_record_urls_trgm" in plan, plan
+
+
+def test_url_metadata_lookup_uses_key_value_index(postgres_driver):
+    urls_driver = AlchemyURLsQueryDriver(postgres_driver)
+
+    plan = explain_first_statement(
+        postgres_driver.engine,
+        lambda: urls_driver.query_metadata_by_key("state", "uploaded", limit=10),
+    )
+
+    assert "index_record_url_metadata_key_value_idx" in plan, plan
+
+
+def test_single_table_url_metadata_lookup_uses_gin_index(postgres_driver):
+    driver = SingleTableSQLAlchemyIndexDriver(settings["config"]["TEST_DB"])
+
+    plan = explain_first_statement(
+        driver.engine,
+        lambda: driver.query_metadata_by_key("state", "uploaded", limit=10),
+    )
+
+    assert "ix_record_url_metadata" in plan, plan
+
+
+@pytest.mark.parametrize(
+    "filters,index",
+    [
+        ({"urls": ["s3://bucket/key"]}, "ix_record_urls"),
+        ({"acl": ["open"]}, "ix_record_acl"),
+        ({"authz": ["/programs/a/projects/b"]}, "ix_record_authz"),
+        ({"hashes": {"md5": "8b9942cf415384b27cadf1f4d2d682e5"}}, "ix_record_hashes"),
+        ({"metadata": {"project_id": "a"}}, "ix_record_record_metadata"),
+    ],
+)
+def test_single_table_filters_use_gin_indexes(postgres_driver, filters, index):
+    driver = SingleTableSQLAlchemyIndexDriver(settings["config"]["TEST_DB"])
+
+    plan = explain_first_statement(driver.engine, lambda: driver.ids(**filters))
+
+    assert index in plan, plan
+    assert "Seq Scan on record" not in plan, plan
@@ -0,0 +1,216 @@
+"""
+Tests for the cache of Arborist authorization decisions.
+"""
+
+import base64
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from indexd.auth.authz_cache import AuthzCache, token_expiry
+from indexd.auth.drivers.alchemy import SQLAlchemyAuthDriver
+from indexd.auth.errors import AuthzError
+from tests.conftest import POSTGRES_CONNECTION
+
+
+class FakeArborist(object):
+    """
+    Stands in for an ArboristClient, allowing the (method, resource) pairs in
+    `allowed` after `delay` seconds, or raising `error`.
+    """
+
+    def __init__(self, allowed=(), delay=0, error=None):
+        self.allowed = set(allowed)
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def auth_request(self, jwt, service, methods, resources):
+        with self._lock:
+            self.calls.append((jwt, methods, tuple(resources)))
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return all((methods, resource) in self.allowed for resource in resources)
+
+
+@pytest.fixture
+def token():
+    with patch("indexd.auth.drivers.alchemy.get_jwt_token") as get_jwt_token:
+        get_jwt_token.return_value = "token-a"
+        yield get_jwt_token
+
+
+def make_driver(arborist, **kwargs):
+    kwargs.setdefault("authz_cache_size", 100)
+    driver = SQLAlchemyAuthDriver(POSTGRES_CONNECTION, **kwargs)
+    driver.arborist = arborist
+    return driver
+
+
+def test_cache_disabled_by_default(token):
+    arborist = FakeArborist(allowed=[("read", "/a")])
+    driver = SQLAlchemyAuthDriver(POSTGRES_CONNECTION)
+    driver.arborist = arborist
+    assert driver.authz_cache is None
+
+    driver.authz("read", ["/a"])
+    driver.authz("read", ["/a"])
+    assert len(arborist.calls) == 2
+
+
+def test_allowed_decision_is_cached(token):
+    arborist = FakeArborist(allowed=[("update", "/a"), ("update", "/b")])
+    driver = make_driver(arborist)
+
+    driver.authz("update", ["/a", "/b"])
+    # the order of the resources doesn't matter
+    driver.authz("update", ["/b", "/a"])
+
+    assert len(arborist.calls) == 1
+    assert driver.authz_cache.stats() == {"hits": 1, "misses": 1, "coalesced": 0}
+
+
+def test_decisions_are_per_token_and_method(token):
+    arborist = FakeArborist(allowed=[("read", "/a")])
+    driver = make_driver(arborist)
+
+    driver.authz("read", ["/a"])
+    with pytest.raises(AuthzError):
+        driver.authz("delete", ["/a"])
+
+    token.return_value = "token-b"
+    driver.authz("read", ["/a"])
+
+    assert [call[0] for call in arborist.calls if call[2] == ("/a",)] == [
+        "token-a",
+        "token-a",
+        "token-b",
+    ]
+
+
+def test_denial_is_cached_for_negative_ttl(token):
+    arborist = FakeArborist()
+    driver = make_driver(arborist, authz_negative_cache_ttl=1)
+
+    with pytest.raises(AuthzError):
+        driver.authz("update", ["/a"])
+    # resource check then admin check
+    assert len(arborist.calls) == 2
+
+    with pytest.raises(AuthzError):
+        driver.authz("update", ["/a"])
+    assert len(arborist.calls) == 2
+
+    # access granted since is seen once the denial expires
+    arborist.allowed.add(("update", "/a"))
+    time.sleep(1.1)
+    driver.authz("update", ["/a"])
+    assert len(arborist.calls) == 3
+
+
+def test_admin_decision_is_cached(token):
+    arborist = FakeArborist(allowed=[("update", "/services/indexd/admin")])
+    driver = make_driver(arborist)
+
+    driver.authz("update", ["/a"])
+    driver.authz("update", ["/a"])
+
+    assert len(arborist.calls) == 2
+
+
+def test_arborist_errors_are_not_cached(token):
+    arborist = FakeArborist(error=ValueError("arborist is down"))
+    driver = make_driver(arborist)
+
+    for _ in range(2):
+        with pytest.raises(AuthzError):
+            driver.authz("update", ["/a"])
+    # the failed resource check falls back to the admin check, which fails too
+    assert len(arborist.calls) == 4
+    assert driver.authz_cache.stats()["hits"] == 0
+
+
+def test_denial_after_failed_resource_check_is_not_cached(token):
+    class FlakyArborist(FakeArborist):
+        def auth_request(self, jwt, service, methods, resources):
+            if resources == ["/a"]:
+                self.calls.append((jwt, methods, tuple(resources)))
+                raise ValueError("timed out")
+            return super().auth_request(jwt, service, methods, resources)
+
+    arborist = FlakyArborist()
+    driver = make_driver(arborist)
+
+    for _ in range(2):
+        with pytest.raises(AuthzError):
+            driver.authz("update", ["/a"])
+    assert len(arborist.calls) == 4
+
+
+def test_concurrent_checks_are_coalesced(token):
+    arborist = FakeArborist(allowed=[("read", "/a")], delay=0.3)
+    driver = make_driver(arborist)
+    errors = []
+
+    def check():
+        try:
+            driver.authz("read", ["/a"])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=check) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(arborist.calls) == 1
+    stats = driver.authz_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["coalesced"] == 4
+
+
+def make_jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return "header.{}.signature".format(payload.decode())
+
+
+def test_token_expiry():
+    assert token_expiry(make_jwt({"exp": 1700000000})) == 1700000000
+    assert token_expiry(make_jwt({"sub": "1"})) is None
+    assert token_expiry("token-a") is None
+
+
+def test_allowed_decision_is_not_reused_past_token_expiry(token):
+    token.return_value = make_jwt({"exp": time.time() + 0.5})
+    arborist = FakeArborist(allowed=[("read", "/a")])
+    driver = make_driver(arborist, authz_cache_ttl=60)
+
+    driver.authz("read", ["/a"])
+    driver.authz("read", ["/a"])
+    assert len(arborist.calls) == 1
+
+    time.sleep(0.6)
+    driver.authz("read", ["/a"])
+    assert len(arborist.calls) == 2
+
+    # an expired token's decision isn't cached at all
+    driver.authz("read", ["/a"])
+    assert len(arborist.calls) == 3
+
+
+def test_cache_is_bounded():
+    cache = AuthzCache(size=2)
+    for resource in ("/a", "/b", "/c"):
+        cache.get_or_check(
+            AuthzCache.key("token", "read", [resource]), lambda: (True, True)
+        )
+
+    assert cache.cache.get(AuthzCache.key("token", "read", ["/a"])) is None
+    assert cache.cache.get(AuthzCache.key("token", "read", ["/c"])) is True
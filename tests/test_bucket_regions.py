@@ -0,0 +1,157 @@
+"""
+Tests for resolving bucket regions from Fence's bucket list.
+"""
+
+import threading
+import time
+from unittest import mock
+
+import requests
+
+from indexd.utils import (
+    BucketRegionMatcher,
+    BucketRegions,
+    BucketRegionsCache,
+    lookup_bucket_region,
+)
+
+
+def make_response(data):
+    response = mock.MagicMock(requests.Response)
+    response.json.return_value = data
+    return response
+
+
+class FakeFence(object):
+    """
+    Stands in for `requests.get` against Fence's /data/buckets, answering
+    with `buckets` after `delay` seconds or raising `error`.
+    """
+
+    def __init__(self, buckets, delay=0, error=None):
+        self.buckets = buckets
+        self.delay = delay
+        self.error = error
+        self.calls = []
+
+    def get(self, url, timeout=None):
+        self.calls.append(timeout)
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return make_response({"S3_BUCKETS": dict(self.buckets)})
+
+
+def test_matcher_prefers_exact_match():
+    matcher = BucketRegionMatcher(
+        {"bucket-.*": "us-west-2", "bucket-a": {"region": "us-east-1"}}
+    )
+
+    assert matcher.lookup("bucket-a") == "us-east-1"
+    assert matcher.lookup("bucket-b") == "us-west-2"
+    assert matcher.lookup("bucket-") == "us-west-2"
+    assert matcher.lookup("bucket") == ""
+
+
+def test_matcher_first_matching_pattern_wins():
+    matcher = BucketRegionMatcher(
+        {"data-.*": "us-east-1", "data-phs-.*": "us-west-2", "logs-phs-.*": "eu-1"}
+    )
+    assert matcher.lookup("data-phs-001") == "us-east-1"
+
+    matcher = BucketRegionMatcher({"data-phs-.*": "us-west-2", "data-.*": "us-east-1"})
+    assert matcher.lookup("data-phs-001") == "us-west-2"
+    assert matcher.lookup("data-other") == "us-east-1"
+
+    # a bare wildcard matches every bucket
+    assert BucketRegionMatcher({".*": "us-east-1"}).lookup("anything") == "us-east-1"
+
+
+def test_lookup_reuses_compiled_matchers():
+    regions = BucketRegions(
+        {"S3_BUCKETS": {"s3-.*": "us-east-1"}, "GS_BUCKETS": {"gs-.*": "europe"}}
+    )
+
+    assert lookup_bucket_region("s3-a", regions, "s3") == "us-east-1"
+    assert lookup_bucket_region("gs-a", regions, "gs") == "europe"
+    assert regions.matcher("s3") is regions.matcher("aws")
+    assert lookup_bucket_region("gs-a", regions, "s3") == ""
+    assert lookup_bucket_region("gs-a", None, "s3") == ""
+
+
+def test_first_fetch_is_shared_by_concurrent_lookups():
+    fence = FakeFence({"bucket": "us-east-1"}, delay=0.2)
+    cache = BucketRegionsCache("fence/data/buckets", timeout=3)
+    results = []
+
+    def lookup():
+        results.append(lookup_bucket_region("bucket", cache.get(), "s3"))
+
+    with mock.patch("indexd.utils.requests.get", fence.get):
+        threads = [threading.Thread(target=lookup) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert results == ["us-east-1"] * 5
+    assert fence.calls == [3]
+
+
+def test_stale_regions_are_served_while_refreshing():
+    fence = FakeFence({"bucket": "us-east-1"})
+    cache = BucketRegionsCache("fence/data/buckets", refresh_interval=0.1)
+
+    with mock.patch("indexd.utils.requests.get", fence.get):
+        assert cache.get()["S3_BUCKETS"] == {"bucket": "us-east-1"}
+
+        time.sleep(0.2)
+        fence.buckets = {"bucket": "us-west-2"}
+        fence.delay = 0.3
+        start = time.monotonic()
+        for _ in range(5):
+            assert cache.get()["S3_BUCKETS"] == {"bucket": "us-east-1"}
+        assert time.monotonic() - start < 0.3
+
+        cache.refresh_interval = 60
+        time.sleep(0.5)
+        assert cache.get()["S3_BUCKETS"] == {"bucket": "us-west-2"}
+
+    # one fetch to load, one background refresh
+    assert len(fence.calls) == 2
+
+
+def test_failed_refresh_keeps_known_regions():
+    fence = FakeFence({"bucket": "us-east-1"})
+    cache = BucketRegionsCache(
+        "fence/data/buckets", refresh_interval=0.1, retry_interval=10
+    )
+
+    with mock.patch("indexd.utils.requests.get", fence.get):
+        cache.get()
+        time.sleep(0.2)
+        fence.error = requests.exceptions.Timeout("fence is slow")
+        cache.get()
+        time.sleep(0.1)
+
+        for _ in range(3):
+            assert cache.get()["S3_BUCKETS"] == {"bucket": "us-east-1"}
+
+    # the failed refresh is only retried after the retry interval
+    assert len(fence.calls) == 2
+
+
+def test_failed_first_fetch_is_retried_later():
+    fence = FakeFence({}, error=requests.exceptions.ConnectionError("down"))
+    cache = BucketRegionsCache("fence/data/buckets", retry_interval=0.2)
+
+    with mock.patch("indexd.utils.requests.get", fence.get):
+        assert cache.get() == {"S3_BUCKETS": {}, "GS_BUCKETS": {}}
+        assert cache.get() == {"S3_BUCKETS": {}, "GS_BUCKETS": {}}
+        assert len(fence.calls) == 1
+
+        time.sleep(0.3)
+        fence.error = None
+        fence.buckets = {"bucket": "us-east-1"}
+        assert cache.get()["S3_BUCKETS"] == {"bucket": "us-east-1"}
+        assert len(fence.calls) == 2
@@ -2,6 +2,7 @@ import base64
 import json
 import pytest
 import uuid
+from unittest import mock
 
 from tests.util import assert_blank
 from indexd.index.blueprint import ACCEPTABLE_HASHES
@@ -409,6 +410,79 @@ def test_index_list_by_version(
     assert rec["records"][0]["version"] == data["version"]
 
 
+def test_index_list_by_one_of_several_hashes(
+    client, user, combined_default_and_single_table_settings
+):
+    data = get_doc()
+    data["hashes"] = {
+        "md5": "8b9942cf415384b27cadf1f4d2d682e5",  # pragma: allowlist secret
+        "sha1": "fdbbca63fbec1c2b0d4eb2494ce91520ec9f55f5",  # pragma: allowlist secret
+    }
+    res = client.post("/index/", json=data, headers=user)
+    assert res.status_code == 200
+    did = res.json["did"]
+
+    # records match on the hashes asked for, whatever other hashes they have
+    res = client.get("/index/?hash=md5:8b9942cf415384b27cadf1f4d2d682e5")
+    assert res.status_code == 200
+    assert [rec["did"] for rec in res.json["records"]] == [did]
+
+    res = client.get(
+        "/index/?hash=md5:8b9942cf415384b27cadf1f4d2d682e5"
+        "&hash=sha1:fdbbca63fbec1c2b0d4eb2494ce91520ec9f55f5"
+    )
+    assert [rec["did"] for rec in res.json["records"]] == [did]
+
+    res = client.get(
+        "/index/?hash=md5:8b9942cf415384b27cadf1f4d2d682e5"
+        "&hash=sha1:0000000000000000000000000000000000000000"
+    )
+    assert res.json["records"] == []
+
+
+def test_index_list_by_metadata(
+    client, user, combined_default_and_single_table_settings
+):
+    data = get_doc()
+    data["metadata"] = {"project_id": "bpa-UChicago", "state": "validated"}
+    res = client.post("/index/", json=data, headers=user)
+    assert res.status_code == 200
+    did = res.json["did"]
+
+    data["metadata"] = {"project_id": "other"}
+    res = client.post("/index/", json=data, headers=user)
+    assert res.status_code == 200
+
+    res = client.get("/index/?metadata=project_id:bpa-UChicago")
+    assert res.status_code == 200
+    assert [rec["did"] for rec in res.json["records"]] == [did]
+
+    res = client.get("/index/?metadata=project_id:bpa-UChicago&metadata=state:new")
+    assert res.status_code == 200
+    assert res.json["records"] == []
+
+
+def test_index_list_by_structured_metadata(
+    client, user, combined_default_and_single_table_settings
+):
+    from indexd import default_settings
+
+    if not default_settings.settings["use_single_table"]:
+        pytest.skip("the multi-table driver stores metadata values as strings")
+
+    data = get_doc()
+    data["metadata"] = {"info": {"a": 1}, "tags": ["x", "y"], "count": 3}
+    res = client.post("/index/", json=data, headers=user)
+    assert res.status_code == 200
+    did = res.json["did"]
+
+    # objects and arrays match their text form, scalars their JSON value
+    for metadata in ('info:{"a": 1}', 'tags:["x", "y"]', "count:3"):
+        res = client.get("/index/", query_string={"metadata": metadata})
+        assert res.status_code == 200
+        assert [rec["did"] for rec in res.json["records"]] == [did], metadata
+
+
 def test_index_list_with_params_negate(
     client, user, combined_default_and_single_table_settings
 ):
@@ -1661,6 +1735,87 @@ def test_index_list_with_page(client, user, combined_default_and_single_table_se
     assert rec3["did"] in dids
 
 
+def test_index_list_with_cursor(
+    client, user, combined_default_and_single_table_settings
+):
+    """
+    Test walking the whole index in updated order with continuation tokens
+    """
+    dids = []
+    for _ in range(7):
+        res = client.post("/index/", json=get_doc(), headers=user)
+        assert res.status_code == 200
+        dids.append(res.json["did"])
+
+    res = client.get("/index/?page=0&limit=3")
+    assert res.status_code == 200
+    seen = [record["did"] for record in res.json["records"]]
+    cursor = res.json["next_cursor"]
+    assert cursor
+
+    while cursor:
+        res = client.get("/index/?limit=3&cursor=" + cursor)
+        assert res.status_code == 200
+        seen += [record["did"] for record in res.json["records"]]
+        cursor = res.json["next_cursor"]
+
+    # every record exactly once
+    assert len(seen) == len(set(seen))
+    assert sorted(seen) == sorted(dids)
+
+
+def test_index_list_with_invalid_cursor(
+    client, user, combined_default_and_single_table_settings
+):
+    res = client.get("/index/?cursor=not-a-cursor")
+    assert res.status_code == 400
+
+    res = client.get("/index/?page=1&cursor=not-a-cursor")
+    assert res.status_code == 400
+
+
+def test_index_export(client, user, combined_default_and_single_table_settings):
+    """
+    Test streaming every record as newline-delimited JSON
+    """
+    dids = []
+    for _ in range(5):
+        res = client.post("/index/", json=get_doc(), headers=user)
+        assert res.status_code == 200
+        dids.append(res.json["did"])
+
+    res = client.get("/index/export")
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+
+    records = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert sorted(record["did"] for record in records) == sorted(dids)
+    for record in records:
+        assert record["urls"] == ["s3://endpointurl/bucket/key"]
+        assert record["hashes"] == {"md5": "8b9942cf415384b27cadf1f4d2d682e5"}
+        assert record["metadata"] == {"project_id": "bpa-UChicago"}
+
+
+def test_index_export_with_filters(
+    client, user, combined_default_and_single_table_settings
+):
+    data = get_doc()
+    data["size"] = 456
+    res = client.post("/index/", json=data, headers=user)
+    assert res.status_code == 200
+    did = res.json["did"]
+    res = client.post("/index/", json=get_doc(), headers=user)
+    assert res.status_code == 200
+
+    res = client.get("/index/export?format=ndjson&size=456")
+    assert res.status_code == 200
+    lines = res.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["did"] for line in lines] == [did]
+
+    res = client.get("/index/export?format=csv")
+    assert res.status_code == 400
+
+
 def test_unauthorized_create(client, combined_default_and_single_table_settings):
     # test that unauthorized post throws 403 error
     data = get_doc()
@@ -2705,6 +2860,96 @@ def test_bulk_get_documents(user, combined_default_and_single_table_settings):
         assert doc["did"] in dids
 
 
+def test_bulk_create_records(user, combined_default_and_single_table_settings):
+    """
+    Ensure POST /index/bulk creates every valid record and reports the
+    rejected ones in request order
+    """
+    client = combined_default_and_single_table_settings.test_client()
+
+    existing = client.post("/index/", json=get_doc(), headers=user).json["did"]
+    new_did = str(uuid.uuid4())
+
+    docs = [get_doc(has_urls_metadata=True) for _ in range(10)]
+    docs[0]["did"] = new_did
+    docs.append(dict(get_doc(), did=new_did))
+    docs.append(dict(get_doc(), did=existing))
+    docs.append({"form": "object"})
+    docs.append(dict(get_doc(), urls_metadata={"s3://not/a/url": {"a": "b"}}))
+
+    res = client.post("/index/bulk", json=docs, headers=user)
+    assert res.status_code == 200
+    results = res.json["records"]
+    assert len(results) == len(docs)
+
+    created = results[:10]
+    assert created[0]["did"] == new_did
+    for result in created:
+        assert "error" not in result
+        rec = client.get("/index/" + result["did"]).json
+        assert rec["rev"] == result["rev"]
+        assert rec["baseid"] == result["baseid"]
+        assert rec["urls_metadata"] == docs[1]["urls_metadata"]
+        assert rec["hashes"] == docs[1]["hashes"]
+        assert rec["metadata"] == docs[1]["metadata"]
+
+    for result in results[10:]:
+        assert "error" in result
+    assert results[10]["did"] == new_did
+    assert results[11]["did"] == existing
+
+    stats = client.get("/_stats/").json
+    assert stats["fileCount"] == 11
+
+
+def test_bulk_create_records_reports_records_created_concurrently(
+    user, combined_default_and_single_table_settings
+):
+    """
+    Ensure a record created by another request between the existence check
+    of POST /index/bulk and its insert is reported as already existing,
+    and the rest of the batch is still created
+    """
+    app = combined_default_and_single_table_settings
+    client = app.test_client()
+    driver = app.config["INDEX"]["driver"]
+
+    existing = client.post("/index/", json=get_doc(), headers=user).json["did"]
+    docs = [dict(get_doc(), did=existing), get_doc()]
+
+    name = "_existing_guids" if hasattr(driver, "_existing_guids") else "_existing_dids"
+    check = getattr(driver, name)
+    calls = []
+
+    def racing_check(session, dids):
+        # the first check misses the record, as if it was created just after
+        calls.append(dids)
+        return check(session, dids) if len(calls) > 1 else set()
+
+    with mock.patch.object(driver, name, racing_check):
+        res = client.post("/index/bulk", json=docs, headers=user)
+    assert res.status_code == 200
+    assert len(calls) == 2
+    results = res.json["records"]
+    assert results[0]["did"] == existing
+    assert "already exists" in results[0]["error"]
+    assert "error" not in results[1]
+    rec = client.get("/index/" + results[1]["did"]).json
+    assert rec["rev"] == results[1]["rev"]
+
+    stats = client.get("/_stats/").json
+    assert stats["fileCount"] == 2
+
+
+def test_bulk_create_records_requires_list(
+    user, combined_default_and_single_table_settings
+):
+    client = combined_default_and_single_table_settings.test_client()
+
+    res = client.post("/index/bulk", json=get_doc(), headers=user)
+    assert res.status_code == 400
+
+
 @pytest.mark.parametrize("authz", [["/some/path"], []])
 def test_indexd_admin_authz(
     client, mock_arborist_requests, authz, combined_default_and_single_table_settings
@@ -0,0 +1,252 @@
+"""
+Tests for resolving ids through the distributed id services.
+"""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+import requests
+
+from indexd.blueprint import blueprint as cross_blueprint, dist_get_record
+from indexd.dist import CircuitBreaker, DistResolver, PooledIndexClient
+from indexd.errors import ServiceUnavailable
+from indexd.index.errors import NoRecordFound
+
+
+class FakeDocument(object):
+    def __init__(self, json):
+        self.json = json
+
+    def to_json(self):
+        return dict(self.json)
+
+
+class FakeClient(object):
+    """
+    Stands in for an IndexClient, answering from `records` after `delay`
+    seconds or raising `error`.
+    """
+
+    def __init__(self, records=None, delay=0, error=None):
+        self.records = records or {}
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def global_get(self, did, no_dist=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        if did not in self.records:
+            return None
+        return FakeDocument(self.records[did])
+
+
+def make_resolver(clients, hints=None, **kwargs):
+    hints = hints or {}
+    resolver = DistResolver(
+        [
+            {"name": name, "host": name, "hints": hints.get(name, []), "type": "indexd"}
+            for name in clients
+        ],
+        **kwargs,
+    )
+    for peer in resolver.peers:
+        peer.client = clients[peer.name]
+    return resolver
+
+
+def test_first_success_wins():
+    slow = FakeClient({"abc": {"did": "abc", "size": 1}}, delay=1)
+    fast = FakeClient({"abc": {"did": "abc", "size": 2}})
+    resolver = make_resolver({"slow": slow, "fast": fast})
+
+    start = time.monotonic()
+    ret = resolver.get("abc")
+
+    assert time.monotonic() - start < 1
+    assert ret["size"] == 2
+    assert ret["from_index_service"] == {"host": "fast", "name": "fast"}
+
+
+def test_hinted_peers_are_queried_first():
+    hinted = FakeClient({"dg.1234/abc": {"did": "dg.1234/abc"}})
+    other = FakeClient({"dg.1234/abc": {"did": "dg.1234/abc"}})
+    resolver = make_resolver(
+        {"hinted": hinted, "other": other}, hints={"hinted": [".*dg\\.1234.*"]}
+    )
+
+    assert resolver.get("dg.1234/abc")["from_index_service"]["name"] == "hinted"
+    assert other.calls == 0
+
+    # peers without a matching hint are still tried when no hinted peer has it
+    assert resolver.get("dg.1234/missing") is None
+    assert hinted.calls == 2
+    assert other.calls == 1
+
+
+def test_slow_peer_is_abandoned_at_its_deadline():
+    slow = FakeClient({"abc": {"did": "abc"}}, delay=2)
+    resolver = make_resolver({"slow": slow}, timeout=0.2)
+
+    start = time.monotonic()
+    assert resolver.get("abc") is None
+    assert time.monotonic() - start < 1
+
+
+def test_lookups_beyond_the_in_flight_cap_wait_for_a_slot():
+    client = FakeClient({str(i): {"did": str(i)} for i in range(6)}, delay=0.1)
+    resolver = make_resolver({"peer": client}, timeout=2, max_in_flight=2)
+
+    results = {}
+
+    def lookup(did):
+        results[did] = resolver.get(did)
+
+    threads = [threading.Thread(target=lookup, args=(str(i),)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {did: doc["did"] for did, doc in results.items()} == {
+        str(i): str(i) for i in range(6)
+    }
+    assert client.calls == 6
+
+
+def test_peer_still_busy_at_its_deadline_is_unavailable():
+    slow = FakeClient({"abc": {"did": "abc"}}, delay=0.5)
+    resolver = make_resolver({"slow": slow}, timeout=0.1, max_in_flight=1)
+
+    assert resolver.get("abc") is None
+    # the abandoned request still holds the peer's only slot
+    with pytest.raises(ServiceUnavailable):
+        resolver.get("def")
+    assert slow.calls == 1
+
+    time.sleep(0.6)
+    assert resolver.get("abc")["did"] == "abc"
+
+
+def test_busy_peer_does_not_hide_a_record_found_elsewhere():
+    busy = FakeClient({"abc": {"did": "abc"}}, delay=0.5)
+    other = FakeClient({"def": {"did": "def"}})
+    resolver = make_resolver(
+        {"busy": busy, "other": other}, timeout=0.1, max_in_flight=1
+    )
+
+    assert resolver.get("abc") is None
+    assert resolver.get("def")["from_index_service"]["name"] == "other"
+
+
+def test_indexd_peers_get_a_pooled_session_with_their_timeout():
+    resolver = DistResolver(
+        [{"name": "peer", "host": "https://peer.example", "timeout": 3}]
+    )
+    client = resolver.peers[0].client
+    assert isinstance(client, PooledIndexClient)
+
+    response = mock.MagicMock(status_code=404)
+    response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    with mock.patch.object(client.session, "get", return_value=response) as get:
+        assert resolver.get("abc") is None
+    get.assert_called_once_with(
+        "https://peer.example/abc", params={"no_dist": ""}, timeout=3
+    )
+
+
+def test_results_are_cached_per_peer():
+    client = FakeClient({"abc": {"did": "abc"}})
+    resolver = make_resolver({"peer": client})
+
+    assert resolver.get("abc")["did"] == "abc"
+    assert resolver.get("missing") is None
+    assert client.calls == 2
+
+    assert resolver.get("abc")["did"] == "abc"
+    assert resolver.get("missing") is None
+    assert client.calls == 2
+
+
+def test_errors_are_not_cached():
+    client = FakeClient(error=ValueError("boom"))
+    resolver = make_resolver({"peer": client})
+
+    assert resolver.get("abc") is None
+    assert resolver.get("abc") is None
+    assert client.calls == 2
+
+
+def test_failing_peer_circuit_opens():
+    client = FakeClient(error=ValueError("boom"))
+    resolver = make_resolver({"peer": client}, failure_threshold=2, reset_timeout=0.5)
+    breaker = resolver.peers[0].breaker
+
+    for did in ("a", "b", "c", "d"):
+        assert resolver.get(did) is None
+    assert client.calls == 2
+    assert breaker.is_open
+
+    # after the reset timeout a trial request goes through and closes it
+    time.sleep(0.6)
+    client.error = None
+    client.records = {"e": {"did": "e"}}
+    assert resolver.get("e")["did"] == "e"
+    assert not breaker.is_open
+
+
+def test_circuit_breaker_lets_one_trial_request_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.2)
+    allowed = []
+    threads = [
+        threading.Thread(target=lambda: allowed.append(breaker.allow()))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert allowed.count(True) == 1
+
+
+def test_get_record_falls_back_to_dist(
+    client, combined_default_and_single_table_settings
+):
+    peer_client = FakeClient({"dg.4503/abc": {"did": "dg.4503/abc"}})
+    resolver = make_resolver({"testStage": peer_client})
+    original, cross_blueprint.dist_resolver = cross_blueprint.dist_resolver, resolver
+    try:
+        res = client.get("/dg.4503/abc")
+        assert res.status_code == 200
+        assert res.json["from_index_service"]["name"] == "testStage"
+
+        assert client.get("/dg.4503/missing").status_code == 404
+        assert client.get("/dg.4503/abc?no_dist").status_code == 404
+
+        peer_client.delay = 0.5
+        resolver.peers[0].timeout = 0.1
+        resolver.peers[0].in_flight = threading.BoundedSemaphore(1)
+        assert client.get("/dg.4503/slow").status_code == 404
+        # the abandoned request still holds the peer's only slot
+        assert client.get("/dg.4503/busy").status_code == 503
+    finally:
+        cross_blueprint.dist_resolver = original
+
+
+def test_dist_get_record_raises_when_not_found():
+    original = cross_blueprint.dist_resolver
+    cross_blueprint.dist_resolver = make_resolver({})
+    try:
+        with pytest.raises(NoRecordFound):
+            dist_get_record("abc")
+    finally:
+        cross_blueprint.dist_resolver = original
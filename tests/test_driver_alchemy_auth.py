@@ -9,7 +9,6 @@ from indexd.errors import AuthError
 
 from indexd.auth.drivers.alchemy import SQLAlchemyAuthDriver
 
-
 USERNAME = "abc"
 PASSWORD = "123"
 DIGESTED = SQLAlchemyAuthDriver.digest(PASSWORD)
@@ -87,3 +86,70 @@ def test_driver_auth_returns_user_context():
     user = driver.auth(USERNAME, PASSWORD)
 
     assert user is not None, "user context was None"
+
+
+def _insert_user():
+    engine = create_engine(POSTGRES_CONNECTION)
+    with engine.connect() as conn:
+        conn.execute(
+            "INSERT INTO auth_record VALUES ('{}', '{}')".format(USERNAME, DIGESTED)
+        )
+
+
+def test_driver_auth_is_one_query(record_statements):
+    """
+    Tests basic auth checks the credentials in a single query.
+    """
+    driver = SQLAlchemyAuthDriver(POSTGRES_CONNECTION)
+    _insert_user()
+
+    for _ in range(2):
+        with record_statements(driver.engine) as statements:
+            driver.auth(USERNAME, PASSWORD)
+        assert len(statements) == 1
+
+    # once a user was seen, a mismatch doesn't look for other users
+    with record_statements(driver.engine) as statements:
+        with pytest.raises(AuthError):
+            driver.auth(USERNAME, "invalid_" + PASSWORD)
+    assert len(statements) == 1
+
+
+def test_driver_auth_caches_verified_credentials(record_statements):
+    """
+    Tests verified credentials are served from the credential cache.
+    """
+    driver = SQLAlchemyAuthDriver(POSTGRES_CONNECTION, credential_cache_size=10)
+    _insert_user()
+
+    with record_statements(driver.engine) as first_statements:
+        driver.auth(USERNAME, PASSWORD)
+    with record_statements(driver.engine) as second_statements:
+        driver.auth(USERNAME, PASSWORD)
+    assert len(first_statements) == 1
+    assert not second_statements
+
+    # rejected credentials are not cached
+    for _ in range(2):
+        with pytest.raises(AuthError):
+            driver.auth(USERNAME, "invalid_" + PASSWORD)
+    # the username and password can't be shifted into each other
+    with pytest.raises(AuthError):
+        driver.auth(USERNAME + PASSWORD[0], PASSWORD[1:])
+
+
+def test_driver_delete_invalidates_credential_cache():
+    """
+    Tests deleting a user drops its cached credentials.
+    """
+    driver = SQLAlchemyAuthDriver(POSTGRES_CONNECTION, credential_cache_size=10)
+    driver.add(USERNAME, PASSWORD)
+    driver.auth(USERNAME, PASSWORD)
+
+    driver.delete(USERNAME)
+
+    with pytest.raises(AuthError, match="No username / password configured"):
+        driver.auth(USERNAME, PASSWORD)
+
+    driver.add(USERNAME, PASSWORD)
+    driver.auth(USERNAME, PASSWORD)
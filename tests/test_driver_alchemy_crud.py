@@ -1157,3 +1157,83 @@ def test_driver_get_bundle():
         assert (
             record["updated_time"] == updated_time.isoformat()
         ), "created date does not match"
+
+
+def test_driver_get_bulk_query_count_is_constant(record_statements):
+    """
+    Tests that get_bulk loads child tables in a fixed number of queries,
+    regardless of how many records are requested.
+    """
+    driver = SQLAlchemyIndexDriver(POSTGRES_CONNECTION)
+
+    dids = []
+    for i in range(20):
+        url = "s3://bucket/key_{}".format(i)
+        did, _, _ = driver.add(
+            "object",
+            size=i,
+            urls=[url, "gs://bucket/key_{}".format(i)],
+            urls_metadata={url: {"state": "uploaded"}},
+            acl=["a", "b"],
+            authz=["/programs/a"],
+            hashes={"md5": "{:032x}".format(i)},
+            metadata={"key": "value"},
+        )
+        dids.append(did)
+
+    with record_statements(driver.engine) as small_statements:
+        small_docs = driver.get_bulk(dids[:2])
+    with record_statements(driver.engine) as statements:
+        docs = driver.get_bulk(dids)
+
+    assert len(small_docs) == 2
+    assert len(docs) == 20
+    # one select for index_record and one per child table
+    assert len(statements) == len(small_statements)
+    assert len(statements) <= 7
+
+    for doc in docs:
+        assert doc == driver.get(doc["did"])
+
+
+def test_driver_core_read_path_matches_orm_documents():
+    """
+    Tests that documents built from plain rows by get, get_bulk and ids are
+    the ones the ORM objects serialize to.
+    """
+    driver = SQLAlchemyIndexDriver(POSTGRES_CONNECTION)
+
+    dids = []
+    for i in range(5):
+        url = "s3://bucket/key_{}".format(i)
+        did, _, _ = driver.add(
+            "object",
+            size=i,
+            file_name="file_{}".format(i),
+            version=str(i) if i % 2 else None,
+            urls=[url, "gs://bucket/key_{}".format(i)] if i else [],
+            urls_metadata={url: {"state": "uploaded", "type": "cold"}} if i else {},
+            acl=["a", "b"],
+            authz=["/programs/a"] if i % 2 else [],
+            hashes={"md5": "{:032x}".format(i), "sha1": "{:040x}".format(i)},
+            metadata={"key": "value", "i": str(i)},
+            description="description {}".format(i) if i % 2 else None,
+            content_created_date="2020-01-01T00:00:00" if i % 2 else None,
+            content_updated_date="2021-01-01T00:00:00" if i % 2 else None,
+        )
+        dids.append(did)
+
+    def normalized(doc):
+        return {k: sorted(v) if isinstance(v, list) else v for k, v in doc.items()}
+
+    with driver.session as session:
+        expected = {
+            record.did: normalized(record.to_document_dict())
+            for record in session.query(IndexRecord)
+        }
+
+    assert {doc["did"]: normalized(doc) for doc in driver.ids()} == expected
+    assert {doc["did"]: normalized(doc) for doc in driver.get_bulk(dids)} == expected
+    for did in dids:
+        assert normalized(driver.get(did)) == expected[did]
+        assert normalized(driver.get_with_nonstrict_prefix(did)) == expected[did]
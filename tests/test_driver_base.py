@@ -0,0 +1,87 @@
+from sqlalchemy.pool import NullPool
+
+from indexd.alias.drivers.alchemy import SQLAlchemyAliasDriver
+from indexd.auth.drivers.alchemy import SQLAlchemyAuthDriver
+from indexd.driver_base import TimedQueuePool, engine_registry
+from indexd.index.drivers.alchemy import SQLAlchemyIndexDriver
+from tests.conftest import POSTGRES_CONNECTION
+
+
+def test_drivers_share_engine():
+    """
+    Drivers for the same database and settings share one engine and pool.
+    """
+    index_driver = SQLAlchemyIndexDriver(POSTGRES_CONNECTION)
+    alias_driver = SQLAlchemyAliasDriver(POSTGRES_CONNECTION)
+    auth_driver = SQLAlchemyAuthDriver(POSTGRES_CONNECTION)
+
+    assert index_driver.engine is alias_driver.engine
+    assert index_driver.engine is auth_driver.engine
+
+
+def test_engine_settings_are_part_of_the_key():
+    default = SQLAlchemyIndexDriver(POSTGRES_CONNECTION)
+    small = SQLAlchemyIndexDriver(POSTGRES_CONNECTION, pool_size=1, max_overflow=0)
+
+    assert default.engine is not small.engine
+    assert (
+        small.engine
+        is SQLAlchemyAliasDriver(
+            POSTGRES_CONNECTION, pool_size=1, max_overflow=0
+        ).engine
+    )
+
+
+def test_default_pool_options():
+    pool = SQLAlchemyIndexDriver(POSTGRES_CONNECTION).engine.pool
+
+    assert isinstance(pool, TimedQueuePool)
+    assert pool.size() == 5
+    assert pool._max_overflow == 10
+    assert pool._pre_ping
+    assert pool._recycle == 1800
+
+
+def test_pgbouncer_mode_does_not_pool():
+    engine = SQLAlchemyIndexDriver(POSTGRES_CONNECTION, pgbouncer=True).engine
+
+    assert isinstance(engine.pool, NullPool)
+    assert engine is not SQLAlchemyIndexDriver(POSTGRES_CONNECTION).engine
+    with engine.connect() as conn:
+        assert conn.execute("SELECT 1").scalar() == 1
+
+
+def test_pool_records_checkout_waits():
+    engine = SQLAlchemyIndexDriver(
+        POSTGRES_CONNECTION, pool_size=1, max_overflow=0
+    ).engine
+    before = engine.pool.stats.as_dict()["checkouts"]
+
+    with engine.connect() as conn:
+        conn.execute("SELECT 1")
+    with engine.connect() as conn:
+        conn.execute("SELECT 1")
+
+    stats = engine.pool.stats.as_dict()
+    assert stats["checkouts"] == before + 2
+    assert stats["timeouts"] == 0
+    assert stats["max_wait_seconds"] >= 0
+
+    urls = [pool["url"] for pool in engine_registry.stats()]
+    assert repr(engine.url) in urls
+    assert not any("postgres:postgres@" in url for url in urls)
+
+
+def test_reset_after_fork_replaces_a_held_lock():
+    """
+    A lock held by another thread of the parent when it forked doesn't
+    block the child's first engine lookup.
+    """
+    engine = SQLAlchemyIndexDriver(POSTGRES_CONNECTION).engine
+    held = engine_registry._lock
+    held.acquire()
+    try:
+        engine_registry.reset_after_fork()
+        assert SQLAlchemyIndexDriver(POSTGRES_CONNECTION).engine is engine
+    finally:
+        held.release()
@@ -1105,3 +1105,78 @@ def test_preferred_type_authz_override(
     res1_json = res_1.json
     actual_supported_types = res1_json["supported_types"]
     assert actual_supported_types == expected_supported_types
+
+
+def test_bulk_post_query_count(
+    client, user, combined_default_and_single_table_settings, record_statements
+):
+    """
+    Tests that bulk DRS resolution reads the records once instead of
+    re-fetching every object to resolve its authorizations.
+    """
+    did_list, _, _ = bulk_response_test_setup(user, client, n_200=10, n_404=2)
+
+    engine = drs_blueprint.index_driver.engine
+    with record_statements(engine) as statements:
+        res = client.post(
+            "ga4gh/drs/v1/objects", json={"bulk_object_ids": did_list}, headers=user
+        )
+        post_count = len(statements)
+        statements.clear()
+        res_options = client.options(
+            "ga4gh/drs/v1/objects", json={"bulk_object_ids": did_list}, headers=user
+        )
+        options_count = len(statements)
+
+    assert res.status_code == 200
+    assert res.json["summary"]["resolved"] == 10
+    assert res_options.status_code == 200
+    assert res_options.json["summary"]["resolved"] == 10
+    # one read for the records and at most one per child table
+    assert post_count <= 7
+    assert options_count <= 7
+
+
+def test_drs_list_query_count(
+    client, user, combined_default_and_single_table_settings, record_statements
+):
+    """
+    Tests that listing DRS objects reads each page with a fixed number of
+    queries, however many records and URLs per record it contains.
+    """
+    for i in range(10):
+        doc = get_doc(
+            urls=["s3://bucket/key", "gs://bucket/key", "https://host/key"],
+            authz=["/gen3/programs/a/projects/b"] if i % 2 else ["/open"],
+        )
+        res = client.post("/index/", json=doc, headers=user)
+        assert res.status_code == 200
+
+    def count_statements(url):
+        with record_statements(drs_blueprint.index_driver.engine) as statements:
+            res = client.get(url)
+        assert res.status_code == 200
+        return len(statements), res.json["drs_objects"]
+
+    with patch("indexd.drs.blueprint.get_bucket_regions", return_value={}):
+        small_count, small = count_statements(
+            "/ga4gh/drs/v1/objects?form=object&limit=2"
+        )
+        large_count, large = count_statements(
+            "/ga4gh/drs/v1/objects?form=object&limit=10"
+        )
+        mixed_count, _ = count_statements("/ga4gh/drs/v1/objects?limit=10")
+
+    assert len(small) == 2
+    assert len(large) == 10
+    assert small_count == large_count
+    # one read for the records and at most one per child table
+    assert large_count <= 7
+    # plus one for the bundles
+    assert mixed_count <= 8
+
+    for entry in large:
+        assert len(entry["access_methods"]) == 3
+        authorizations = [m["authorizations"] for m in entry["access_methods"]]
+        assert all(a == authorizations[0] for a in authorizations)
+        assert authorizations[0]["drs_object_id"] == entry["id"]
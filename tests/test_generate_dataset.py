@@ -0,0 +1,84 @@
+import pytest
+
+from bin.generate_dataset import DatasetSpec, copy_escape, load
+from indexd.index.drivers.alchemy import SQLAlchemyIndexDriver
+from indexd.index.drivers.single_table_alchemy import SingleTableSQLAlchemyIndexDriver
+from tests.conftest import POSTGRES_CONNECTION
+
+
+def test_copy_escape():
+    assert copy_escape(None) == "\\N"
+    assert copy_escape("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
+    assert copy_escape(['a"b', "c"]) == '{"a\\\\"b","c"}'
+    assert copy_escape({"key": "value"}) == '{"key": "value"}'
+
+
+def test_records_are_reproducible():
+    spec = DatasetSpec(seed=1)
+    assert spec.record(42) == DatasetSpec(seed=1).record(42)
+    assert spec.record(42)["did"] != DatasetSpec(seed=2).record(42)["did"]
+
+
+def test_versions_share_the_baseid_of_consecutive_records():
+    spec = DatasetSpec(versions_per_base=([3], [1]))
+    docs = [spec.record(i) for i in range(6)]
+    assert [doc["version"] for doc in docs] == ["1", "2", "3"] * 2
+    assert len({doc["baseid"] for doc in docs[:3]}) == 1
+    assert docs[3]["baseid"] != docs[0]["baseid"]
+    # the same wherever the dataset is started from
+    assert DatasetSpec(versions_per_base=([3], [1])).record(4) == docs[4]
+
+
+@pytest.mark.parametrize(
+    "driver_class,workers",
+    [
+        (SQLAlchemyIndexDriver, 1),
+        (SQLAlchemyIndexDriver, 2),
+        (SingleTableSQLAlchemyIndexDriver, 1),
+        (SingleTableSQLAlchemyIndexDriver, 2),
+    ],
+)
+def test_load(driver_class, workers):
+    driver = driver_class(POSTGRES_CONNECTION)
+    spec = DatasetSpec(
+        prefix="testprefix:",
+        url_metadata_fraction=1,
+        version_fraction=1,
+        alias_fraction=0.5,
+        versions_per_base=([1, 2, 3], [1, 1, 1]),
+    )
+    single_table = driver_class is SingleTableSQLAlchemyIndexDriver
+
+    assert (
+        load(
+            POSTGRES_CONNECTION,
+            spec,
+            50,
+            single_table=single_table,
+            workers=workers,
+            batch_size=20,
+        )
+        == 50
+    )
+    # grow the dataset
+    load(POSTGRES_CONNECTION, spec, 10, start=50, single_table=single_table)
+
+    docs = [spec.record(i) for i in range(60)]
+    for doc in docs:
+        record = driver.get(doc["did"])
+        assert record["rev"] == doc["rev"]
+        assert record["size"] == doc["size"]
+        assert record["version"] == doc["version"]
+        assert sorted(record["urls"]) == sorted(doc["urls"])
+        assert record["urls_metadata"] == doc["urls_metadata"]
+        assert record["hashes"] == doc["hashes"]
+        assert sorted(record["authz"]) == sorted(doc["authz"])
+        assert record["acl"] == doc["acl"]
+        assert record["baseid"] == doc["baseid"]
+        versions = [d["did"] for d in docs if d["baseid"] == doc["baseid"]]
+        assert [v["did"] for v in driver.get_all_versions(doc["did"]).values()] == (
+            versions
+        )
+
+    assert driver.len() == 60
+    assert driver.get_stats() == (60, sum(doc["size"] for doc in docs))
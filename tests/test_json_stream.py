@@ -0,0 +1,102 @@
+"""
+Tests for the incremental JSON encoding of list responses.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from indexd import json_stream
+from indexd.errors import UserError
+from indexd.json_stream import iterencode
+
+
+@pytest.fixture(params=["default", "stdlib"])
+def backend(request):
+    if request.param == "stdlib":
+        with patch.object(json_stream, "orjson", None):
+            yield request.param
+    else:
+        yield request.param
+
+
+def decode(chunks):
+    return json.loads(b"".join(chunks))
+
+
+def test_iterencode_matches_json(backend):
+    obj = {
+        "records": [{"did": str(i), "urls": ["s3://b/ü"], "size": i} for i in range(3)],
+        "ids": None,
+        "limit": 3,
+        "hashes": {"md5": "a" * 32},
+        "empty": [],
+    }
+    assert decode(iterencode(obj)) == obj
+    assert decode(iterencode(obj["records"])) == obj["records"]
+    assert decode(iterencode("scalar")) == "scalar"
+
+
+def test_iterencode_is_compact(backend):
+    encoded = b"".join(iterencode({"a": [1, {"b": 2}], "c": None}))
+    assert encoded == b'{"a":[1,{"b":2}],"c":null}'
+
+
+def test_iterencode_consumes_generators_lazily(backend):
+    produced = []
+
+    def records():
+        for i in range(100):
+            produced.append(i)
+            yield {"did": str(i), "file_name": "x" * 100}
+
+    chunks = iterencode({"drs_objects": records()}, chunk_size=1024)
+    first = next(chunks)
+
+    assert len(first) >= 1024
+    assert len(produced) < 100
+    assert decode([first, *chunks])["drs_objects"][99]["did"] == "99"
+
+
+def test_index_list_is_streamed(
+    client, user, combined_default_and_single_table_settings
+):
+    for i in range(3):
+        data = {
+            "form": "object",
+            "size": 123,
+            "urls": ["s3://endpointurl/bucket/key_{}".format(i)],
+            "hashes": {"md5": "8b9942cf415384b27cadf1f4d2d682e5"},
+        }
+        assert client.post("/index/", json=data, headers=user).status_code == 200
+
+    res = client.get("/index/")
+    assert res.status_code == 200
+    assert res.is_streamed
+    assert res.mimetype == "application/json"
+    assert len(res.json["records"]) == 3
+    assert b", " not in res.data
+
+    res = client.get("/ga4gh/drs/v1/objects?form=object")
+    assert res.status_code == 200
+    assert res.is_streamed
+    assert len(res.json["drs_objects"]) == 3
+
+
+def test_drs_list_conversion_error_is_not_streamed(
+    client, user, combined_default_and_single_table_settings
+):
+    data = {
+        "form": "object",
+        "size": 123,
+        "urls": ["s3://endpointurl/bucket/key"],
+        "hashes": {"md5": "8b9942cf415384b27cadf1f4d2d682e5"},
+    }
+    assert client.post("/index/", json=data, headers=user).status_code == 200
+
+    with patch(
+        "indexd.drs.blueprint.indexd_to_drs", side_effect=UserError("bad record")
+    ):
+        res = client.get("/ga4gh/drs/v1/objects?form=object")
+    assert res.status_code == 400
@@ -0,0 +1,126 @@
+"""
+Tests for the Prometheus metrics served at /metrics.
+"""
+
+import importlib
+
+import pytest
+
+from indexd import get_app
+from indexd.index.record_cache import LRUCache, RecordCache
+
+prometheus_client = pytest.importorskip("prometheus_client")
+
+
+@pytest.fixture
+def metrics_client():
+    from indexd import default_settings
+    from tests import default_test_settings
+
+    importlib.reload(default_settings)
+    settings = {**default_settings.settings, **default_test_settings.settings}
+    settings["config"] = {**settings["config"], "ENABLE_PROMETHEUS_METRICS": True}
+    with get_app(settings).test_client() as client:
+        yield client
+
+
+def sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_disabled_by_default(app):
+    assert "metrics" not in app.view_functions
+
+
+def test_request_latency_and_sql_metrics(metrics_client):
+    labels = {"blueprint": "index", "route": "/index/"}
+    requests = sample(
+        "indexd_request_duration_seconds_count", method="GET", status="200", **labels
+    )
+    statements = sample("indexd_request_sql_statements_sum", **labels)
+
+    res = metrics_client.get("/index/")
+    assert res.status_code == 200
+    # observed once the body is sent
+    res.close()
+
+    assert (
+        sample(
+            "indexd_request_duration_seconds_count",
+            method="GET",
+            status="200",
+            **labels,
+        )
+        == requests + 1
+    )
+    assert sample("indexd_request_sql_statements_sum", **labels) > statements
+
+    res = metrics_client.get("/metrics")
+    assert res.status_code == 200
+    assert b'indexd_request_duration_seconds_bucket{blueprint="index"' in res.data
+
+
+def test_streamed_request_latency_includes_the_body(metrics_client, user):
+    labels = {"blueprint": "index", "route": "/index/export", "method": "GET"}
+    requests = sample("indexd_request_duration_seconds_count", status="200", **labels)
+
+    res = metrics_client.get("/index/export", headers=user)
+    assert res.status_code == 200
+    assert (
+        sample("indexd_request_duration_seconds_count", status="200", **labels)
+        == requests
+    )
+
+    res.get_data()
+    res.close()
+    assert (
+        sample("indexd_request_duration_seconds_count", status="200", **labels)
+        == requests + 1
+    )
+
+
+def test_cache_lookups_are_counted(metrics_client):
+    cache = RecordCache(LRUCache())
+    hits = sample("indexd_cache_lookups_total", cache="record", result="hit")
+    misses = sample("indexd_cache_lookups_total", cache="record", result="miss")
+
+    cache.get("abc")
+    cache.set("abc", {"did": "abc"})
+    cache.get("abc")
+
+    assert (
+        sample("indexd_cache_lookups_total", cache="record", result="hit") == hits + 1
+    )
+    assert (
+        sample("indexd_cache_lookups_total", cache="record", result="miss")
+        == misses + 1
+    )
+
+
+def test_bulk_outcomes_are_counted(metrics_client, user):
+    data = {
+        "form": "object",
+        "size": 123,
+        "urls": ["s3://endpointurl/bucket/key"],
+        "hashes": {"md5": "8b9942cf415384b27cadf1f4d2d682e5"},
+    }
+    res = metrics_client.post("/index/", json=data, headers=user)
+    assert res.status_code == 200
+    did = res.json["did"]
+
+    found = sample("indexd_records_total", endpoint="bulk_documents", outcome="found")
+    not_found = sample(
+        "indexd_records_total", endpoint="bulk_documents", outcome="not_found"
+    )
+
+    res = metrics_client.post("/bulk/documents", json=[did, "missing"], headers=user)
+    assert res.status_code == 200
+
+    assert (
+        sample("indexd_records_total", endpoint="bulk_documents", outcome="found")
+        == found + 1
+    )
+    assert (
+        sample("indexd_records_total", endpoint="bulk_documents", outcome="not_found")
+        == not_found + 1
+    )
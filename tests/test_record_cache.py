@@ -0,0 +1,286 @@
+"""
+Tests for the read-through record cache used by the index drivers.
+"""
+
+import time
+import uuid
+
+import pytest
+
+from indexd.index.errors import NoRecordFound
+from indexd.index.record_cache import LRUCache, MissCache, RecordCache
+
+
+def get_doc():
+    return {
+        "form": "object",
+        "size": 123,
+        "urls": ["s3://endpointurl/bucket/key"],
+        "hashes": {
+            "md5": "8b9942cf415384b27cadf1f4d2d682e5"  # pragma: allowlist secret
+        },
+        "metadata": {"project_id": "bpa-UChicago"},
+    }
+
+
+@pytest.fixture
+def cached_app(combined_default_and_single_table_settings):
+    """
+    App whose index driver has in-process record and negative caches enabled
+    """
+    app = combined_default_and_single_table_settings
+    driver = app.config["INDEX"]["driver"]
+    driver.record_cache = RecordCache.from_config({"RECORD_CACHE_SIZE": 100})
+    driver.miss_cache = MissCache.from_config({"NEGATIVE_CACHE_SIZE": 100})
+    yield app
+    driver.record_cache = None
+    driver.miss_cache = None
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(threshold=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(threshold=10, default_timeout=1)
+    cache.set("a", 1)
+    cache.set("b", 2, timeout=0)
+    time.sleep(1.1)
+
+    assert cache.get("a") is None
+    # a timeout of 0 never expires
+    assert cache.get("b") == 2
+
+
+def test_lru_cache_returns_copies():
+    cache = LRUCache()
+    doc = {"urls": ["s3://bucket/key"]}
+    cache.set("a", doc)
+    doc["urls"].append("s3://other")
+    cache.get("a")["urls"].append("s3://another")
+
+    assert cache.get("a") == {"urls": ["s3://bucket/key"]}
+
+
+def test_record_cache_disabled_by_default():
+    assert RecordCache.from_config({}) is None
+    assert RecordCache.from_config({"RECORD_CACHE_SIZE": 0}) is None
+    assert RecordCache.from_config({"RECORD_CACHE_BACKEND": LRUCache()}) is not None
+    assert MissCache.from_config({}) is None
+    assert MissCache.from_config({"NEGATIVE_CACHE_SIZE": 10}) is not None
+
+
+def test_get_is_served_from_cache(cached_app, user, record_statements):
+    client = cached_app.test_client()
+    driver = cached_app.config["INDEX"]["driver"]
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+
+    with record_statements(driver.engine) as first_statements:
+        first = driver.get(rec["did"])
+    with record_statements(driver.engine) as second_statements:
+        second = driver.get(rec["did"])
+
+    assert first == second
+    assert first_statements
+    assert not second_statements
+    assert driver.record_cache.stats() == {"hits": 1, "misses": 1}
+
+    # the cached record is served through every single record endpoint
+    assert client.get("/index/" + rec["did"]).json["rev"] == rec["rev"]
+    assert client.get("/" + rec["did"]).json["rev"] == rec["rev"]
+    assert client.get("/ga4gh/drs/v1/objects/" + rec["did"]).status_code == 200
+    assert driver.record_cache.stats()["hits"] >= 4
+
+
+def test_update_invalidates_cache(cached_app, user):
+    client = cached_app.test_client()
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    assert client.get("/index/" + rec["did"]).json["version"] is None
+
+    res = client.put(
+        "/index/{}?rev={}".format(rec["did"], rec["rev"]),
+        json={"version": "ver123"},
+        headers=user,
+    )
+    assert res.status_code == 200
+
+    updated = client.get("/index/" + rec["did"]).json
+    assert updated["version"] == "ver123"
+    assert updated["rev"] == res.json["rev"]
+
+
+def test_delete_invalidates_cache(cached_app, user):
+    client = cached_app.test_client()
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    assert client.get("/index/" + rec["did"]).status_code == 200
+
+    res = client.delete("/index/{}?rev={}".format(rec["did"], rec["rev"]), headers=user)
+    assert res.status_code == 200
+
+    assert client.get("/index/" + rec["did"]).status_code == 404
+
+
+def test_new_version_invalidates_baseid(cached_app, user):
+    client = cached_app.test_client()
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    assert client.get("/index/" + rec["baseid"]).json["did"] == rec["did"]
+
+    res = client.post("/index/" + rec["did"], json=get_doc(), headers=user)
+    assert res.status_code == 200
+
+    assert client.get("/index/" + rec["baseid"]).json["did"] == res.json["did"]
+
+
+def test_update_all_versions_invalidates_cache(cached_app, user):
+    client = cached_app.test_client()
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    new = client.post("/index/" + rec["did"], json=get_doc(), headers=user).json
+    for did in (rec["did"], new["did"]):
+        assert client.get("/index/" + did).json["acl"] == []
+
+    res = client.put(
+        "/index/{}/versions".format(rec["did"]), json={"acl": ["a"]}, headers=user
+    )
+    assert res.status_code == 200
+
+    for did in (rec["did"], new["did"]):
+        assert client.get("/index/" + did).json["acl"] == ["a"]
+
+
+def test_nonstrict_prefix_resolves_both_forms(cached_app, user):
+    client = cached_app.test_client()
+    driver = cached_app.config["INDEX"]["driver"]
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    assert rec["did"].startswith("testprefix/")
+    stripped = rec["did"][len("testprefix/") :]
+
+    assert driver.get_with_nonstrict_prefix(stripped)["did"] == rec["did"]
+    assert driver.get_with_nonstrict_prefix(rec["baseid"])["did"] == rec["did"]
+    with pytest.raises(NoRecordFound):
+        driver.get(stripped)
+
+    # cached under the did it resolved to, so strict lookups are unaffected
+    assert driver.get(rec["did"])["did"] == rec["did"]
+    with pytest.raises(NoRecordFound):
+        driver.get(stripped)
+
+
+def test_nonstrict_prefix_lookup_of_other_form_is_cached(
+    cached_app, user, record_statements
+):
+    client = cached_app.test_client()
+    driver = cached_app.config["INDEX"]["driver"]
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    stripped = rec["did"][len("testprefix/") :]
+
+    with record_statements(driver.engine) as first_statements:
+        first = driver.get_with_nonstrict_prefix(stripped)
+    with record_statements(driver.engine) as second_statements:
+        second = driver.get_with_nonstrict_prefix(stripped)
+    assert first == second
+    assert first_statements
+    assert not second_statements
+
+    res = client.put(
+        "/index/{}?rev={}".format(rec["did"], rec["rev"]),
+        json={"version": "ver123"},
+        headers=user,
+    )
+    assert res.status_code == 200
+    assert driver.get_with_nonstrict_prefix(stripped)["version"] == "ver123"
+
+
+def test_nonstrict_prefix_prefers_bundle_of_the_id_as_given(cached_app, user):
+    client = cached_app.test_client()
+    driver = cached_app.config["INDEX"]["driver"]
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    stripped = rec["did"][len("testprefix/") :]
+    driver.add_bundle(bundle_id=stripped, bundle_data="[]")
+
+    # as when each form was looked up in turn, a bundle matching the id as
+    # given comes before a record matching the other form
+    assert driver.get_with_nonstrict_prefix(stripped)["id"] == stripped
+    assert driver.get_with_nonstrict_prefix(rec["did"])["did"] == rec["did"]
+
+
+def test_unknown_id_is_resolved_in_one_round_and_then_cached(
+    cached_app, record_statements
+):
+    driver = cached_app.config["INDEX"]["driver"]
+    unknown = str(uuid.uuid4())
+
+    def count_statements(lookup):
+        with record_statements(driver.engine) as statements:
+            with pytest.raises(NoRecordFound):
+                lookup(unknown)
+        return len(statements)
+
+    # one query for records of both prefix forms, one for bundles
+    assert count_statements(driver.get_with_nonstrict_prefix) == 2
+    assert count_statements(driver.get_with_nonstrict_prefix) == 0
+
+    # alias misses are remembered separately
+    assert count_statements(driver.get_by_alias) == 1
+    assert count_statements(driver.get_by_alias) == 0
+
+
+def test_creating_record_forgets_miss(cached_app, user):
+    client = cached_app.test_client()
+    unknown = str(uuid.uuid4())
+
+    assert client.get("/index/" + unknown).status_code == 404
+
+    doc = get_doc()
+    doc["did"] = "testprefix/" + unknown
+    res = client.post("/index/", json=doc, headers=user)
+    assert res.status_code == 200
+
+    res = client.get("/index/" + unknown)
+    assert res.status_code == 200
+    assert res.json["did"] == "testprefix/" + unknown
+
+
+def test_creating_bundle_forgets_miss(cached_app):
+    driver = cached_app.config["INDEX"]["driver"]
+    bundle_id = str(uuid.uuid4())
+
+    with pytest.raises(NoRecordFound):
+        driver.get_with_nonstrict_prefix(bundle_id)
+
+    driver.add_bundle(bundle_id=bundle_id, bundle_data="[]")
+
+    assert driver.get_with_nonstrict_prefix(bundle_id)["id"] == bundle_id
+
+
+def test_adding_alias_forgets_miss(cached_app, user):
+    client = cached_app.test_client()
+    driver = cached_app.config["INDEX"]["driver"]
+
+    rec = client.post("/index/", json=get_doc(), headers=user).json
+    with pytest.raises(NoRecordFound):
+        driver.get_by_alias("my-alias")
+
+    res = client.post(
+        "/index/{}/aliases/".format(rec["did"]),
+        json={"aliases": [{"value": "my-alias"}]},
+        headers=user,
+    )
+    assert res.status_code == 200
+
+    assert driver.get_by_alias("my-alias")["did"] == rec["did"]
@@ -0,0 +1,84 @@
+"""
+Tests for the per-request SQL profiling mode.
+"""
+
+import importlib
+import json
+from unittest.mock import patch
+
+import pytest
+
+from indexd import get_app
+from indexd.sql_profiling import SQLStats
+
+
+def make_client(**config):
+    from indexd import default_settings
+    from tests import default_test_settings
+
+    importlib.reload(default_settings)
+    settings = {**default_settings.settings, **default_test_settings.settings}
+    settings["config"] = {
+        **settings["config"],
+        "SQL_PROFILING": {"enabled": True, **config},
+    }
+    return get_app(settings).test_client()
+
+
+@pytest.fixture
+def logger():
+    with patch("indexd.sql_profiling.logger") as logger:
+        yield logger
+
+
+def test_profiling_disabled_by_default(client):
+    res = client.get("/index/")
+    assert res.status_code == 200
+    assert "X-Indexd-Query-Count" not in res.headers
+
+
+def test_query_count_headers(logger):
+    client = make_client()
+    res = client.get("/index/")
+
+    assert res.status_code == 200
+    assert int(res.headers["X-Indexd-Query-Count"]) >= 1
+    assert float(res.headers["X-Indexd-DB-Time"]) > 0
+    # nothing took half a second
+    logger.warning.assert_not_called()
+
+
+def test_headers_can_be_turned_off(logger):
+    client = make_client(response_headers=False)
+    res = client.get("/index/")
+    assert "X-Indexd-Query-Count" not in res.headers
+
+
+def test_slow_requests_are_logged(logger):
+    client = make_client(slow_query_threshold=0, slowest_statements=2)
+    res = client.get("/index/")
+    assert res.status_code == 200
+
+    logger.warning.assert_called_once()
+    entry = json.loads(logger.warning.call_args[0][0])
+    assert entry["event"] == "slow_query"
+    assert entry["route"] == "/index/"
+    assert entry["statements"] == int(res.headers["X-Indexd-Query-Count"])
+    assert 1 <= len(entry["slowest"]) <= 2
+    assert entry["slowest"][0]["statement"].startswith("SELECT")
+
+
+def test_slow_query_log_is_sampled(logger):
+    client = make_client(slow_query_threshold=0, slow_query_sample_rate=0)
+    client.get("/index/")
+    logger.warning.assert_not_called()
+
+
+def test_sql_stats_keeps_slowest_statements():
+    stats = SQLStats(keep=2)
+    for statement, seconds in (("a", 0.1), ("b", 0.3), ("c", 0.2), ("d", 0.05)):
+        stats.record(statement, seconds)
+
+    assert stats.statements == 4
+    assert stats.seconds == pytest.approx(0.65)
+    assert stats.slowest() == [(0.3, "b"), (0.2, "c")]
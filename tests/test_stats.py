@@ -7,17 +7,24 @@ import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from unittest.mock import MagicMock
 
+import pytest
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 from indexd.index.drivers.alchemy import (
     BaseVersion,
     IndexRecord,
+    SQLAlchemyIndexDriver,
+    StatsDelta,
     StatsRecord,
+    get_stats,
     update_stats,
 )
-from indexd.index.drivers.single_table_alchemy import Record
-from indexd.stats_utils import seed_stats, seed_stats_from_connection
+from indexd.index.drivers.single_table_alchemy import (
+    Record,
+    SingleTableSQLAlchemyIndexDriver,
+)
+from indexd.stats_utils import compact_stats, seed_stats, seed_stats_from_connection
 from tests.conftest import POSTGRES_CONNECTION
 
 
@@ -78,8 +85,8 @@ def test_concurrent_stat_updates(
     combined_default_and_single_table_settings,
 ):
     """
-    Test the SELECT FOR UPDATE locking by calling update_stats()
-    concurrently from multiple threads on the same db.
+    Call update_stats() concurrently from multiple threads on the same db and
+    verify every delta is counted, before and after compaction.
     """
     engine = create_engine(POSTGRES_CONNECTION)
     Session = sessionmaker(bind=engine)
@@ -138,13 +145,19 @@ def test_concurrent_stat_updates(
 
     # Verify totals
     session = Session()
+    expected_count = baseline_count + (num_threads * increments_per_thread)
+    expected_bytes = baseline_bytes + (num_threads * increments_per_thread * 100)
+    assert get_stats(session) == (expected_count, expected_bytes)
+
+    assert compact_stats(session) == num_threads * increments_per_thread
+    session.commit()
+
     row = (
         session.query(StatsRecord)
         .filter(StatsRecord.month == now.month, StatsRecord.year == now.year)
         .first()
     )
-    expected_count = baseline_count + (num_threads * increments_per_thread)
-    expected_bytes = baseline_bytes + (num_threads * increments_per_thread * 100)
+    assert session.query(StatsDelta).count() == 0
     assert row.total_record_count == expected_count
     assert row.total_record_bytes == expected_bytes
     session.close()
@@ -156,8 +169,8 @@ def test_update_stats_carries_over_from_previous_month(
 ):
     """
     When update_stats() runs and the most recent stats row is from a previous
-    month, it should create a new row for the current month whose totals are
-    the previous row's totals + the new increment.
+    month, compaction should create a new row for the current month whose
+    totals are the previous row's totals + the new increment.
     """
     engine = create_engine(POSTGRES_CONNECTION)
     Session = sessionmaker(bind=engine)
@@ -177,6 +190,10 @@ def test_update_stats_carries_over_from_previous_month(
 
     update_stats(session, 3, 300)
     session.commit()
+    assert get_stats(session) == (13, 1300)
+
+    compact_stats(session)
+    session.commit()
 
     row = (
         session.query(StatsRecord)
@@ -191,6 +208,125 @@ def test_update_stats_carries_over_from_previous_month(
     engine.dispose()
 
 
+def test_update_stats_does_not_touch_stats_row(
+    combined_default_and_single_table_settings,
+):
+    """
+    update_stats() only appends a delta, so writers never lock the stats row.
+    """
+    engine = create_engine(POSTGRES_CONNECTION)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    now = datetime.datetime.now()
+    session.add(
+        StatsRecord(
+            total_record_count=5,
+            total_record_bytes=500,
+            month=now.month,
+            year=now.year,
+        )
+    )
+    session.commit()
+
+    # hold a lock on the stats row while another session writes
+    locker = Session()
+    locker.query(StatsRecord).with_for_update().all()
+
+    update_stats(session, 2, 200)
+    update_stats(session, 0, 0)
+    session.commit()
+    locker.rollback()
+    locker.close()
+
+    assert session.query(StatsDelta).count() == 1
+    row = session.query(StatsRecord).one()
+    assert (row.total_record_count, row.total_record_bytes) == (5, 500)
+    assert get_stats(session) == (7, 700)
+
+    session.close()
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "driver_class", [SQLAlchemyIndexDriver, SingleTableSQLAlchemyIndexDriver]
+)
+def test_get_stats_does_not_compact_pending_deltas(driver_class):
+    """
+    Reading the stats through a driver adds the pending deltas without
+    folding them into the stats table, which is left to compact_stats.
+    """
+    driver = driver_class(POSTGRES_CONNECTION)
+
+    def snapshots():
+        with driver.session as session:
+            return [
+                (row.year, row.month, row.total_record_count, row.total_record_bytes)
+                for row in session.query(StatsRecord)
+            ]
+
+    before = snapshots()
+    with driver.session as session:
+        for _ in range(3):
+            update_stats(session, 1, 100)
+    assert driver.get_stats() == (3, 300)
+    assert driver.get_stats() == (3, 300)
+    with driver.session as session:
+        assert session.query(StatsDelta).count() == 3
+    assert snapshots() == before
+
+
+def test_compact_stats_across_months(
+    client, combined_default_and_single_table_settings
+):
+    """
+    Deltas from an older month must be folded into that month's snapshot and
+    every later one, and historical queries must be the same before and after
+    compaction.
+    """
+    engine = create_engine(POSTGRES_CONNECTION)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    session.add(
+        StatsRecord(total_record_count=10, total_record_bytes=1000, month=1, year=2020)
+    )
+    session.add(
+        StatsRecord(total_record_count=20, total_record_bytes=2000, month=3, year=2020)
+    )
+    session.add(StatsDelta(record_count=1, record_bytes=100, month=2, year=2020))
+    session.add(StatsDelta(record_count=2, record_bytes=200, month=3, year=2020))
+    session.add(StatsDelta(record_count=-1, record_bytes=-50, month=5, year=2020))
+    session.commit()
+
+    expected = {
+        (1, 2020): (10, 1000),
+        (2, 2020): (11, 1100),
+        (3, 2020): (23, 2300),
+        (5, 2020): (22, 2250),
+    }
+    for (month, year), totals in expected.items():
+        assert get_stats(session, month, year) == totals
+
+    assert compact_stats(session) == 3
+    session.commit()
+
+    for (month, year), totals in expected.items():
+        assert get_stats(session, month, year) == totals
+        res = client.get(f"/_stats/?month={month}&year={year}")
+        assert (res.json["fileCount"], res.json["totalFileSize"]) == totals
+
+    rows = {
+        (row.month, row.year): (row.total_record_count, row.total_record_bytes)
+        for row in session.query(StatsRecord)
+    }
+    assert rows == expected
+    assert session.query(StatsDelta).count() == 0
+
+    session.close()
+    engine.dispose()
+
+
 def test_size_update(client, user, combined_default_and_single_table_settings):
     """
     Create a blank record, size=None, then fill it with a size with
@@ -572,6 +708,33 @@ def test_seed_stats_after_deletions(combined_default_and_single_table_settings):
     engine.dispose()
 
 
+def test_seed_stats_compacts_pending_deltas(
+    combined_default_and_single_table_settings,
+):
+    """
+    seed_stats recounts the current month, so pending deltas must be folded
+    in first rather than added on top of the recount.
+    """
+    engine = create_engine(POSTGRES_CONNECTION)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    _add_index_record(session, 100)
+    _add_index_record(session, 200)
+    update_stats(session, 2, 300)
+    session.commit()
+
+    count, total_bytes = seed_stats(session)
+    session.commit()
+
+    assert (count, total_bytes) == (2, 300)
+    assert session.query(StatsDelta).count() == 0
+    assert get_stats(session) == (2, 300)
+
+    session.close()
+    engine.dispose()
+
+
 def test_seed_stats_from_connection_accurate(
     combined_default_and_single_table_settings,
 ):
@@ -128,3 +128,77 @@ def test_query_urls_metadata(
     assert res.status_code == 200
     urls_list = res.json
     assert len(urls_list) == 0
+
+
+def test_query_urls_pages_with_start(
+    client, test_data, combined_default_and_single_table_settings
+):
+    """
+    Args:
+        client (test fixture)
+        test_data (tuple[int, int, int]:
+    """
+    url_x_count, versioned_count, unversioned_count = test_data
+
+    everything = client.get("/_query/urls/q").json
+    assert [rec["did"] for rec in everything] == sorted(
+        rec["did"] for rec in everything
+    )
+
+    # walk the records two at a time, continuing after the last did of a page
+    pages = []
+    start = ""
+    while True:
+        res = client.get("/_query/urls/q?limit=2&start={}".format(start))
+        assert res.status_code == 200
+        if not res.json:
+            break
+        pages.extend(res.json)
+        start = res.json[-1]["did"]
+    assert pages == everything
+
+    # every url of a matching record is returned, not only the matching one
+    res = client.get("/_query/urls/q?include=awesome-x&limit=1")
+    assert res.status_code == 200
+    assert len(res.json) == 1
+    assert "s3://awesome-x/bucket/key" in res.json[0]["urls"]
+    assert len(res.json[0]["urls"]) > 1
+
+    res = client.get(
+        "/_query/urls/q?include=awesome-x&start={}".format(res.json[0]["did"])
+    )
+    assert res.status_code == 200
+    assert len(res.json) == 2 * url_x_count - 1
+
+
+def test_query_urls_metadata_pages_with_start(
+    client, user, combined_default_and_single_table_settings
+):
+    dids = []
+    for i in range(3):
+        doc = get_doc()
+        doc["urls"] = ["s3://sweep-a/key-{}".format(i), "s3://sweep-b/key-{}".format(i)]
+        doc["urls_metadata"] = {u: {"state": "sweeping"} for u in doc["urls"]}
+        res = client.post("/index/", json=doc, headers=user)
+        assert res.status_code == 200
+        dids.append(res.json["did"])
+
+    everything = client.get("/_query/urls/metadata/q?key=state&value=sweeping").json
+    assert sorted({rec["did"] for rec in everything}) == sorted(dids)
+
+    pages = []
+    res = client.get("/_query/urls/metadata/q?key=state&value=sweeping&limit=1")
+    while res.json:
+        assert res.status_code == 200
+        pages.extend(res.json)
+        last = res.json[-1]
+        res = client.get(
+            "/_query/urls/metadata/q?key=state&value=sweeping&limit=1&start={}"
+            "&start_url={}".format(last["did"], last["urls"][-1])
+        )
+    assert pages == everything
+
+    # values are matched exactly, whatever characters they contain
+    res = client.get('/_query/urls/metadata/q?key=state&value=sweeping"')
+    assert res.status_code == 200
+    assert res.json == []
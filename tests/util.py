@@ -1,5 +1,8 @@
 import os
 import shutil
+from contextlib import contextmanager
+
+from sqlalchemy import event
 
 
 class removes(object):
@@ -57,3 +60,21 @@ def assert_blank(record, with_authz=False):
         assert record["authz"]
     else:
         assert not record["authz"]
+
+
+@contextmanager
+def recorded_statements(engine):
+    """
+    Collect the (statement, parameters) of every SQL statement run on the
+    engine while the block is open.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)